@@ -15,8 +15,8 @@
 # number of reconciliations of the host and parasite trees
 
 import newickFormatReader
-import Greedy
-import copy
+import DTLOrder
+from operator import truediv
 import DrawDTL
 
 Infinity = float('inf')
@@ -61,12 +61,11 @@ def DP(hostTree, parasiteTree, phi, D, T, L):
     A = {}  # A, C, O, and bestSwitch are all defined in tech report
     C = {}
     O = {}
-    eventsDict = {} # Dictionary to keep track of events, children, and scores
+    eventsDict = {} # Dictionary to keep track of events and children
     bestSwitch = {} 
     Minimums = {} # Dictionary to keep track of minimum reconciliation costs
     oBest = {} # Dictionary to keep track of the lowest costing events in O
     bestSwitchLocations = {} # Dictionary to keep track of switch locations
-    Score = {} # Dictionary to calculate the frequency scoring of each event
 
     # Following logic taken from tech report
     for ep in postorder(parasiteTree, "pTop"):
@@ -101,10 +100,8 @@ def DP(hostTree, parasiteTree, phi, D, T, L):
                 if vpIsATip and phi[vp] == vh:
                     A[(ep, eh)] = 0
                     # Contemporary event to be added to eventsDict
-                    Amin = [["C", (None, None), (None, None), 1.0]] 
-                    Score[(vp, vh)] = 1.0
+                    Amin = [["C", (None, None), (None, None), None]] 
                 else: 
-                    Score[(vp, vh)] = Infinity
                     A[(ep, eh)] = Infinity
                     Amin = [Infinity]
             else: #vh is not a tip
@@ -115,25 +112,21 @@ def DP(hostTree, parasiteTree, phi, D, T, L):
                     coMin = [] # List to keep track lowest cost speciation
                     if COepeh ==C[(ep2, eh1)] + C[(ep1, eh2)]:
                         coMin.append(["S", (pChild2, hChild1), \
-                            (pChild1, hChild2), (Score[(pChild2, hChild1)] * \
-                                Score[(pChild1, hChild2)])])
+                            (pChild1, hChild2), None])
                     if COepeh == C[(ep1, eh1)] + C[(ep2, eh2)]:
                         coMin.append(["S", (pChild1, hChild1), \
-                            (pChild2, hChild2),(Score[(pChild1, hChild1)]\
-                                * Score[(pChild2, hChild2)])])
+                            (pChild2, hChild2), None])
                    
                 else:
                     COepeh = Infinity
                     coMin = [Infinity]
-                    Score[(vp, vh)] = Infinity
                 # Compute L and create event list to add to eventsDict
                 LOSSepeh = L + min(C[(ep, eh1)], C[(ep, eh2)])
                 lossMin = [] # List to keep track of lowest cost loss
                 if LOSSepeh == L + C[(ep, eh1)]: lossMin.append(\
-                    ["L", (vp, hChild1), (None, None), \
-                    Score[(vp, hChild1)]])
+                    ["L", (vp, hChild1), (None, None), None])
                 if LOSSepeh == L + C[(ep, eh2)]: lossMin.append(\
-                    ["L", (vp, hChild2), (None, None), Score[(vp, hChild2)]])
+                    ["L", (vp, hChild2), (None, None), None])
 
                 # Determine which event occurs for A[(ep, eh)]
                 A[(ep, eh)] = min(COepeh, LOSSepeh)
@@ -150,8 +143,7 @@ def DP(hostTree, parasiteTree, phi, D, T, L):
             if not vpIsATip:
                 DUPepeh = D + C[(ep1, eh)] + C[(ep2, eh)]
                 # List to keep track of lowest cost duplication event
-                dupList = ["D", (pChild1, vh), (pChild2, vh), \
-                (Score[(pChild1, vh)] * Score[(pChild2, vh)])]
+                dupList = ["D", (pChild1, vh), (pChild2, vh), None]
             else:
                 DUPepeh = Infinity
                 dupList = [Infinity]
@@ -166,43 +158,25 @@ def DP(hostTree, parasiteTree, phi, D, T, L):
                     bestSwitch[(ep1, eh)]):
                     for location in bestSwitchLocations[(pChild2,vh)]:
                         currentLoc = location[1] # Switch landing site
-                        if currentLoc == None: # Switches to a leaf
-                            Score[(pChild1, currentLoc)] = Infinity
-                            Score[(pChild2, currentLoc)] = Infinity
                         switchList.append(["T", (pChild1, vh), (pChild2, \
-                            currentLoc), (Score[(pChild1, vh)] * \
-                            Score[(pChild2, currentLoc)])])
+                            currentLoc), None])
                 # if ep1 switching has the lowest cost
                 elif (C[(ep2, eh)] + bestSwitch[(ep1, eh)]) < (C[(ep1, eh)] +\
                     bestSwitch[(ep2, eh)]): 
                     for location in bestSwitchLocations[(pChild1,vh)]:
                         currentLoc = location[1]
-                        if currentLoc == None:
-                            Score[(pChild1, currentLoc)] = Infinity
-                            Score[(pChild2, currentLoc)] = Infinity
                         switchList.append(["T", (pChild2, vh), \
-                            (pChild1, currentLoc), (Score[(pChild2, vh)] * \
-                                Score[(pChild1, currentLoc)])])
+                            (pChild1, currentLoc), None])
                 # if ep1 switching has the same cost as ep2 switching
                 else: 
                     for location in bestSwitchLocations[(pChild2, vh)]:
                         currentLoc = location[1]
-                        if currentLoc != None:
-                            switchList.append(["T", (pChild1, vh), \
-                                (pChild2, currentLoc), (Score[(pChild1, vh)] * \
-                                    Score[(pChild2, currentLoc)])])
-                        else:
-                            switchList.append(["T", (pChild1, vh), \
-                                (pChild2, currentLoc), Infinity])
+                        switchList.append(["T", (pChild1, vh), \
+                            (pChild2, currentLoc), None])
                     for location in bestSwitchLocations[(pChild1,vh)]:
                         currentLoc = location[1]
-                        if currentLoc != None:
-                            switchList.append(["T", (pChild2, vh), \
-                                (pChild1, currentLoc), (Score[(pChild2, vh)] * \
-                                    Score[(pChild1, currentLoc)])])
-                        else:
-                            switchList.append(["T", (pChild1, vh), \
-                                (pChild2, currentLoc), Infinity])
+                        switchList.append(["T", (pChild2, vh), \
+                            (pChild1, currentLoc), None])
 
             else:
                 SWITCHepeh = Infinity
@@ -217,12 +191,6 @@ def DP(hostTree, parasiteTree, phi, D, T, L):
                 eventsDict[(vp, vh)].extend(switchList)
             if min(A[(ep, eh)], DUPepeh, SWITCHepeh) == A[(ep, eh)]:
                 eventsDict[(vp, vh)].extend(Amin)
-            for key in eventsDict:
-                mapScore = 0 # initialize frequency scoring for each event
-                for event in eventsDict[key]:
-                    if type(event) is list:
-                        mapScore += event[-1]
-                Score[key] = mapScore
             if Minimums[(vp, vh)] == Infinity:
                 del Minimums[(vp, vh)]
                 del eventsDict[(vp, vh)]
@@ -304,82 +272,195 @@ def DP(hostTree, parasiteTree, phi, D, T, L):
     # Use findPath and findBestRoots to construct the DTL graph dictionary
     treeMin = findBestRoots(parasiteTree, Minimums)
     DTL = findPath(treeMin, eventsDict, {}) 
-    for key in Score.keys():
-        if not key in DTL:
-            del Score[key]
-    DTL, numRecon = addScores(treeMin, DTL, Score)
+    numRecon = addScores(treeMin, DTL)
     return DTL, numRecon
 
 
+def minCost(hostTree, parasiteTree, phi, D, T, L, count=False):
+    """ Takes a hostTree, parasiteTree, tip mapping function phi, and
+        duplication cost (D), transfer cost (T), and loss cost (L) and
+        returns the cost of a maximum parsimony reconciliation. If count is
+        True, it returns a tuple of that cost and the number of maximum
+        parsimony reconciliations in the DTL graph built by DP, as an exact
+        integer.
+        Only the cost tables, and the count tables if asked for, are filled
+        in, and the rows of a parasite edge are dropped as soon as its parent
+        edge is done, so this is much cheaper than DP when the DTL graph is
+        not needed. Cospeciation is assumed to cost 0. """
+
+    hostPostorder = postorder(hostTree, "hTop")
+    hostPreorder = preorder(hostTree, "hTop")
+    # Rows of the C and bestSwitch tables (and their counts), keyed by ep
+    # and then by eh.  A row is only kept until the parent of ep is done.
+    C = {}
+    bestSwitch = {}
+    Count = {}
+    switchCount = {}
+
+    for ep in postorder(parasiteTree, "pTop"):
+        _, vp, ep1, ep2 = parasiteTree[ep]
+        vpIsATip = ep1 == None
+        Cep = {}
+        Oep = {}
+        CountEp = {}
+        oCountEp = {}
+        for eh in hostPostorder:
+            _, vh, eh1, eh2 = hostTree[eh]
+
+            # Compute A(ep, eh)
+            if eh1 == None: # vh is a tip
+                if vpIsATip and phi[vp] == vh:
+                    Aepeh = 0
+                    aCount = 1
+                else:
+                    Aepeh = Infinity
+                    aCount = 0
+            else:
+                if not vpIsATip:
+                    CO1 = C[ep1][eh1] + C[ep2][eh2]
+                    CO2 = C[ep1][eh2] + C[ep2][eh1]
+                    COepeh = min(CO1, CO2)
+                else:
+                    COepeh = Infinity
+                LOSSepeh = L + min(Cep[eh1], Cep[eh2])
+                Aepeh = min(COepeh, LOSSepeh)
+                aCount = 0
+                if count and Aepeh != Infinity:
+                    if COepeh == Aepeh:
+                        if COepeh == CO2:
+                            aCount += Count[ep1][eh2] * Count[ep2][eh1]
+                        if COepeh == CO1:
+                            aCount += Count[ep1][eh1] * Count[ep2][eh2]
+                    if LOSSepeh == Aepeh:
+                        if LOSSepeh == L + Cep[eh1]:
+                            aCount += CountEp[eh1]
+                        if LOSSepeh == L + Cep[eh2]:
+                            aCount += CountEp[eh2]
+
+            # Compute D and T, then C(ep, eh)
+            if not vpIsATip:
+                DUPepeh = D + C[ep1][eh] + C[ep2][eh]
+                switch1 = C[ep1][eh] + bestSwitch[ep2][eh]
+                switch2 = C[ep2][eh] + bestSwitch[ep1][eh]
+                SWITCHepeh = T + min(switch1, switch2)
+            else:
+                DUPepeh = Infinity
+                SWITCHepeh = Infinity
+            Cep[eh] = min(Aepeh, DUPepeh, SWITCHepeh)
+
+            if count:
+                cCount = 0
+                if Cep[eh] != Infinity:
+                    if DUPepeh == Cep[eh]:
+                        cCount += Count[ep1][eh] * Count[ep2][eh]
+                    if SWITCHepeh == Cep[eh]:
+                        if switch1 <= switch2:
+                            cCount += Count[ep1][eh] * switchCount[ep2][eh]
+                        if switch2 <= switch1:
+                            cCount += Count[ep2][eh] * switchCount[ep1][eh]
+                    if Aepeh == Cep[eh]:
+                        cCount += aCount
+                CountEp[eh] = cCount
+
+            # Compute O(ep, eh), counting only the first minimum like oBest
+            # does in DP
+            if eh1 == None:
+                Oep[eh] = Cep[eh]
+                if count:
+                    oCountEp[eh] = CountEp[eh]
+            else:
+                options = [Cep[eh], Oep[eh1], Oep[eh2]]
+                Oep[eh] = min(options)
+                if count:
+                    oCountEp[eh] = [CountEp[eh], oCountEp[eh1], \
+                        oCountEp[eh2]][options.index(Oep[eh])]
+
+        # Compute bestSwitch values
+        bestSwitchEp = {"hTop": Infinity}
+        switchCountEp = {"hTop": 0}
+        for eh in hostPreorder:
+            _, vh, eh1, eh2 = hostTree[eh]
+            if eh1 != None and eh2 != None: # not a tip
+                bestSwitchEp[eh1] = min(bestSwitchEp[eh], Oep[eh2])
+                bestSwitchEp[eh2] = min(bestSwitchEp[eh], Oep[eh1])
+                if count:
+                    for child, other in [(eh1, eh2), (eh2, eh1)]:
+                        childCount = 0
+                        if eh != "hTop" and \
+                            bestSwitchEp[child] == bestSwitchEp[eh]:
+                            childCount += switchCountEp[eh]
+                        if bestSwitchEp[child] == Oep[other]:
+                            childCount += oCountEp[other]
+                        switchCountEp[child] = childCount
+
+        # The rows of the children of ep are no longer needed
+        if not vpIsATip:
+            for child in [ep1, ep2]:
+                del C[child]
+                del bestSwitch[child]
+                if count:
+                    del Count[child]
+                    del switchCount[child]
+        C[ep] = Cep
+        bestSwitch[ep] = bestSwitchEp
+        if count:
+            Count[ep] = CountEp
+            switchCount[ep] = switchCountEp
+
+    cost = min(C["pTop"].values())
+    if not count:
+        return cost
+    numRecon = 0
+    for eh in C["pTop"]:
+        if C["pTop"][eh] == cost:
+            numRecon += Count["pTop"][eh]
+    return cost, numRecon
+
 def preorderDTLsort(DTL, ParasiteRoot):
     """This takes in a DTL dictionary and parasite root and returns a sorted list, orderedKeysL, that is ordered
-    by level from largest to smallest, where level 0 is the root and the highest level has tips."""
-
-    keysL = Greedy.orderDTL(DTL, ParasiteRoot)
-    orderedKeysL = []
-    levelCounter = 0
-    while len(orderedKeysL) < len(keysL):
-        for mapping in keysL:
-            if mapping[-1] == levelCounter:
-                orderedKeysL = orderedKeysL + [mapping]
-        levelCounter += 1
-    
-    lastLevel = orderedKeysL[-1][1]
-    return orderedKeysL
-
-def preorderCheck(preOrderList):
-    """This takes a list from preorderDTLsort and removes the duplicate tuples"""
-    newList = []
-    preDict = {}
-    for root in preOrderList:
-        if not root in newList:
-            newList.append(root)
-    for x in range(len(newList)):
-        currentRoot = newList[x][0]
-        currentLevel = newList[x][1]
-        if currentRoot in preDict:
-            if preDict[currentRoot][0]> currentLevel:
-                newList[x] = (None, None)
-            else:
-                location = preDict[currentRoot][1]
-                newList[location] = (None, None)
-        else:
-            preDict[currentRoot] = (currentLevel,x)
-    return newList
-
-def addScores(treeMin, DTLDict, ScoreDict):
-    """Takes the list of reconciliation roots, the DTL reconciliation graph, 
-    a dictionary of parent nodes, and a dictionary of score values, and 
-    returns the DTL with the normalized frequency scores calculated."""
-    newDTL = copy.deepcopy(DTLDict)
-    parentsDict = {}
-    preOrder1 = preorderDTLsort(DTLDict, treeMin[0][0])
-    preOrder2 = preorderCheck(preOrder1)
-    for root in preOrder2:
-        if root != (None, None):
-            vertices = root[0]
-            if root[1] == 0:
-                parentsDict[vertices] = ScoreDict[vertices]
-            for n in range(len(DTLDict[vertices])-1):
-                _,child1,child2,oldScore = DTLDict[vertices][n]
-                newDTL[vertices][n][3] = parentsDict[vertices] * \
-                (oldScore / ScoreDict[vertices])
-                if child1!= (None, None):
-                    if child1 in parentsDict:
-                        parentsDict[DTLDict[vertices][n][1]] += \
-                        newDTL[vertices][n][3]
-                    else: 
-                        parentsDict[child1] = newDTL[vertices][n][3] 
-                if child2!=(None, None):
-                    if child2 in parentsDict:
-                        parentsDict[child2] += newDTL[vertices][n][3]
-                    else: 
-                        parentsDict[child2] = newDTL[vertices][n][3]
-    normalize = newDTL[preOrder2[-1][0]][0][-1]
-    for key in newDTL:
-        for event in newDTL[key][:-1]:
-            event[-1] = event[-1]/normalize
-    return newDTL, normalize
+    by level from smallest to largest, where level 0 is the root and the highest level has tips. Each mapping
+    node appears once, at the length of the longest path to it from a root, so it comes after all its parents."""
+
+    return DTLOrder.preorder(DTL)
+
+def addScores(treeMin, DTLDict):
+    """Takes the list of reconciliation roots and the DTL reconciliation 
+    graph, and sets the score of every event in the graph to its frequency,
+    the fraction of maximum parsimony reconciliations that contain it. The 
+    scores are written in place, and the number of maximum parsimony 
+    reconciliations is returned as an exact integer."""
+
+    preOrder = preorderDTLsort(DTLDict, treeMin[0][0])
+    # Inside pass: the number of reconciliations of the subgraph below each
+    # mapping node and each event, children first
+    inside = {}
+    for vertices, _ in reversed(preOrder):
+        total = 0
+        for event in DTLDict[vertices][:-1]:
+            count = 1
+            for child in event[1:3]:
+                if child != (None, None):
+                    count *= inside[child]
+            event[-1] = count
+            total += count
+        inside[vertices] = total
+    numRecon = sum(inside[root] for root in treeMin)
+    # Outside pass: the number of ways to complete a reconciliation above 
+    # each mapping node, parents first
+    outside = dict.fromkeys(DTLDict, 0)
+    for root in treeMin:
+        outside[root] = 1
+    for vertices, _ in preOrder:
+        for event in DTLDict[vertices][:-1]:
+            _, child1, child2, count = event
+            if child1 != (None, None):
+                if child2 != (None, None):
+                    outside[child1] += outside[vertices] * inside[child2]
+                    outside[child2] += outside[vertices] * inside[child1]
+                else:
+                    outside[child1] += outside[vertices]
+            event[-1] = truediv(outside[vertices] * count, numRecon)
+    return numRecon
 
 def findBestRoots(Parasite, MinimumDict):
     """Takes Parasite Tree and a dictionary of minimum reconciliation costs
@@ -398,16 +479,32 @@ def findPath(tupleList, eventDict, uniqueDict):
     """Takes as input tupleList, a list of minimum reconciliation cost roots,
      eventDict, the dictionary of events and children for each node, and 
      uniqueDict, the dictionary of unique vertex mappings. This returns the 
-     completed DTL graph as a Dictionary"""
-    for vertexPair in tupleList:
-        if not vertexPair in uniqueDict:
-            uniqueDict[vertexPair] = eventDict[vertexPair]
-        for event in eventDict[vertexPair][:-1]:
-            for location in event:
-                if type(location) is tuple and location != (None, None):
-                    findPath([location], eventDict, uniqueDict)
+     completed DTL graph as a Dictionary. The graph is walked depth first
+     with an explicit stack, and each mapping node is expanded only the
+     first time it is reached, so this is linear in the size of the graph
+     and does not depend on the recursion limit."""
+    # Each stack entry is an iterator over the mapping nodes still to visit
+    # below one expanded mapping node (or over the roots, at the bottom)
+    stack = [iter(tupleList)]
+    while stack:
+        for vertexPair in stack[-1]:
+            if not vertexPair in uniqueDict:
+                uniqueDict[vertexPair] = eventDict[vertexPair]
+                stack.append(childMappings(eventDict[vertexPair]))
+                break
+        else:
+            stack.pop()
     return uniqueDict
 
+def childMappings(eventList):
+    """Takes as input the list of events of a mapping node (with the cost as
+    the last element) and returns an iterator over the child mapping nodes of
+    those events, in order."""
+    for event in eventList[:-1]:
+        for location in event:
+            if type(location) is tuple and location != (None, None):
+                yield location
+
 def reconcile(fileName, D, T, L):
     """Takes as input a newick file, FileName, a dupliction cost, a transfer 
     cost, and a loss cost. This uses newickFormatReader to extract the host 
@@ -0,0 +1,293 @@
+# DPnumpy.py
+# Array-backed version of the DTL reconciliation DP in DP.py
+
+# Host and parasite edges are interned to integer indices in postorder and
+# the A, C, O and bestSwitch tables of the tech report are kept as dense
+# |P| x |H| NumPy arrays.  Each parasite row is filled with vectorized
+# operations over the host axis: the entries that only depend on earlier
+# parasite rows (speciation, duplication and switch) are computed for the
+# whole row at once, and the entries that depend on the row itself (loss and
+# O bottom-up, bestSwitch top-down) are computed one host level at a time.
+# The events of the DTL graph are then only built for the mapping nodes that
+# are reachable from the optimal roots, so the output is the same DTL graph
+# dictionary that DP.DP returns.
+
+import numpy as np
+import newickFormatReader
+from DP import postorder, findBestRoots, findPath, addScores
+
+Infinity = float('inf')
+
+def internTree(tree, rootEdgeName):
+    """ Takes a tree (in the format described in DP.py) and the name of its
+    root edge and returns a dictionary with the edges of the tree in
+    postorder, the index of every edge and of every bottom vertex, arrays of
+    left child, right child and parent indices (-1 where there is none), and
+    the internal edge indices grouped by height (for bottom-up passes) and
+    by depth (for top-down passes). """
+
+    edges = postorder(tree, rootEdgeName)
+    index = {}
+    for i in range(len(edges)):
+        index[edges[i]] = i
+    size = len(edges)
+    left = np.empty(size, dtype=int)
+    right = np.empty(size, dtype=int)
+    parent = np.empty(size, dtype=int)
+    parent.fill(-1)
+    vertexIndex = {}
+    height = [0] * size
+    for i in range(size):
+        _, v, e1, e2 = tree[edges[i]]
+        vertexIndex[v] = i
+        if e1 == None:
+            left[i] = -1
+            right[i] = -1
+        else:
+            left[i] = index[e1]
+            right[i] = index[e2]
+            parent[left[i]] = i
+            parent[right[i]] = i
+            # children precede their parent in postorder
+            height[i] = 1 + max(height[left[i]], height[right[i]])
+    depth = [0] * size
+    for i in reversed(range(size)):
+        if parent[i] != -1:
+            depth[i] = depth[parent[i]] + 1
+    byHeight = [[] for _ in range(max(height) + 1)]
+    byDepth = [[] for _ in range(max(depth) + 1)]
+    for i in range(size):
+        if left[i] != -1:
+            byHeight[height[i]].append(i)
+            byDepth[depth[i]].append(i)
+    return {"edges": edges, "index": index, "vertexIndex": vertexIndex,
+            "left": left, "right": right, "parent": parent,
+            "tips": np.flatnonzero(left == -1),
+            "byHeight": [np.array(level, dtype=int) for level in byHeight
+                         if level],
+            "byDepth": [np.array(level, dtype=int) for level in byDepth
+                        if level]}
+
+def fillTables(hostTree, parasiteTree, phi, D, T, L, host, paras):
+    """ Takes a hostTree, parasiteTree, tip mapping function phi, the event
+    costs and the interned host and parasite trees (see internTree) and
+    returns the A, C, O and bestSwitch tables as |P| x |H| arrays. """
+
+    numP = len(paras["edges"])
+    numH = len(host["edges"])
+    A = np.empty((numP, numH))
+    C = np.empty((numP, numH))
+    O = np.empty((numP, numH))
+    bestSwitch = np.empty((numP, numH))
+    hTips = host["tips"]
+    hTipVertices = [hostTree[host["edges"][h]][1] for h in hTips]
+    hRoot = numH - 1
+    infRow = np.empty(numH)
+    infRow.fill(Infinity)
+
+    for p in range(numP):
+        vp = parasiteTree[paras["edges"][p]][1]
+        p1 = paras["left"][p]
+        p2 = paras["right"][p]
+        vpIsATip = p1 == -1
+
+        # Everything that only depends on the rows of the parasite children
+        if vpIsATip:
+            DUP = infRow
+            SWITCH = infRow
+        else:
+            DUP = D + C[p1] + C[p2]
+            SWITCH = T + np.minimum(C[p1] + bestSwitch[p2], \
+                                    C[p2] + bestSwitch[p1])
+        base = np.minimum(DUP, SWITCH)
+
+        # A and C at the host tips
+        A[p, hTips] = Infinity
+        if vpIsATip:
+            for h, vh in zip(hTips, hTipVertices):
+                if phi[vp] == vh:
+                    A[p, h] = 0
+        C[p, hTips] = np.minimum(A[p, hTips], base[hTips])
+        O[p, hTips] = C[p, hTips]
+
+        # A, C and O for internal host edges, lowest level first, since the
+        # loss entries depend on C of the host children in this same row
+        for level in host["byHeight"]:
+            h1 = host["left"][level]
+            h2 = host["right"][level]
+            if vpIsATip:
+                COepeh = infRow[level]
+            else:
+                COepeh = np.minimum(C[p1, h1] + C[p2, h2], \
+                                    C[p1, h2] + C[p2, h1])
+            LOSSepeh = L + np.minimum(C[p, h1], C[p, h2])
+            A[p, level] = np.minimum(COepeh, LOSSepeh)
+            C[p, level] = np.minimum(A[p, level], base[level])
+            O[p, level] = np.minimum(C[p, level], \
+                                     np.minimum(O[p, h1], O[p, h2]))
+
+        # bestSwitch, from the root down
+        bestSwitch[p, hRoot] = Infinity
+        for level in host["byDepth"]:
+            h1 = host["left"][level]
+            h2 = host["right"][level]
+            bestSwitch[p, h1] = np.minimum(bestSwitch[p, level], O[p, h2])
+            bestSwitch[p, h2] = np.minimum(bestSwitch[p, level], O[p, h1])
+
+    return A, C, O, bestSwitch
+
+def DP(hostTree, parasiteTree, phi, D, T, L):
+    """ Takes a hostTree, parasiteTree, tip mapping function phi, and
+        duplication cost (D), transfer cost (T), and loss cost (L) and
+        returns the DTL graph in the form of a dictionary, as well as
+        the number of maximum parsimony reconciliations, exactly as
+        DP.DP does. Cospeciation is assumed to cost 0. """
+
+    host = internTree(hostTree, "hTop")
+    paras = internTree(parasiteTree, "pTop")
+    A, C, O, bestSwitch = fillTables(hostTree, parasiteTree, phi, D, T, L, \
+        host, paras)
+
+    pEdges = paras["edges"]
+    hEdges = host["edges"]
+    pIndex = paras["vertexIndex"]
+    hIndex = host["vertexIndex"]
+    hRoot = len(hEdges) - 1
+
+    def vertexPair(p, h):
+        return (parasiteTree[pEdges[p]][1], hostTree[hEdges[h]][1])
+
+    oBestMemo = {}
+    def oBest(p, h):
+        """ The mapping node that attains O[p, h] (oBest in DP.DP) """
+        if (p, h) not in oBestMemo:
+            h1 = host["left"][h]
+            if h1 == -1:
+                oBestMemo[(p, h)] = vertexPair(p, h)
+            else:
+                h2 = host["right"][h]
+                options = [C[p, h], O[p, h1], O[p, h2]]
+                oMin = options.index(min(options))
+                if oMin == 0:
+                    oBestMemo[(p, h)] = vertexPair(p, h)
+                elif oMin == 1:
+                    oBestMemo[(p, h)] = oBest(p, h1)
+                else:
+                    oBestMemo[(p, h)] = oBest(p, h2)
+        return oBestMemo[(p, h)]
+
+    locationsMemo = {}
+    def switchLocations(p, h):
+        """ The landing sites that attain bestSwitch[p, h]
+        (bestSwitchLocations in DP.DP) """
+        if (p, h) not in locationsMemo:
+            locations = []
+            parent = host["parent"][h]
+            if parent != -1:
+                if host["left"][parent] == h:
+                    sibling = host["right"][parent]
+                else:
+                    sibling = host["left"][parent]
+                if parent != hRoot and \
+                    bestSwitch[p, h] == bestSwitch[p, parent]:
+                    locations.extend(switchLocations(p, parent))
+                if bestSwitch[p, h] == O[p, sibling]:
+                    locations.append(oBest(p, sibling))
+            locationsMemo[(p, h)] = locations
+        return locationsMemo[(p, h)]
+
+    def events(vp, vh):
+        """ Returns the list of minimum cost events for the mapping node
+        (vp, vh), in the same order as DP.DP, with the scores left as None
+        for addScores to fill in. """
+        p = pIndex[vp]
+        h = hIndex[vh]
+        cost = C[p, h]
+        p1 = paras["left"][p]
+        p2 = paras["right"][p]
+        h1 = host["left"][h]
+        h2 = host["right"][h]
+        eventList = []
+        if p1 != -1:
+            pChild1 = parasiteTree[pEdges[p1]][1]
+            pChild2 = parasiteTree[pEdges[p2]][1]
+            if D + C[p1, h] + C[p2, h] == cost:
+                eventList.append(["D", (pChild1, vh), (pChild2, vh), None])
+            switch1 = C[p1, h] + bestSwitch[p2, h]
+            switch2 = C[p2, h] + bestSwitch[p1, h]
+            if T + min(switch1, switch2) == cost:
+                if switch1 <= switch2:
+                    for location in switchLocations(p2, h):
+                        eventList.append(["T", (pChild1, vh), \
+                            (pChild2, location[1]), None])
+                if switch2 <= switch1:
+                    for location in switchLocations(p1, h):
+                        eventList.append(["T", (pChild2, vh), \
+                            (pChild1, location[1]), None])
+        if A[p, h] == cost:
+            if h1 == -1:
+                eventList.append(["C", (None, None), (None, None), None])
+            else:
+                hChild1 = hostTree[hEdges[h1]][1]
+                hChild2 = hostTree[hEdges[h2]][1]
+                coMin = []
+                if p1 != -1:
+                    COepeh = min(C[p1, h1] + C[p2, h2], C[p1, h2] + C[p2, h1])
+                    if COepeh == C[p2, h1] + C[p1, h2]:
+                        coMin.append(["S", (pChild2, hChild1), \
+                            (pChild1, hChild2), None])
+                    if COepeh == C[p1, h1] + C[p2, h2]:
+                        coMin.append(["S", (pChild1, hChild1), \
+                            (pChild2, hChild2), None])
+                else:
+                    COepeh = Infinity
+                LOSSepeh = L + min(C[p, h1], C[p, h2])
+                lossMin = []
+                if LOSSepeh == L + C[p, h1]:
+                    lossMin.append(["L", (vp, hChild1), (None, None), None])
+                if LOSSepeh == L + C[p, h2]:
+                    lossMin.append(["L", (vp, hChild2), (None, None), None])
+                if COepeh < LOSSepeh:
+                    eventList.extend(coMin)
+                elif LOSSepeh < COepeh:
+                    eventList.extend(lossMin)
+                else:
+                    eventList.extend(lossMin + coMin)
+        return eventList
+
+    # Find the optimal roots, then the events of every reachable mapping node
+    pRoot = len(pEdges) - 1
+    rootMinimums = {}
+    for h in range(len(hEdges)):
+        if C[pRoot, h] != Infinity:
+            rootMinimums[vertexPair(pRoot, h)] = float(C[pRoot, h])
+    treeMin = findBestRoots(parasiteTree, rootMinimums)
+    eventsDict = {}
+    stack = list(treeMin)
+    while stack:
+        mapping = stack.pop()
+        if mapping in eventsDict:
+            continue
+        eventsDict[mapping] = events(*mapping)
+        for event in eventsDict[mapping]:
+            for child in event[1:3]:
+                if child != (None, None) and child not in eventsDict:
+                    stack.append(child)
+
+    # Add the cost of each mapping node to its event list
+    for mapping in eventsDict:
+        p = pIndex[mapping[0]]
+        h = hIndex[mapping[1]]
+        eventsDict[mapping].append(float(C[p, h]))
+
+    DTL = findPath(treeMin, eventsDict, {})
+    numRecon = addScores(treeMin, DTL)
+    return DTL, numRecon
+
+def reconcile(fileName, D, T, L):
+    """Takes as input a newick file, FileName, a dupliction cost, a transfer
+    cost, and a loss cost. This uses newickFormatReader to extract the host
+    tree, parasite tree and tip mapping from the file and then calls DP
+    to return the DTL reconciliation graph of the provided newick file"""
+    host, paras, phi = newickFormatReader.getInput(fileName)
+    return DP(host, paras, phi, D, T, L)
@@ -0,0 +1,75 @@
+# DTLOrder.py
+# Topological ordering of DTL reconciliation graphs
+
+# A DTL graph (in the format returned by DP.DP) is a DAG on its mapping
+# nodes. DP, Greedy and RandomGenerator all walk the mapping nodes level by
+# level, where the level of a mapping node is the length of the longest path
+# to it from a root of the graph. The levels are found here in one Kahn-style
+# pass over the graph, so the work is linear in the number of mapping nodes
+# and events. Nothing is cached: a caller that needs the ordering of the same
+# graph more than once computes it once and passes it on, and computes it
+# again if it changes the graph.
+
+def levels(DTL):
+    """Takes a DTL graph and returns a dictionary with the mapping nodes as
+    keys and their levels as values, where the roots (mapping nodes with no
+    parents) are at level 0 and every other mapping node is one level below
+    its lowest parent."""
+
+    inDegree = dict.fromkeys(DTL, 0)
+    for key in DTL:
+        for event in DTL[key][:-1]:
+            for child in event[1:3]:
+                if child != (None, None):
+                    inDegree[child] += 1
+    levels = {}
+    ready = [key for key in DTL if inDegree[key] == 0]
+    for key in ready:
+        levels[key] = 0
+    while ready:
+        key = ready.pop()
+        for event in DTL[key][:-1]:
+            for child in event[1:3]:
+                if child != (None, None):
+                    if levels.get(child, -1) < levels[key] + 1:
+                        levels[child] = levels[key] + 1
+                    inDegree[child] -= 1
+                    if inDegree[child] == 0:
+                        ready.append(child)
+    if len(levels) < len(DTL):
+        raise ValueError("DTL graph has a cycle")
+    return levels
+
+def preorder(DTL):
+    """Takes a DTL graph and returns a list of tuples (mapping node, level)
+    ordered by level from smallest to largest, so every mapping node comes
+    after all of its parents. Mapping nodes on the same level are in the
+    iteration order of the graph."""
+
+    levelsDict = levels(DTL)
+    buckets = [[] for _ in range(max(levelsDict.values()) + 1)] \
+        if levelsDict else []
+    for key in DTL:
+        buckets[levelsDict[key]].append((key, levelsDict[key]))
+    return [mapping for bucket in buckets for mapping in bucket]
+
+def postorder(DTL):
+    """Takes a DTL graph and returns the list from preorder reversed, so
+    every mapping node comes before all of its parents."""
+
+    return preorder(DTL)[::-1]
+
+def parents(DTL):
+    """Takes a DTL graph and returns a dictionary with the mapping nodes as
+    keys and lists of their parent mapping nodes (each listed once) as
+    values."""
+
+    parentsDict = dict((key, []) for key in DTL)
+    for key in DTL:
+        for event in DTL[key][:-1]:
+            for child in event[1:3]:
+                # All events of key are seen together, so a repeated parent
+                # is always the last one added
+                if child != (None, None) and parentsDict[child][-1:] != [key]:
+                    parentsDict[child].append(key)
+    return parentsDict
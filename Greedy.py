@@ -7,6 +7,9 @@
 # vertex-based DP algorithm. The main function in this file is called Greedy
 # and the remaining functions are helper functions that are used by Greedy.
 
+import DTLOrder
+import heapq
+
 def findRoot(Tree):
     """This function takes in a parasiteTree and returns a string with the 
     name of the root vertex of the tree"""
@@ -15,172 +18,156 @@ def findRoot(Tree):
         return Tree['pTop'][1]
     return Tree['hTop'][1] 
 
-def orderDTL(DTL, ParasiteRoot):
-    """This function takes in a DTL graph and the ParasiteRoot. It outputs a 
-    list, keysL, that contains tuples. Each tuple has two elements. The first
-    is a mapping node of the form (p, h), where p is a parasite node and h is 
-    a host node. The second element is a level representing the depth of that
-    mapping node within the tree."""
-
-    keysL = []
-    topNodes = []
-    for key in DTL:
-        if key[0] == ParasiteRoot:
-            topNodes.append(key)
-    for vertex in topNodes:
-        keysL.extend(orderDTLRoots(DTL, vertex, 0))
-    return keysL
-
-def orderDTLRoots(DTL, vertex, level):
-    """This function takes a DTL graph, one node, a vertex, of the DTL graph, 
-    and level, and returns a list, keysL, that contains tuples. Each tuple has
-    two elements. The first is a mapping node of the form (p, h), where p is a
-    parasite node and h is a host node. The second element is a level 
-    representing the depth of that mapping node within the tree. This function
-    adds the input vertex to keysL and recurses on its children."""
-
-    keysL = []
-    #loop through each event associated with key in DTL
-    for i in range(len(DTL[vertex]) - 1):
-        event = DTL[vertex][i]
-        child1 = event[1]
-        child2 = event[2]
-        keysL = keysL + [(vertex, level)]
-        if child1[0] != None:
-            keysL.extend(orderDTLRoots(DTL, child1, level + 1))
-        if child2[0] != None:
-            keysL.extend(orderDTLRoots(DTL, child2, level + 1)) 
-    return keysL
-
-
-def sortHelper(DTL, keysL):
-    """This function takes in a list keysL,and a DTL graph, and returns a new 
-    list, uniqueKeysL that has removed duplicate mapping nodes from keysL.
-    This function chooses the highest level for each mapping node because we 
-    are using the bottom-up approach."""
-    
-    uniqueKeysL = []
-    for key in DTL:
-        maxLevel = float("-inf")
-        for element in keysL:
-            if key == element[0]:
-                if element[1] > maxLevel:
-                    maxLevel = element[1]
-        uniqueKeysL.append((key, maxLevel))
-    return uniqueKeysL
-
-
 def postorderDTLsort(DTL, ParasiteRoot):
     """This function takes in a DTL graph and ParasiteRoot, and returns a 
     sorted list, orderedKeysL, that is ordered by level from largest to 
-    smallest, where level 0 is the root and the highest level are tips."""
-
-    keysL = orderDTL(DTL, ParasiteRoot)
-    uniqueKeysL = sortHelper(DTL, keysL)
-    orderedKeysL = []
-    levelCounter = 0
-    while len(orderedKeysL) < len(uniqueKeysL):
-        for mapping in uniqueKeysL:
-            if mapping[-1] == levelCounter:
-                orderedKeysL = [mapping] + orderedKeysL
-        levelCounter += 1
-    return orderedKeysL
-
-
-def bookkeeping(DTL, ParasiteTree):
-    """This function takes as inputs a DTL graph and ParasiteTree, and then 
-    records what the max is at each mapping node and which event the max came 
-    from. It outputs a dictionary BSFHMap by looping through the keys in a 
-    sorted list of mapping nodes and finding the max score at each mapping 
-    node and event node. BSFHMap has keys of the form (p, h) which are the 
-    mapping nodes, and values which are lists where the first element is an 
-    event with the max score, and the last element is the maxScore."""
+    smallest, where level 0 is the root and the highest level are tips. 
+    Each element is a tuple of a mapping node and its level, which is the 
+    length of the longest path to it from a root."""
+
+    return DTLOrder.postorder(DTL)
+
+
+def eventScore(DTL, collected, mapNode, i):
+    """This function takes as input a DTL graph, a set collected of the 
+    events whose scores have already been collected, given as pairs of a 
+    mapping node and the index of the event in its list, a mapping node 
+    mapNode and an index i. It returns the current score of the i-th event 
+    of mapNode, which is 0 once that event has been collected. The DTL graph 
+    itself is never changed."""
+
+    if (mapNode, i) in collected:
+        return 0
+    return DTL[mapNode][i][-1]
+
+
+def bestEvent(DTL, BSFHMap, mapNode, collected):
+    """This function takes as inputs a DTL graph, a dictionary BSFHMap that 
+    already has entries for the children of mapNode, a mapping node mapNode
+    and the set of collected events. It returns the BSFHMap entry for 
+    mapNode, a list where the first element is the event with the max score
+    (with its current score), the second is the index of that event in the 
+    list of events of mapNode, and the last element is the max score, which 
+    is the score of that event plus the max scores of its children."""
+
+    #check if the key is a tip:
+    if DTL[mapNode][0][0] == 'C':              
+        score = eventScore(DTL, collected, mapNode, 0)
+        return [DTL[mapNode][0][:-1] + [score], 0, score]
+    #initialize counter                                    
+    maxScore = float("-inf")  
+    #initialize variables to keep track of where max came from
+    maxEvent = [] 
+    maxIndex = None
+    #iterate through the events associated with the key node
+    for i in range(len(DTL[mapNode]) - 1):  
+        event = DTL[mapNode][i]
+        score = eventScore(DTL, collected, mapNode, i)
+        totalScore = score
+        if event[1] != (None, None):
+            totalScore = totalScore + BSFHMap[event[1]][-1]
+        if event[2] != (None, None):
+            totalScore = totalScore + BSFHMap[event[2]][-1]
+        #check if current event has a higher score than current max
+        if totalScore > maxScore:  
+            maxScore = totalScore  #set new max score
+            #record where new max came from
+            maxEvent = event[:-1] + [score]
+            maxIndex = i
+    return [maxEvent, maxIndex, maxScore]
+
+
+def bookkeeping(DTL, ParasiteTree, collected=None):
+    """This function takes as inputs a DTL graph, ParasiteTree and optionally
+    the set of collected events (see eventScore), and then records what the 
+    max is at each mapping node and which event the max came from. It 
+    outputs a dictionary BSFHMap by looping through the keys in a sorted 
+    list of mapping nodes and finding the max score at each mapping node and
+    event node. BSFHMap has keys of the form (p, h) which are the mapping 
+    nodes, and values which are lists where the first element is an event 
+    with the max score, the second is the index of that event, and the last
+    element is the maxScore."""
 
     #Example: BSFHMap = {(mapping node): [['event', (p, h), (p, h), score], 
-    #                                                               maxScore]}
-    #Example: BSFHEvent = {(event node): max}
+    #                                                   index, maxScore]}
 
+    if collected is None:
+        collected = set()
     BSFHMap = {}
-    BSFHEvent = {}
     ParasiteRoot = findRoot(ParasiteTree)
     orderedKeysL = postorderDTLsort(DTL, ParasiteRoot)   
     for key in orderedKeysL:
         mapNode = key[0]
-        #check if the key is a tip:
-        if DTL[mapNode][0][0] == 'C':              
-            BSFHMap[mapNode] = [DTL[mapNode][0], DTL[mapNode][0][-1]]
-        #if the key isn't a tip:
-        else: 
-            #initialize counter                                    
-            maxScore = float("-inf")  
-            #initialize variable to keep track of where max came from
-            maxEvent = [] 
-            #iterate through the events associated with the key node
-            for i in range(len(DTL[mapNode]) - 1):  
-                event = tuple(DTL[mapNode][i])
-                BSFHEvent[event] = event[-1]
-                if event[1] != (None, None):
-                    BSFHEvent[event] = BSFHEvent[event]+BSFHMap[event[1]][-1]
-                if event[2] != (None, None):
-                    BSFHEvent[event] = BSFHEvent[event]+BSFHMap[event[2]][-1]
-                #check if current event has a higher score than current max
-                if BSFHEvent[event] > maxScore:  
-                    maxScore = BSFHEvent[event]  #set new max score
-                    maxEvent = list(event)   #record where new max came from
-            BSFHMap[mapNode] = [maxEvent, maxScore]  #set BSFH value of key
+        BSFHMap[mapNode] = bestEvent(DTL, BSFHMap, mapNode, collected)
     return BSFHMap
 
 
-def TraceChildren(DTL, GreedyOnce, BSFHMap, key):
+def updateBookkeeping(DTL, BSFHMap, changedNodes, collected, levels, \
+    parents):
+    """This function takes as inputs a DTL graph, a BSFHMap computed by 
+    bookkeeping, changedNodes, a collection of mapping nodes whose events 
+    have been collected since, the set of collected events, and the levels
+    and parents of the mapping nodes of the DTL graph (from DTLOrder.levels 
+    and DTLOrder.parents). It updates BSFHMap in place so that it is the 
+    same as a new call to bookkeeping would return. Only the changed mapping
+    nodes and the ancestors whose max score changes as a result are 
+    recomputed, children before parents."""
+
+    queued = set(changedNodes)
+    #deepest mapping nodes first, so children are always done before parents
+    heap = [(-levels[mapNode], mapNode) for mapNode in queued]
+    heapq.heapify(heap)
+    while heap:
+        _, mapNode = heapq.heappop(heap)
+        oldScore = BSFHMap[mapNode][-1]
+        BSFHMap[mapNode] = bestEvent(DTL, BSFHMap, mapNode, collected)
+        if BSFHMap[mapNode][-1] != oldScore:
+            for parent in parents[mapNode]:
+                if not parent in queued:
+                    queued.add(parent)
+                    heapq.heappush(heap, (-levels[parent], parent))
+
+
+def collect(DTL, collected, mapNode, i):
+    """This function takes as input a DTL graph, the set of collected 
+    events, a mapping node and the index of one of its events, and adds that
+    event to the collected events, so its score counts as 0 from now on. It
+    returns 1 if the score of the event was not 0 before, and 0 otherwise."""
+
+    score = eventScore(DTL, collected, mapNode, i)
+    collected.add((mapNode, i))
+    if score != 0:
+        return 1
+    return 0
+
+
+def TraceChildren(DTL, GreedyOnce, BSFHMap, key, collected):
     """This function takes as input a DTL graph, a dictionary GreedyOnce, 
     containing the root of an optimal reconciliation, a BSFHMap dicitonary, 
-    and a current key, and returns the optimal reconciliation and new DTL 
-    graph, where the scores of the events in the reconciliation are reset to
-    0."""
-
-    resetDTL = {} #the new DTL graph
-    reset1DTL = {} #this DTL graph deals with the recursive call on the child1
-    reset2DTL = {} #this DTL graph deals with the recursive call on the child2
-    child1 = GreedyOnce[key][1]
-    child2 = GreedyOnce[key][2]
-    if child1 != (None, None):
-        GreedyOnce[child1] = BSFHMap[child1][0][0:3] #add event to greedyOnce
-        #this loop resets all the scores of events that have been used to 0 
-        for i in range(len(DTL[child1]) - 1):       
-            if DTL[child1][i] == BSFHMap[child1][0]:
-                newValue = DTL[child1]
-                newValue[i][-1] = 0
-                reset1DTL[child1] = newValue
-        #this recursive call updates GreedyOnce and the DTL graph
-        newGreedyOnce, DTL1 = TraceChildren(DTL, GreedyOnce, BSFHMap, child1) 
-        reset1DTL.update(DTL1) 
-        GreedyOnce.update(newGreedyOnce)
-    if child2 != (None, None):
-        GreedyOnce[child2] = BSFHMap[child2][0][0:3]
-        for i in range(len(DTL[child2]) - 1): 
-            if DTL[child2][i] == BSFHMap[child2][0]:
-                newValue = DTL[child2]
-                newValue[i][-1] = 0
-                reset2DTL[child2] = newValue      
-        newGreedyOnce, DTL2 = TraceChildren(DTL, GreedyOnce, BSFHMap, child2)
-        reset2DTL.update(DTL2)
-        GreedyOnce.update(newGreedyOnce)
-    resetDTL.update(reset1DTL)
-    resetDTL.update(reset2DTL)
-    return GreedyOnce, resetDTL
-
-
-def greedyOnce(DTL, ParasiteTree):
-    """This function takes the DTL graph and the ParasiteTree as inputs, and 
-    calls bookkeeping to find the dictionary BSFHMap. It returns the 
-    reconciliation with the highest score in a dictionary called GreedyOnce, 
-    and also resets to 0 the scores of the mapping nodes in the optimal 
-    reconciliation. The returned dictionary will have keys which are the 
-    mapping nodes in the optimal reconciliation, and values of the form 
-    (event, child1, child2)."""
+    a current key and the set of collected events. It adds the events below
+    key in the optimal reconciliation to GreedyOnce, adds those events to 
+    the collected events, and returns the number of them whose score was 
+    not 0 before."""
+
+    numCollected = 0
+    for child in GreedyOnce[key][1:3]:
+        if child != (None, None):
+            GreedyOnce[child] = BSFHMap[child][0][0:3] #add event to greedyOnce
+            #collect the score of the event that has been used
+            numCollected += collect(DTL, collected, child, BSFHMap[child][1])
+            #this recursive call updates GreedyOnce and collected
+            numCollected += TraceChildren(DTL, GreedyOnce, BSFHMap, child, \
+                collected)
+    return numCollected
+
+
+def collectBest(DTL, ParasiteRoot, BSFHMap, collected):
+    """This function takes the DTL graph, the ParasiteRoot, the BSFHMap of 
+    the DTL graph and the set of collected events as inputs. It returns the 
+    reconciliation with the highest score in a dictionary called GreedyOnce,
+    its score, and the number of events whose scores were collected for the
+    first time because they are in that reconciliation."""
 
-    BSFHMap = bookkeeping(DTL, ParasiteTree)
-    ParasiteRoot = findRoot(ParasiteTree)
     GreedyOnce = {}            #initialize dictionary we will return
     bestKey = ()       #variable to hold the key with the highers BSFH value
     bestScore = float("-inf") #variable to hold the highest BSFH value so far
@@ -192,43 +179,93 @@ def greedyOnce(DTL, ParasiteTree):
             bestScore = BSFHMap[key][-1]
     #set value in GreedyOnce of the best key we found
     GreedyOnce[bestKey] = BSFHMap[bestKey][0][0:3]                  
-    
-    #reset score of the mapping node we used to 0:
-
-    #loop through the events associated with DTL
-    for i in range(len(DTL[bestKey]) - 1):  
-        #check if the event matches the event that gave the best score                      
-        if DTL[bestKey][i] == BSFHMap[bestKey][0]:           
-            newEvent = DTL[bestKey][i][:-1] + [0]
-            newValue = DTL[bestKey][:i] + [newEvent] + DTL[bestKey][i + 1:]
-            DTL[bestKey] = newValue      #set the score to 0
-    newGreedyOnce, resetDTL = TraceChildren(DTL, GreedyOnce, BSFHMap, bestKey)
-    GreedyOnce.update(newGreedyOnce)
-    DTL.update(resetDTL)
+    #collect the score of the event we used at the root
+    numCollected = collect(DTL, collected, bestKey, BSFHMap[bestKey][1])
+    numCollected += TraceChildren(DTL, GreedyOnce, BSFHMap, bestKey, collected)
+    return GreedyOnce, bestScore, numCollected
+
+
+def greedyOnce(DTL, ParasiteTree, collected=None):
+    """This function takes the DTL graph, the ParasiteTree and optionally the
+    set of collected events as inputs, and calls bookkeeping to find the 
+    dictionary BSFHMap. It returns the reconciliation with the highest score
+    in a dictionary called GreedyOnce, the DTL graph, which is not changed, 
+    and the score, and adds the events of the optimal reconciliation to the
+    collected events. The returned dictionary will have keys which are the 
+    mapping nodes in the optimal reconciliation, and values of the form 
+    (event, child1, child2)."""
+
+    if collected is None:
+        collected = set()
+    BSFHMap = bookkeeping(DTL, ParasiteTree, collected)
+    ParasiteRoot = findRoot(ParasiteTree)
+    GreedyOnce, bestScore, _ = collectBest(DTL, ParasiteRoot, BSFHMap, \
+        collected)
     return GreedyOnce, DTL, bestScore
 
-def Greedy(DTL, ParasiteTree):
-    """This function takes as input a DTL graph and a ParasiteTree, and 
-    returns TreeList, a list of dictionaries, each of which represent one of 
-    the optimal reconciliations. This function runs till all the scores have 
-    been collected from the DTL graph."""
+def greedyCoverage(DTL, ParasiteTree, max_reconciliations=None, \
+    min_coverage=None):
+    """This function takes as input a DTL graph, a ParasiteTree, and two 
+    optional limits, and returns the list of reconciliation scores, the list 
+    of reconciliations, and the coverage, the fraction of the total score of 
+    the DTL graph that those reconciliations collected. Reconciliations are 
+    collected until all the scores have been collected from the DTL graph, 
+    or until there are max_reconciliations of them, or until the coverage is
+    at least min_coverage, whichever comes first. The BSFHMap is only built 
+    once, and after each reconciliation only the mapping nodes it used and 
+    their ancestors are rescored. The DTL graph is not changed; the scores 
+    that have been collected are kept track of in a separate set."""
     scores = [] #list of reconciliation scores
-    currentDTL = DTL
-    counter = 0
     rec = [] #list of reconciliations
+    ParasiteRoot = findRoot(ParasiteTree)
+    collectedEvents = set() #events whose scores have been collected
+    BSFHMap = bookkeeping(DTL, ParasiteTree, collectedEvents)
+    #the graph does not change, so its ordering is only found once
+    levels = DTLOrder.levels(DTL)
+    parents = DTLOrder.parents(DTL)
+    #count the events whose scores have not been collected yet, and the 
+    #total score to be collected
+    remaining = 0
+    totalScore = 0
+    for key in DTL:
+        for i in range(len(DTL[key])-1):
+            if DTL[key][i][-1] != 0:
+                remaining += 1
+                totalScore += DTL[key][i][-1]
+    collectedScore = 0
+    coverage = 1.0
     collected = True
     while collected:
-        #call greedyOnce if all the points have not been collected yet
-        oneTree, currentDTL, score = greedyOnce(currentDTL, ParasiteTree)
+        #collect the best reconciliation if all the points have not been 
+        #collected yet
+        oneTree, score, numCollected = collectBest(DTL, ParasiteRoot, \
+            BSFHMap, collectedEvents)
         scores.append(score) 
         rec.append(oneTree)
-        collected = False #set not0 to False
-        zeroes = 0
-        events = 0
-        #iterate to see if more points need to be collected
-        for key in currentDTL:
-            for i in range(len(currentDTL[key])-1):
-                if currentDTL[key][i][-1] != 0:
-                    collected = True
-
-    return scores, rec
\ No newline at end of file
+        remaining -= numCollected
+        collectedScore += score
+        if totalScore != 0:
+            coverage = float(collectedScore) / totalScore
+        collected = remaining > 0
+        if max_reconciliations is not None and \
+            len(rec) >= max_reconciliations:
+            collected = False
+        if min_coverage is not None and coverage >= min_coverage:
+            collected = False
+        if collected:
+            updateBookkeeping(DTL, BSFHMap, oneTree, collectedEvents, levels, \
+                parents)
+    if remaining == 0:
+        coverage = 1.0
+
+    return scores, rec, coverage
+
+def Greedy(DTL, ParasiteTree, max_reconciliations=None, min_coverage=None):
+    """This function takes as input a DTL graph and a ParasiteTree, and 
+    returns TreeList, a list of dictionaries, each of which represent one of 
+    the optimal reconciliations. This function runs till all the scores have 
+    been collected from the DTL graph, unless max_reconciliations or 
+    min_coverage is given (see greedyCoverage)."""
+    scores, rec, _ = greedyCoverage(DTL, ParasiteTree, max_reconciliations, \
+        min_coverage)
+    return scores, rec
@@ -16,7 +16,6 @@ import newickFormatReader
 import cycleCheckingGraph
 from sys import argv
 import sys
-import copy
 import calcCostscapeScore
 import detectCycles
 import os
@@ -24,7 +23,10 @@ import os
 def Reconcile(argList):
     """Takes command-line arguments of a .newick file, duplication, transfer, 
     and loss costs, the type of scoring desired and possible switch and loss 
-    ranges. Creates Files for the host, parasite, and reconciliations"""
+    ranges, and optionally the DP engine and limits on the number of 
+    reconciliations and on the fraction of the total score they collect (see
+    greedyLimits). Creates Files for the host, parasite, and 
+    reconciliations"""
     fileName = argList[1] #.newick file
     D = float(argList[2]) # Duplication cost
     T = float(argList[3]) # Transfer cost
@@ -35,13 +37,19 @@ def Reconcile(argList):
     switchHi = float(argList[7]) # Switch upper boundary
     lossLo = float(argList[8]) # Loss lower boundary
     lossHi = float(argList[9]) # Loss upper boundary
+    # Optional DP engine, either "dict" (DP.py) or "numpy" (DPnumpy.py)
+    if len(argList) > 10:
+        engine = argList[10]
+    else:
+        engine = "dict"
+    maxRecon, minCoverage = greedyLimits(argList)
 
     host, paras, phi = newickFormatReader.getInput(fileName)
     hostRoot = cycleCheckingGraph.findRoot(host)
     hostv = cycleCheckingGraph.treeFormat(host)
     Order = orderGraph.date(hostv)
     # Default scoring function (if freqtype== Frequency scoring)
-    DTLReconGraph, numRecon = DP.DP(host, paras, phi, D, T, L)
+    DTLReconGraph, numRecon = runDP(engine, host, paras, phi, D, T, L)
     print DTLReconGraph, numRecon
     #uses xScape scoring function
     if freqType == "xscape":
@@ -51,13 +59,16 @@ def Reconcile(argList):
     elif freqType == "unit":
         DTLReconGraph = unitScoreDTL(host, paras, phi, D, T, L)
 
-    DTLGraph = copy.deepcopy(DTLReconGraph)
-    scoresList, rec = Greedy.Greedy(DTLGraph, paras)
+    scoresList, rec, coverage = Greedy.greedyCoverage(DTLReconGraph, paras, \
+        maxRecon, minCoverage)
+    print "Coverage of the total score:", coverage
+    skeleton = cycleCheckingGraph.TemporalSkeleton(host, paras)
+    orders = orderGraph.date_many(host, paras, rec, skeleton)
     for n in range(len(rec)):
-        graph = cycleCheckingGraph.buildReconciliation(host, paras, rec[n])
-        currentOrder = orderGraph.date(graph)
+        currentOrder = orders[n]
         if currentOrder == "timeTravel":
-            rec[n], currentOrder = detectCycles.detectCyclesWrapper(host, paras, rec[n])
+            rec[n], currentOrder = detectCycles.detectCyclesWrapper(host, paras, \
+                rec[n], skeleton)
             currentOrder = orderGraph.date(currentOrder)
         hostOrder = hOrder(hostv,currentOrder)
         hostBranchs = branch(hostv,hostOrder)
@@ -69,6 +80,34 @@ def Reconcile(argList):
         reconConversion.convert(rec[n], DTLReconGraph, paras, fileName[:-7], n)
 
 
+def runDP(engine, hostTree, parasiteTree, phi, D, T, L):
+    """Takes the name of a DP engine ("dict" or "numpy"), a hostTree, 
+    parasiteTree, tip mapping function phi, and duplication, transfer and 
+    loss costs, and returns the DTL graph and number of reconciliations 
+    computed by that engine."""
+    if engine == "numpy":
+        # NumPy is only required when the array-backed engine is selected
+        import DPnumpy
+        return DPnumpy.DP(hostTree, parasiteTree, phi, D, T, L)
+    elif engine == "dict":
+        return DP.DP(hostTree, parasiteTree, phi, D, T, L)
+    else:
+        sys.exit("Unknown DP engine: " + engine)
+
+def greedyLimits(argList):
+    """Takes the command-line argument list and returns the optional limits
+    passed on to Greedy: the maximum number of reconciliations (argList[11])
+    and the minimum fraction of the total score they must collect 
+    (argList[12]). A limit that is not given, or given as "none", is 
+    returned as None, meaning no limit."""
+    maxRecon = None
+    minCoverage = None
+    if len(argList) > 11 and str(argList[11]).lower() != "none":
+        maxRecon = int(argList[11])
+    if len(argList) > 12 and str(argList[12]).lower() != "none":
+        minCoverage = float(argList[12])
+    return maxRecon, minCoverage
+
 def unitScoreDTL(hostTree, parasiteTree, phi, D, T, L):
     """ Takes a hostTree, parasiteTree, tip mapping function phi, and 
     duplication cost (D), transfer cost (T), and loss cost (L) and returns the
@@ -9,10 +9,11 @@ import random
 import newickFormatReader
 import orderGraph
 import DP
-import ReconciliationGraph
+import cycleCheckingGraph
 import os
 import copy
 import Greedy
+import DTLOrder
 
 
 def preorderDTLsort(DTLReconGraph, ParasiteRoot):
@@ -20,16 +21,7 @@ def preorderDTLsort(DTLReconGraph, ParasiteRoot):
     list, orderedKeysL, that is ordered by level from smallest to largest,
     where level 0 is the root and the highest level has tips."""
 
-    keysL = Greedy.orderDTL(DTLReconGraph, ParasiteRoot)
-    uniqueKeysL = Greedy.sortHelper(DTLReconGraph, keysL)
-    orderedKeysL = []
-    levelCounter = 0
-    while len(orderedKeysL) < len(uniqueKeysL):
-        for mapping in uniqueKeysL:
-            if mapping[-1] == levelCounter:
-                orderedKeysL = orderedKeysL + [mapping]
-        levelCounter += 1
-    return orderedKeysL
+    return DTLOrder.preorder(DTLReconGraph)
 
 def findTransfers(reconciliation):
     """Takes in a reconciliation graph and returns the number of transfers
@@ -156,6 +148,7 @@ def randomReconWrapper(dirName, D, T, L, numSamples, typeGen):
             parasiteSize = len(parasiteTree)+1
             hostSize = len(hostTree)+1
             DTLReconGraph, numRecon = DP.DP(hostTree, parasiteTree, phi, D, T, L)
+            skeleton = cycleCheckingGraph.TemporalSkeleton(hostTree, parasiteTree)
             rootList = rootGenerator(DTLReconGraph, parasiteTree)
             randomReconList = []
             for n in range(numSamples):
@@ -176,8 +169,7 @@ def randomReconWrapper(dirName, D, T, L, numSamples, typeGen):
                     uniqueReconList.append(recon)
             outOf += len(uniqueReconList)
             for recon in uniqueReconList:
-                graph = ReconciliationGraph.buildReconstruction\
-                    (hostTree, parasiteTree, recon)
+                graph, transferList = skeleton.build(recon)
                 currentOrder = orderGraph.date(graph)
                 numTrans = findTransfers(recon)
                 if currentOrder == 'timeTravel':
@@ -48,11 +48,13 @@ def freqSummation(argList):
     """Takes as input an argument list containing a newick file of host and 
     parasite trees as well as their phi mapping, duplication, transfer, and 
     loss costs, the type of frequency scoring to be used, as well as switch 
-    and loss cost ranges for xscape scoring, and
+    and loss cost ranges for xscape scoring, and optionally the DP engine and
+    the Greedy limits (see MasterReconciliation.greedyLimits), and
 
     returns a file containing the list of scores for each individual
     reconciliation, the sum of the those scores, the total cost of those
-    reconciliations and the number of reconciliations of those trees."""
+    reconciliations, the number of reconciliations of those trees and the 
+    fraction of the total score that the listed reconciliations cover."""
     newickFile = argList[1]
     D = float(argList[2])
     T = float(argList[3])
@@ -62,17 +64,24 @@ def freqSummation(argList):
     switchHi = float(argList[7])
     lossLo = float(argList[8])
     lossHi = float(argList[9])
+    if len(argList) > 10:
+        engine = argList[10]
+    else:
+        engine = "dict"
+    maxRecon, minCoverage = MasterReconciliation.greedyLimits(argList)
     fileName = newickFile[:-7]
     f = open(fileName+"freqFile.txt", 'w')
     host, paras, phi = newickFormatReader.getInput(newickFile)
-    DTL, numRecon = DP.DP(host, paras, phi, D, T, L)
+    DTL, numRecon = MasterReconciliation.runDP(engine, host, paras, phi, \
+        D, T, L)
     if freqType == "Frequency":
         newDTL = DTL
     elif freqType == "xscape":
         newDTL = calcCostscapeScore.newScoreWrapper(newickFile, switchLo, switchHi, lossLo, lossHi, D, T, L)
     elif freqType == "unit":
         newDTL = MasterReconciliation.unitScoreDTL(host, paras, phi, D, T, L)
-    scoresList, reconciliation = Greedy.Greedy(newDTL, paras)
+    scoresList, reconciliation, coverage = Greedy.greedyCoverage(newDTL, \
+        paras, maxRecon, minCoverage)
     totalSum = 0
     for score in scoresList:
         totalSum +=score
@@ -88,7 +97,8 @@ def freqSummation(argList):
     f.write(str(scoresList)+'\n')
     f.write(str(totalSum)+'\n')
     f.write(str(totalCost)+'\n')
-    f.write(str(numRecon))
+    f.write(str(numRecon)+'\n')
+    f.write(str(coverage))
     f.close()
 
 def frequencyDict(DTL, reconciliation):
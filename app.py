@@ -1,4 +1,5 @@
-from flask import Flask, request, render_template, send_from_directory, Markup
+from flask import Flask, request, render_template, send_from_directory, Markup, \
+  abort
 from werkzeug import secure_filename
 import os
 from flask_bootstrap import Bootstrap
@@ -60,6 +61,13 @@ def reconcile(carousel = None):
       lossLo = request.form['losslow']
     else: lossLo = 1
 
+    # Optional limits on the reconciliations that are collected and drawn,
+    # checked here since they are passed on in a shell command
+    maxRecon = parseLimit(request.form['maxrecon'], int, 1, None, \
+      "The largest number of reconciliations must be a positive integer")
+    minCoverage = parseLimit(request.form['mincoverage'], float, 0, 1, \
+      "The fraction of the total score must be a number between 0 and 1")
+
     if file:
       filename = secure_filename(file.filename)
       Name = filename[:-7]
@@ -74,12 +82,14 @@ def reconcile(carousel = None):
       os.system("python /Users/Annalise/GitHub/CompBioSummer2015/"+\
         "MasterReconciliation.py "+path2files+".newick"+" "+ \
         str(Dup)+" "+str(Trans)+" "+str(Loss)+" "+str(request.form["scoring"])\
-        +" "+str(switchLo)+" "+str(switchHi)+" "+str(lossLo)+" "+str(lossHi))
+        +" "+str(switchLo)+" "+str(switchHi)+" "+str(lossLo)+" "+str(lossHi)\
+        +" dict "+str(maxRecon)+" "+str(minCoverage))
      
       os.system('python /Users/Annalise/GitHub/CompBioSummer2015/'+\
         'ReconConversion.py '+path2files+".newick"+" "+str(Dup)+ \
         " "+str(Trans)+" "+str(Loss)+" "+str(request.form['scoring'])+" "\
-        +str(switchLo)+" "+str(switchHi)+" "+str(lossLo)+" "+str(lossHi))
+        +str(switchLo)+" "+str(switchHi)+" "+str(lossLo)+" "+str(lossHi)+ \
+        " dict "+str(maxRecon)+" "+str(minCoverage))
       
       with open(path2files+"freqFile.txt") as f:
        lines = f.readlines()
@@ -87,6 +97,14 @@ def reconcile(carousel = None):
       totalFreq = float(lines[1][:-2])
       totalRecon = float(lines[3])
       totalCost = float(lines[2][:-2])
+      coverage = float(lines[4])
+      # Percentages are of the total score of the graph, which is more than 
+      # totalFreq when Greedy stopped early.  A coverage of 0 means nothing 
+      # was collected, so the collected sum is used instead.
+      if coverage > 0:
+        totalScore = totalFreq/coverage
+      else:
+        totalScore = totalFreq
       if request.form['scoring'] == "Frequency":
         scoreMethod = "Frequency"
       elif request.form['scoring'] == "xscape":
@@ -98,14 +116,15 @@ def reconcile(carousel = None):
       str(Trans)+", Loss Cost: "+str(Loss)+"<br>Maximum Parsimony Cost: "+\
       str(totalCost)+ "<br>Your scoring method: "+scoreMethod+", Total Sum"+\
       " of Scores: "+str(totalFreq)+"<br>Total Number of Optimal "+\
-      "Reconciliations: "+str(totalRecon)+"</h4>"
+      "Reconciliations: "+str(totalRecon)+"<br>Percent of total score "+\
+      "covered by the reconciliations shown: "+str(100.0*coverage)+"%</h4>"
       for x in range(len(scoreList)):
         os.system("python vistrans.py -t "+path2files+".tree -s "+path2files+\
           str(x)+".stree -b "+path2files+str(x)+".mowgli.brecon -o "+\
           path2files+ str(x)+".svg")
         
         score = scoreList[x]
-        percent = 100.0*score/totalFreq
+        percent = percentOf(score, totalScore)
         if x ==0:
           runningTot = percent
           
@@ -123,7 +142,7 @@ def reconcile(carousel = None):
             str(path2files)+str(x)+'.svg ' + UPLOAD_FOLDER)
         else:
           runningTotScore = runningTotal(scoreList, x)
-          runningTot = 100.0*runningTotScore/totalFreq
+          runningTot = percentOf(runningTotScore, totalScore)
           if runningTot > 100:
             runningTot = 100
           carouselstr+='<li data-target="#results" data-slide-to="'+str(x)+\
@@ -145,6 +164,22 @@ def reconcile(carousel = None):
     carouselcap = carouselcap, staticString = staticString)
 
 
+def parseLimit(value, convert, low, high, message):
+  """Takes in a form value, a function that converts it to a number, the 
+  smallest and largest values allowed (None for no largest value) and an 
+  error message, and returns the number, or "none" if the value is empty. 
+  The request is rejected with the message if the value is not a number in
+  the allowed range."""
+  if value.strip() == '':
+    return "none"
+  try:
+    number = convert(value)
+  except ValueError:
+    abort(400, message)
+  if not low <= number or (high is not None and not number <= high):
+    abort(400, message)
+  return number
+
 def runningTotal(scoresList, index):
   """Takes in a list of scores and an integer, index, and returns the sum of 
   the list's entries up to that index"""
@@ -154,6 +189,13 @@ def runningTotal(scoresList, index):
       runningTot += scoresList[n]
   return runningTot
 
+def percentOf(score, totalScore):
+  """Takes in a score and a total score and returns the score as a 
+  percentage of the total, or 0 if the total is 0"""
+  if totalScore == 0:
+    return 0.0
+  return 100.0*score/totalScore
+
 def string2List(string):
   """Takes in a string of a list and returns the list"""
   newString = string.strip('[')
@@ -0,0 +1,88 @@
+# findPathBenchmark.py
+
+# Times DP.findPath, which collects the DTL graph from the table of events
+# that DP.DP fills, against the recursive findPath it replaced, which walked
+# every path from the roots instead of every mapping node once.  Both are
+# given the DTL graph of each file as their table of events, which holds the
+# same mapping nodes the walk reaches in DP.DP.
+#
+# Usage (from the repository directory):
+#     python benchmarks/findPathBenchmark.py [D T L [repeats [file ...]]]
+# Without files, the largest newick files of TreeLifeData are timed.
+
+# python libraries
+import glob
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import DP
+import newickFormatReader
+
+# Number of TreeLifeData files timed when none are given
+NUM_LARGEST = 5
+
+def oldFindPath(tupleList, eventDict, uniqueDict):
+    """The recursive findPath of DP.py before it visited each mapping node
+    only once"""
+    for vertexPair in tupleList:
+        if not vertexPair in uniqueDict:
+            uniqueDict[vertexPair] = eventDict[vertexPair]
+        for event in eventDict[vertexPair][:-1]:
+            for location in event:
+                if type(location) is tuple and location != (None, None):
+                    oldFindPath([location], eventDict, uniqueDict)
+    return uniqueDict
+
+def largestFiles(number):
+    """Returns the names of the given number of largest newick files of
+    TreeLifeData, largest first"""
+    fileNames = glob.glob(os.path.join(ROOT, "TreeLifeData", "*.newick"))
+    fileNames.sort(key=os.path.getsize, reverse=True)
+    return fileNames[:number]
+
+def bestTime(function, roots, DTL, repeats):
+    """Returns the shortest time of repeats calls of the given findPath
+    function on the roots and the DTL graph, each starting from an empty
+    graph"""
+    best = None
+    for r in range(repeats):
+        start = time.time()
+        function(roots, DTL, {})
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def benchmark(fileNames, D, T, L, repeats):
+    """Prints the times of the old and new findPath on the DTL graph of each
+    of the files at the given event costs"""
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 100000))
+    print "%-16s %8s %10s %10s" % ("file", "mapping", "old (ms)", "new (ms)")
+    for fileName in fileNames:
+        host, paras, phi = newickFormatReader.getInput(fileName)
+        DTL, numRecon = DP.DP(host, paras, phi, D, T, L)
+        minimums = dict((mapNode, DTL[mapNode][-1]) for mapNode in DTL)
+        roots = DP.findBestRoots(paras, minimums)
+        if DP.findPath(roots, DTL, {}) != oldFindPath(roots, DTL, {}):
+            raise AssertionError("findPath differs on " + fileName)
+        oldTime = bestTime(oldFindPath, roots, DTL, repeats)
+        newTime = bestTime(DP.findPath, roots, DTL, repeats)
+        print "%-16s %8d %10.1f %10.1f" % (os.path.basename(fileName), \
+            len(DTL), 1000 * oldTime, 1000 * newTime)
+        sys.stdout.flush()
+
+def main(argv):
+    D, T, L = 2, 3, 1
+    repeats = 3
+    if len(argv) > 3:
+        D, T, L = [float(cost) for cost in argv[1:4]]
+    if len(argv) > 4:
+        repeats = int(argv[4])
+    fileNames = argv[5:] or largestFiles(NUM_LARGEST)
+    benchmark(fileNames, D, T, L, repeats)
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -10,6 +10,7 @@
 
 from DP import *
 from costscapeScore import *
+from multiprocessing import Pool, cpu_count
 from sys import argv
 import newickFormatReader
 
@@ -56,66 +57,98 @@ def getCostscapeDTLReconGraphs(DTLReconGraphPairs, hostTree, parasiteTree, \
 	return DTLReconGraphList
 
 
-def changeDTLReconGraphScores(originalDTLReconGraph, DTLReconGraphList):
-	"""This function takes as input the originalDTLReconGraph and a list 
-	DTLReconGraphList of the DTLReconGraphs from each region in costscape. 
-	This function calculates a new score for each event in 
-	originalDTLReconGraph, and returns a newDTLReconGraph with these 
-	scores."""
+def regionMappingNodes(args):
+	"""This function takes as input a tuple (hostTree, parasiteTree, phi, T, 
+	L) and returns a list of the mapping nodes of the DTLReconGraph with 
+	duplication cost 1, transfer cost T and loss cost L. The arguments come 
+	in one tuple so that the function can be mapped over a process pool."""
+
+	hostTree, parasiteTree, phi, T, L = args
+	return DP(hostTree, parasiteTree, phi, 1, T, L)[0].keys()
+
+
+def getRegionCounts(DTLReconGraphPairs, hostTree, parasiteTree, phi, \
+		numWorkers=None):
+	"""This function takes as input DTLReconGraphPairs, a list of tuples with 
+	transfer and loss costs, the hostTree, parasiteTree, and phi, and the 
+	number of worker processes to use (one per CPU by default). It computes 
+	the DTLReconGraph for each distinct pair of costs, in a pool of worker 
+	processes, and returns a dictionary with the number of elements of 
+	DTLReconGraphPairs whose DTLReconGraph contains each mapping node."""
+
+	multiplicity = {}
+	for cost in DTLReconGraphPairs:
+		multiplicity[cost] = multiplicity.get(cost, 0) + 1
+	costs = multiplicity.keys()
+	tasks = [(hostTree, parasiteTree, phi, cost[0], cost[1]) for cost in costs]
+	if numWorkers is None:
+		numWorkers = cpu_count()
+	pool = None
+	if numWorkers > 1 and len(tasks) > 1:
+		pool = Pool(min(numWorkers, len(tasks)))
+		nodeLists = pool.imap(regionMappingNodes, tasks)
+	else:
+		nodeLists = (regionMappingNodes(task) for task in tasks)
+	regionCounts = {}
+	try:
+		for cost, nodes in zip(costs, nodeLists):
+			for node in nodes:
+				regionCounts[node] = regionCounts.get(node, 0) + \
+					multiplicity[cost]
+	except:
+		if pool is not None:
+			pool.terminate()
+		raise
+	if pool is not None:
+		pool.close()
+		pool.join()
+	return regionCounts
+
+
+def scoreDTLReconGraph(originalDTLReconGraph, regionCounts, numRegions):
+	"""This function takes as input the originalDTLReconGraph, a dictionary 
+	regionCounts with the number of regions in costscape whose DTLReconGraph 
+	contains each mapping node, and the number of regions numRegions. It 
+	calculates a new score for each event in originalDTLReconGraph, and 
+	returns a newDTLReconGraph with these scores."""
 
 	newDTLReconGraph = {}
-	numDTLReconGraph = len(DTLReconGraphList)
 	for event in originalDTLReconGraph:
-		counter = 0
-		for DTLReconGraph in DTLReconGraphList:
-			if event in DTLReconGraph:
-				counter += 1
-		newScore = 1.0*counter/numDTLReconGraph
+		newScore = 1.0*regionCounts.get(event, 0)/numRegions
 		oldVal = originalDTLReconGraph[event]
 		oldVal[0][-1] = newScore # assign new score to DTLReconGraph
 		newDTLReconGraph[event] = oldVal
 	return newDTLReconGraph
 
 
-def newScoreWrapper(newickFile, switchLo, switchHi, lossLo, lossHi, D, T, L):
-	"""This function takes as input hostTree, parasiteTree, phi, duplication 
-	cost D, transfer cost T, and loss cost L, and returns the 
-	newDTLReconGraph whose scores were calculated from costscape."""
-
-	H, P, phi = newickFormatReader.getInput(newickFile)
-	originalDTLReconGraph, numRecon, leaves = DP(H, P, phi, D, T, L)
-	pointList = findCenters(newickFile, switchLo, switchHi, lossLo, lossHi)
-	DTLReconGraphPairs = getDTLReconGraphVals(pointList)
-	DTLReconGraphList = getCostscapeDTLReconGraphs(DTLReconGraphPairs, H, P, \
-		phi)
-	newDTLReconGraph = changeDTLReconGraphScores(originalDTLReconGraph, \
-		DTLReconGraphList)
-	return newDTLReconGraph, numRecon, leaves
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+def changeDTLReconGraphScores(originalDTLReconGraph, DTLReconGraphList):
+	"""This function takes as input the originalDTLReconGraph and a list 
+	DTLReconGraphList of the DTLReconGraphs from each region in costscape. 
+	This function calculates a new score for each event in 
+	originalDTLReconGraph, and returns a newDTLReconGraph with these 
+	scores."""
 
+	regionCounts = {}
+	for DTLReconGraph in DTLReconGraphList:
+		for node in DTLReconGraph:
+			regionCounts[node] = regionCounts.get(node, 0) + 1
+	return scoreDTLReconGraph(originalDTLReconGraph, regionCounts, \
+		len(DTLReconGraphList))
 
 
+def newScoreWrapper(newickFile, switchLo, switchHi, lossLo, lossHi, D, T, L, \
+		numWorkers=None):
+	"""This function takes as input hostTree, parasiteTree, phi, duplication 
+	cost D, transfer cost T, and loss cost L, and returns the 
+	newDTLReconGraph whose scores were calculated from costscape. The 
+	Pareto front and regions of costscape are computed once, and the 
+	DTLReconGraphs of the regions in numWorkers processes (see 
+	getRegionCounts)."""
 
+	H, P, phi = newickFormatReader.getInput(newickFile)
+	originalDTLReconGraph, numRecon = DP(H, P, phi, D, T, L)
+	centers = getRegionCenters(H, P, phi, switchLo, switchHi, lossLo, lossHi)
+	DTLReconGraphPairs = [(switch, loss) for (loss, switch) in centers]
+	regionCounts = getRegionCounts(DTLReconGraphPairs, H, P, phi, numWorkers)
+	return scoreDTLReconGraph(originalDTLReconGraph, regionCounts, \
+		len(DTLReconGraphPairs))
@@ -24,30 +24,51 @@ except ImportError:
 from xscape.commonAnalytic import *
 from xscape.CostVector import *
 from xscape import reconcile
-from xscape import plotcostsAnalyticNew as plotcosts
 
 
-import shapely
-from shapely.wkt import loads as load_wkt
+def getRegionList(hostTree, parasiteTree, phi, switchLo, switchHi, lossLo, \
+    lossHi):
+    """Takes as input a hostTree, parasiteTree and phi, and low and high 
+    values for costscape for both switches and losses. Returns the list of 
+    the regions of costscape, in the order of their cost vectors in the 
+    Pareto front, each as a list of (loss, switch) vertices (see 
+    xscape.commonAnalytic.envelopeRegions). The Pareto front and the regions 
+    are computed once, without plotting them."""
+
+    CVlist = reconcile.reconcile(parasiteTree, hostTree, phi, switchLo, \
+        switchHi, lossLo, lossHi)
+    regions = getRegions(CVlist, switchLo, switchHi, lossLo, lossHi, \
+        geometry=False)
+    regionList = []
+    for cv in CVlist:
+        if str(cv) in regions:
+            regionList.append(regions[str(cv)])
+    return regionList
+
+
+def getRegionCenters(hostTree, parasiteTree, phi, switchLo, switchHi, \
+    lossLo, lossHi):
+    """Takes the same input as getRegionList, and returns a list of the 
+    centroids of the regions of costscape as (loss, switch) pairs."""
+
+    return [regionCenter(region) for region in getRegionList(hostTree, \
+        parasiteTree, phi, switchLo, switchHi, lossLo, lossHi)]
 
 
 def getNewCoordList(newickFile, switchLo, switchHi, lossLo, lossHi):
     """Takes as input a newick file in the form <filename>.newick, and low 
     and high values for costscape for both switches and losses. Returns a 
     list of strings, where each string contains all the verteces of one 
-    region from costscape."""
+    region from costscape, as (switch, loss) points."""
 
-    hostTree, parasiteTree, phi = newickFormatReader(newickFile)
-    CVlist = reconcile.reconcile(parasiteTree, hostTree, phi, switchLo, \
+    hostTree, parasiteTree, phi = getInput(newickFile)
+    coordList = getRegionList(hostTree, parasiteTree, phi, switchLo, \
         switchHi, lossLo, lossHi)
-    coordList = plotcosts.plotcosts(CVlist, lossLo, lossHi, switchLo, \
-        switchHi, "", False, False)
-    print coordList
     newCoordList = []
     for vertexList in coordList:
         string = "POLYGON(("
         for vertex in vertexList:
-            string = string + str(i[0]) + ' ' + str(i[1]) + ','
+            string = string + str(vertex[1]) + ' ' + str(vertex[0]) + ','
         string = string[:-1] + '))'
         newCoordList.append(string)
     return newCoordList
@@ -57,37 +78,14 @@ def findCenters(newickFile, switchLo, switchHi, lossLo, lossHi):
     """This function takes as input a .newick file in the form 
     <filename>.newick, and low and high values for costscape for both 
     switches and losses. It returns a list of the centroids of each region in 
-    the costscape associated with the given .newick file."""
+    the costscape associated with the given .newick file, as (switch, loss) 
+    points, which getDTLReconGraphVals in calcCostscapeScore.py reads as 
+    transfer and loss costs."""
 
-    hostTree, parasiteTree, phi = newickFormatReader(newickFile)
-    CVlist = reconcile.reconcile(parasiteTree, hostTree, phi, switchLo, \
-        switchHi, lossLo, lossHi)
-    coordList = plotcosts.plotcosts(CVlist, lossLo, lossHi, switchLo, \
-        switchHi, "", False, False)
-    polygonList = getNewCoordList(newickFile, switchLo, switchHi, lossLo, \
-        lossHi)
+    hostTree, parasiteTree, phi = getInput(newickFile)
     pointList = []
-    for i in range(len(polygonList)):
-        point = polygonList[i]
-        numCommas = 0
-        for j in range(len(point)):
-            if point[j] == ",":
-                numCommas = numCommas + 1
-        if numCommas > 1:
-            #polygon case
-            region = load_wkt(point)
-            pointList.append((region.centroid.wkt))
-        elif numCommas == 1:
-            #line case
-            x1 = coordList[i][0][0]
-            y1 = coordList[i][0][1]
-            x2 = coordList[i][1][0]
-            y2 = coordList[i][1][1]
-            midx = (x1 + x2)*1.0/2
-            midy = (y1 + y2)*1.0/2
-            pointList.append("POINT (" + str(midx) + " " + str(midy) + ")")
-        else:
-            #point case
-            pointList.append("POINT " + str(coordList[i][0]))
-
+    for center in getRegionCenters(hostTree, parasiteTree, phi, switchLo, \
+        switchHi, lossLo, lossHi):
+        pointList.append("POINT (" + str(center[1]) + " " + str(center[0]) \
+            + ")")
     return pointList
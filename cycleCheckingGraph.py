@@ -16,17 +16,26 @@
 
 from Greedy import findRoot
 
+def bottomNodes(tree):
+        """This function takes as input a tree dictionary and returns a list of 
+        the bottom nodes of its edges, in the order of the keys of the tree."""
+
+        nodes = []
+        for key in tree:
+                if key == 'pTop' or key == 'hTop':
+                        nodes.append(tree[key][1])
+                else:
+                        nodes.append(key[1])
+        return nodes
+
 def InitDicts(tree):
         """This function takes as input a tree dictionary and returns a dictionary
         with all of the bottom nodes of the edges as keys and empty lists as 
         values."""
 
         treeDict = {}
-        for key in tree:
-                if key == 'pTop' or key == 'hTop':
-                        treeDict[tree[key][1]] = [] 
-                else:
-                        treeDict[key[1]] = []
+        for node in bottomNodes(tree):
+                treeDict[node] = []
         return treeDict
 
 def treeFormat(tree):
@@ -99,56 +108,134 @@ def uniquify(list):
                 holdDict[thing] = 1
         return holdDict.keys()
 
-def buildReconciliation(HostTree, ParasiteTree, reconciliation):
+class TemporalSkeleton(object):
+        """The parts of the cycle checking graph that only depend on the host and 
+        parasite trees: the parents of each host and parasite node and the edges 
+        of the two trees. A skeleton is built once for a pair of trees, and then 
+        builds the cycle checking graph of any reconciliation of them by adding 
+        the edges that come from the events of the reconciliation to the edges 
+        of the trees."""
+
+        def __init__(self, HostTree, ParasiteTree):
+                self.HostTree = HostTree
+                self.ParasiteTree = ParasiteTree
+                #create a dictionary with a list of parents of each host and parasite node
+                self.parents = createParentsDict(HostTree, ParasiteTree)
+                #the host nodes in the order that treeFormat adds them to its dictionary
+                self.hostNodes = bottomNodes(HostTree)
+                self.parasiteChildren = treeFormat(ParasiteTree)
+                self.treeChildren = treeFormat(HostTree)
+                self.treeChildren.update(self.parasiteChildren)
+                self.uniqueChildren = {}
+                for node in self.treeChildren:
+                        self.uniqueChildren[node] = uniquify(self.treeChildren[node])
+
+        def build(self, reconciliation):
+                """Takes as input a reconciliation of the host and parasite trees, and
+                returns its cycle checking graph, where the keys are host or parasite 
+                nodes, and the values are a list of the children of a particular 
+                node. It also returns a list transferList containing all the 
+                transfers in the reconciliation, in the form [parasite node, parent 
+                of take-off node, take-off node, parent of landing node, landing 
+                node]. The graph is the same, down to the order of its keys and of 
+                each list of children, as the one built from scratch from the 
+                trees."""
+
+                changed, transferList = self.changes(reconciliation)
+                #the keys are added the same way as in treeFormat and update, so that
+                #they are in the same order
+                cycleCheckingGraph = dict.fromkeys(self.hostNodes)
+                cycleCheckingGraph.update(self.parasiteChildren)
+                for key in cycleCheckingGraph:
+                        if key in changed:
+                                cycleCheckingGraph[key] = uniquify(changed[key])
+                        else:
+                                cycleCheckingGraph[key] = list(self.uniqueChildren[key])
+
+                return cycleCheckingGraph, transferList
+
+        def changes(self, reconciliation):
+                """Takes as input a reconciliation of the host and parasite trees, and
+                returns a dictionary with the nodes whose lists of children the 
+                events of the reconciliation change as keys and their new lists 
+                of children, before uniquify, as values, along with the 
+                transferList described in build."""
+
+                parents = self.parents
+                P = self.parasiteChildren
+                #the lists of children changed by the events, over treeChildren.  
+                #Each list is a copy owned by changed, so the events add to it in 
+                #place
+                changed = {}
+                transferList = []
+                for key in reconciliation:
+                        event = reconciliation[key]
+                        #deal with transfer case:
+                        if event[0] == 'T':
+                                transferEdge1 = event[1][1]
+                                transferEdge2 = event[2][1]
+                                #add the children of the parasite node to the list of children
+                                #of the host node in cycleCheckingGraph
+                                changed[key[0]] = P[key[0]] + [transferEdge1, transferEdge2]
+                                #find the parents of the take-off and landing host nodes
+                                parent1 = parents[transferEdge1]
+                                parent2 = parents[transferEdge2]
+                                #add the parasite node as a child of parent1 and parent2
+                                self.ownChildren(changed, parent1).append(key[0])
+                                self.ownChildren(changed, parent2).append(key[0])
+                                transferList.append([key[0], parent1, transferEdge1, \
+                                        parent2, transferEdge2])
+
+                        #deal with speciation case:
+                        elif event[0] == 'S':
+                                parent = parents[key[0]]
+                                if parent != 'Top':
+                                        self.ownChildren(changed, parent).append(key[1])
+                                self.ownChildren(changed, key[1]).extend\
+                                        (self.children(changed, key[0]))
+
+                        #deal with duplication case:
+                        elif event[0] == 'D':
+                                parent = parents[key[1]]
+                                if parent != 'Top':
+                                        self.ownChildren(changed, parent).append(key[0])
+                                self.ownChildren(changed, key[0]).append(key[1])
+
+                        #deal with contemporary case:
+                        elif event[0] == 'C':
+                                changed[key[1]] = [None]
+                                changed[key[0]] = [None]
+
+                return changed, transferList
+
+        def children(self, changed, node):
+                """Takes as input the dictionary of changed lists of children used by
+                build and a node, and returns the current list of children of the 
+                node."""
+
+                if node in changed:
+                        return changed[node]
+                return self.treeChildren[node]
+
+        def ownChildren(self, changed, node):
+                """Takes as input the dictionary of changed lists of children used by
+                build and a node, and returns the list of children of the node in 
+                changed, which is first copied from the trees if the node is not 
+                in changed yet."""
+
+                if node not in changed:
+                        changed[node] = list(self.treeChildren[node])
+                return changed[node]
+
+
+def buildReconciliation(HostTree, ParasiteTree, reconciliation, skeleton=None):
         """Takes as input a host tree, a parasite tree, and a reconciliation, and
         returns a graph where the keys are host or parasite nodes, and the values
         are a list of the children of a particular node. The graph represents 
-        temporal relationships between events."""
-
-        #create a dictionary with a list of parents of each host and parasite node
-        parents = createParentsDict(HostTree, ParasiteTree)
-        H = treeFormat(HostTree)
-        P = treeFormat(ParasiteTree)
-        cycleCheckingGraph = H
-        cycleCheckingGraph.update(P) 
-        for key in reconciliation:
-                #deal with transfer case:
-                if reconciliation[key][0] == 'T':
-                        #add the children of the parasite node to the list of children
-                        #of the host node in cycleCheckingGraph
-                        cycleCheckingGraph[key[0]] = P[key[0]] + \
-                                [reconciliation[key][1][1], reconciliation[key][2][1]]
-                        #find the parents of the take-off and landing host nodes
-                        parent1 = parents[reconciliation[key][1][1]]
-                        parent2 = parents[reconciliation[key][2][1]]
-                        #add the parasite node as a child of parent1 and parent2
-                        cycleCheckingGraph[parent1] = cycleCheckingGraph[parent1] + \
-                                [key[0]]
-                        cycleCheckingGraph[parent2] = cycleCheckingGraph[parent2] + \
-                                [key[0]]
-
-                #deal with speciation case:
-                elif reconciliation[key][0] == 'S':
-                        parent = parents[key[0]]
-                        if parent != 'Top':
-                                cycleCheckingGraph[parent] = cycleCheckingGraph[parent] + \
-                                        [key[1]]
-                        cycleCheckingGraph[key[1]] = cycleCheckingGraph[key[1]] + \
-                                cycleCheckingGraph[key[0]]
-                #deal with duplication case:
-                elif reconciliation[key][0] == 'D':
-                        parent = parents[key[1]]
-                        if parent != 'Top':
-                                cycleCheckingGraph[parent] = cycleCheckingGraph[parent] + \
-                                        [key[0]]
-                        cycleCheckingGraph[key[0]] = cycleCheckingGraph[key[0]] + [key[1]]
-                #deal with contemporary case:
-                elif reconciliation[key][0] == 'C':
-                        cycleCheckingGraph[key[1]] = [None]
-                        cycleCheckingGraph[key[0]] = [None]
-
-        for key in cycleCheckingGraph:
-                cycleCheckingGraph[key] = uniquify(cycleCheckingGraph[key])
-
-        return cycleCheckingGraph
+        temporal relationships between events. A caller that builds the graphs 
+        of many reconciliations of the same trees can pass their 
+        TemporalSkeleton, which is otherwise built for this call."""
 
+        if skeleton == None:
+                skeleton = TemporalSkeleton(HostTree, ParasiteTree)
+        return skeleton.build(reconciliation)[0]
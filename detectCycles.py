@@ -18,201 +18,182 @@ import Greedy
 import newickFormatReader
 
 
-def buildReconciliation(HostTree, ParasiteTree, reconciliation):
+def buildReconciliation(HostTree, ParasiteTree, reconciliation, skeleton=None):
         """Takes as input a host tree, a parasite tree, and a reconciliation, and
         returns a graph where the keys are host or parasite nodes, and the values
         are a list of the children of a particular node. The graph represents 
         temporal relationships between events. The function also returns a list 
         transferList containing all the transfers in the reconciliation in the 
-        form """
-
-        #create a dictionary with a list of parents of each host and parasite node
-        parents = createParentsDict(HostTree, ParasiteTree)
-        H = treeFormat(HostTree)
-        P = treeFormat(ParasiteTree)
-        cycleCheckingGraph = H
-        cycleCheckingGraph.update(P)
-        transferList = [] 
-        for key in reconciliation:
-                #deal with transfer case:
-                if reconciliation[key][0] == 'T':
-                        #add the children of the parasite node to the list of children
-                        #of the host node in cycleCheckingGraph
-                        cycleCheckingGraph[key[0]] = P[key[0]] + \
-                                [reconciliation[key][1][1], reconciliation[key][2][1]]
-                        #find the parents of the take-off and landing host nodes
-                        parent1 = parents[reconciliation[key][1][1]]
-                        parent2 = parents[reconciliation[key][2][1]]
-                        #add the parasite node as a child of parent1 and parent2
-                        cycleCheckingGraph[parent1] = cycleCheckingGraph[parent1] + \
-                                [key[0]]
-                        cycleCheckingGraph[parent2] = cycleCheckingGraph[parent2] + \
-                                [key[0]]
-                        transferEdge1 = reconciliation[key][1][1]
-                        transferEdge2 = reconciliation[key][2][1]
-                        transferList.append([key[0], parent1, transferEdge1, parent2, \
-                                transferEdge2])
-
-                #deal with speciation case:
-                elif reconciliation[key][0] == 'S':
-                        parent = parents[key[0]]
-                        if parent != 'Top':
-                                cycleCheckingGraph[parent] = cycleCheckingGraph[parent] + \
-                                        [key[1]]
-                        cycleCheckingGraph[key[1]] = cycleCheckingGraph[key[1]] + \
-                                cycleCheckingGraph[key[0]]
-
-                #deal with duplication case:
-                elif reconciliation[key][0] == 'D':
-                        parent = parents[key[1]]
-                        if parent != 'Top':
-                                cycleCheckingGraph[parent] = cycleCheckingGraph[parent] + \
-                                        [key[0]]
-                        cycleCheckingGraph[key[0]] = cycleCheckingGraph[key[0]] + [key[1]]
-
-                #deal with contemporary case:
-                elif reconciliation[key][0] == 'C':
-                        cycleCheckingGraph[key[1]] = [None]
-                        cycleCheckingGraph[key[0]] = [None]
-
-        for key in cycleCheckingGraph:
-                cycleCheckingGraph[key] = uniquify(cycleCheckingGraph[key])
-
-        return cycleCheckingGraph, transferList
-
-
-def detectCycles(HostTree, ParasiteTree, reconciliation):
-        """This function takes as input the cycle checking graph, 
-        cycleCheckingGraph. It returns a new version of cycleCheckingGraph, 
-        newCycleCheckingGraph, from which the transfer events responsible for the 
-        cycles have been removed. It also returns a list, guiltyTransferList, of 
-        the guilty transfers."""
+        form [parasite node, parent of take-off node, take-off node, parent of 
+        landing node, landing node]. The graph is built by skeleton, the 
+        TemporalSkeleton of the trees, which is built for this call if it is not 
+        given."""
+
+        if skeleton == None:
+                skeleton = TemporalSkeleton(HostTree, ParasiteTree)
+        return skeleton.build(reconciliation)
+
+
+def detectCycles(HostTree, ParasiteTree, reconciliation, skeleton=None):
+        """This function takes as input a host tree, a parasite tree, and a 
+        reconciliation. It builds the cycle checking graph for the 
+        reconciliation, removes the edges of the transfer events responsible 
+        for the cycles from it in place, and returns it. It also returns a 
+        list, guiltyTransferList, of the guilty transfers. The graph is 
+        searched once, and after each guilty transfer is removed the search is 
+        resumed from the first point where it looked at one of the removed 
+        edges, rather than started again. The keys of the graph stay in the 
+        order buildReconciliation gives them, which only depends on the trees, 
+        so orderGraph.date numbers its nodes the same way every time. The 
+        optional skeleton is passed on to buildReconciliation."""
 
         guiltyTransferList = []
-        markingDict = {}
         cycleCheckingGraph, transferList = buildReconciliation(HostTree, \
-                ParasiteTree, reconciliation)
+                ParasiteTree, reconciliation, skeleton)
         Hroot = findRoot(HostTree)
-        markingDict[Hroot] = ['check']
-        cycleEdge = recurseChildren(cycleCheckingGraph, markingDict, Hroot)
-        newCycleCheckingGraph, guiltyTransfer, transferList = deleteTransfer(\
-                cycleCheckingGraph, markingDict, transferList, cycleEdge)
-        if guiltyTransfer != []:
-                guiltyTransferList.append(guiltyTransfer)
+        rootSearch = CycleSearch(cycleCheckingGraph, [Hroot])
+        sweepSearch = None
+        cycleEdge = rootSearch.findCycle()
         while cycleEdge != None:
-                cycleEdge = None
-                markingDict = {}
-                cycleEdge = recurseChildren(newCycleCheckingGraph, \
-                        {Hroot: ['check']}, Hroot)
-                if cycleEdge == None:
-                        for node in newCycleCheckingGraph:
-                                if not checked(markingDict, node):
-                                        check(markingDict, node)
-                                        cycleEdge = recurseChildren(newCycleCheckingGraph, \
-                                                markingDict, node)
-                                        if cycleEdge != None:
-                                                break
-                newCycleCheckingGraph, guiltyTransfer, transferList = deleteTransfer(\
-                        newCycleCheckingGraph, markingDict, transferList, cycleEdge)
+                guiltyTransfer, removedEdges = deleteTransfer(cycleCheckingGraph, \
+                        transferList, cycleEdge)
                 if guiltyTransfer != []:
                         guiltyTransferList.append(guiltyTransfer)
-
-        return newCycleCheckingGraph, guiltyTransferList
-
-
-def checked(markingDict, node):
-        """This function takes as input a markingDict and a node, and checks the 
-        node in markingDict, marking it as visited."""
-
-        return node in markingDict
-
-
-def ticked(markingDict, node):
-        """This function takes as input a markingDict and a checked node, and 
-        returns True if the node is already ticked, False if it is not."""
-
-        return node in markingDict and len(markingDict[node]) == 2
-
-
-def tick(markingDict, node):
-        """This function takes as input a markingDict and node which is checked 
-        but not ticked, and ticks the node in markingDict."""
-
-        markingDict[node] = markingDict[node] + ['tick']
-
-
-def untick(markingDict, node):
-        """This function takes as input a markingDict and a ticked node, and 
-        unticks the node in markingDict."""
-
-        markingDict[node] = markingDict[node][:1]
-
-
-def check(markingDict, node):
-        """This function takes as input markingDict and a node, and checks the 
-        node in markingDict."""
-
-        markingDict[node] = ['check']
-
-
-def recurseChildren(cycleCheckingGraph, markingDict, node):
+                rootSearch.removeEdges(removedEdges)
+                if sweepSearch != None:
+                        sweepSearch.removeEdges(removedEdges)
+                cycleEdge = rootSearch.findCycle()
+                if cycleEdge == None:
+                        #look for cycles that cannot be reached from the host root
+                        if sweepSearch == None:
+                                sweepSearch = CycleSearch(cycleCheckingGraph, \
+                                        list(cycleCheckingGraph))
+                        cycleEdge = sweepSearch.findCycle()
+
+        return cycleCheckingGraph, guiltyTransferList
+
+
+class CycleSearch(object):
+        """A depth first search for cycles in a cycle checking graph that can be 
+        resumed after edges are removed from the graph. The search starts from 
+        each node in the list roots that it has not reached yet, visits the 
+        children of each node in the order they are listed, and stops at the 
+        first edge whose child is on the current search path. Every edge the 
+        search looks at is logged, so that when edges are removed the search 
+        can be rewound to the first point where it looked at one of them, and 
+        it then finds the same cycles as a new search of the graph would."""
+
+        def __init__(self, cycleCheckingGraph, roots):
+                self.graph = cycleCheckingGraph
+                self.roots = roots
+                self.nextRoot = 0
+                #the current search path, as a list of [node, index of next child]
+                self.stack = []
+                self.onStack = set()
+                #for each node reached, the log entry of the edge it was reached by
+                self.reachedBy = {}
+                #(parent, index of child, child) for each edge looked at, where the
+                #start of the search from a root is logged as (None, index, root)
+                self.log = []
+                self.logPosition = {}
+                self.stoppedOnCycle = False
+
+        def findCycle(self):
+                """Continues the search and returns the next edge found whose 
+                child is on the current search path, as a tuple (parent, child), 
+                or None if the search finishes without finding one."""
+
+                self.stoppedOnCycle = False
+                while True:
+                        if self.stack == []:
+                                while self.nextRoot < len(self.roots) and \
+                                                self.roots[self.nextRoot] in self.reachedBy:
+                                        self.nextRoot += 1
+                                if self.nextRoot == len(self.roots):
+                                        return None
+                                self.visit(None, self.nextRoot, self.roots[self.nextRoot])
+                                self.nextRoot += 1
+                                continue
+                        frame = self.stack[-1]
+                        node, index = frame
+                        children = self.graph[node]
+                        if index == len(children):
+                                self.stack.pop()
+                                self.onStack.remove(node)
+                                continue
+                        frame[1] = index + 1
+                        child = children[index]
+                        if child == None:
+                                continue
+                        if not child in self.reachedBy:
+                                self.visit(node, index, child)
+                        else:
+                                self.logEdge(node, index, child)
+                                if child in self.onStack:
+                                        self.stoppedOnCycle = True
+                                        return (node, child)
+
+        def logEdge(self, parent, index, child):
+                """Adds the edge from parent to its child at position index to 
+                the log."""
+
+                self.logPosition[(parent, child)] = len(self.log)
+                self.log.append((parent, index, child))
+
+        def visit(self, parent, index, child):
+                """Logs the edge from parent to its child at position index, and 
+                moves the search to child, which has not been reached before."""
+
+                self.logEdge(parent, index, child)
+                self.reachedBy[child] = (parent, index)
+                self.stack.append([child, 0])
+                self.onStack.add(child)
+
+        def removeEdges(self, edges):
+                """Takes as input a list of edges (parent, child) that have just 
+                been removed from the graph, and rewinds the search to the first 
+                point where it looked at one of them. If the search stopped on a 
+                cycle, it is rewound at least to the edge it stopped on, so that 
+                the edge is looked at again."""
+
+                positions = [self.logPosition[edge] for edge in edges \
+                        if edge in self.logPosition]
+                if self.stoppedOnCycle:
+                        positions.append(len(self.log) - 1)
+                self.stoppedOnCycle = False
+                if positions == []:
+                        return
+                start = min(positions)
+                #forget every edge looked at and every node reached from start on
+                for parent, index, child in self.log[start:]:
+                        del self.logPosition[(parent, child)]
+                        if self.reachedBy.get(child) == (parent, index):
+                                del self.reachedBy[child]
+                parent, index, child = self.log[start]
+                del self.log[start:]
+                #rebuild the search path, so that the edge at start is next
+                self.stack = []
+                while parent != None:
+                        self.stack.append([parent, index])
+                        parent, index = self.reachedBy[parent]
+                        index += 1
+                self.stack.reverse()
+                self.onStack = set(node for node, index in self.stack)
+                self.nextRoot = index
+
+
+def deleteTransfer(cycleCheckingGraph, transferList, cycleEdge):
         """This function takes as input the cycle checking graph 
-        cycleCheckingGraph, markingDict, a dictionary that keeps track of all the 
-        childNodes that are marked or ticked, and node, the node that we will 
-        recurse on. Nodes are marked permanently as soon as a recursive call is 
-        made on them. Ticks are added to a node when a recursive call is made on 
-        them, and then removed as soon as the recursive call is finished. A cycle 
-        is detected whenever a child of the current node is already ticked. The 
-        function updates markingDict and returns a tuple where the first element 
-        is the parent of the ticked child and the second element is that child. 
-        If the function finds no cycles, it returns None."""
+        cycleCheckingGraph, a list transferList of all transfers in the 
+        reconciliation, and cycleEdge, a tuple with two elements. The function 
+        removes the first transfer that contains the child in cycleEdge from 
+        transferList, and removes the edges that were added to 
+        cycleCheckingGraph because of it. It returns the guilty transfer and a 
+        list of the removed edges."""
 
-        tick(markingDict, node)
-        for child in cycleCheckingGraph[node]:
-                if not checked(markingDict, child) and child != None:
-                        check(markingDict, child)
-                        cycleEdge = recurseChildren(cycleCheckingGraph, markingDict, \
-                                child)
-
-                        if cycleEdge != None:
-                                return cycleEdge
-
-                elif child != None:
-                        if ticked(markingDict, child):
-                                return (node, child)
-
-        untick(markingDict, node)
-
-        return None
-
-
-def deleteTransfer(cycleCheckingGraph, markingDict, transferList, cycleEdge):
-        """This function takes as input the cycle checking graph 
-        cycleCheckingGraph, a dictionary markingDict, a list transferList of all 
-        transfers in the reconciliation, and cycleEdge, which is either a tuple 
-        with two elements, or None. The function returns a new cycle checking 
-        graph newCycleCheckingGraph, from which the guilty transfer has been 
-        removed. It also returns the guilty transfer and transferList with the 
-        guilty transfer removed."""
-
-        newCycleCheckingGraph = copy.deepcopy(cycleCheckingGraph)
         guiltyTransfer = []
-        if cycleEdge == None:
-                return newCycleCheckingGraph, guiltyTransfer, transferList
+        removedEdges = []
         node, cycleNode = cycleEdge
-        # for transfer in transferList:
-
-        #       if cycleNode in transfer and node in transfer:
-
-        #               guiltyTransfer = transfer
-        #               transferList.remove(transfer)
-        #               #remove all the edges that were added due to the guilty transfer
-        #               removeChild(newCycleCheckingGraph, transfer[1], transfer[0])
-        #               removeChild(newCycleCheckingGraph, transfer[0], transfer[2])
-        #               removeChild(newCycleCheckingGraph, transfer[0], transfer[4])
-        #               if transfer[1] != transfer[3]:
-        #                       removeChild(newCycleCheckingGraph, transfer[3], transfer[0])
-        #               break
         for transfer in transferList:
 
                 if cycleNode in transfer:
@@ -220,14 +201,15 @@ def deleteTransfer(cycleCheckingGraph, markingDict, transferList, cycleEdge):
                         guiltyTransfer = transfer
                         transferList.remove(transfer)
                         #remove all the edges that were added due to the guilty transfer
-                        removeChild(newCycleCheckingGraph, transfer[1], transfer[0])
-                        removeChild(newCycleCheckingGraph, transfer[0], transfer[2])
-                        removeChild(newCycleCheckingGraph, transfer[0], transfer[4])
+                        removedEdges = [(transfer[1], transfer[0]), \
+                                (transfer[0], transfer[2]), (transfer[0], transfer[4])]
                         if transfer[1] != transfer[3]:
-                                removeChild(newCycleCheckingGraph, transfer[3], transfer[0])
+                                removedEdges.append((transfer[3], transfer[0]))
+                        for parent, child in removedEdges:
+                                removeChild(cycleCheckingGraph, parent, child)
                         break
 
-        return newCycleCheckingGraph, guiltyTransfer, transferList
+        return guiltyTransfer, removedEdges
 
 
 def removeChild(cycleCheckingGraph, parent, child):
@@ -263,15 +245,16 @@ def updateReconciliation(guiltyTransferList, HostTree, ParasiteTree, \
         return newReconciliation
 
 
-def detectCyclesWrapper(HostTree, ParasiteTree, reconciliation):
-        """This function takes in a host tree, parasite tree, and reconciliation. 
-        It returns an updated cycle checking graph where the edges that came from 
-        the guilty transfers have been removed, and it returns a new 
-        reconciliation where the guilty transfers have been marked."""
+def detectCyclesWrapper(HostTree, ParasiteTree, reconciliation, skeleton=None):
+        """This function takes in a host tree, parasite tree, and reconciliation, 
+        and optionally the TemporalSkeleton of the trees. It returns an updated 
+        cycle checking graph where the edges that came from the guilty transfers 
+        have been removed, and it returns a new reconciliation where the guilty 
+        transfers have been marked."""
 
         markingDict = {}
         newCycleCheckingGraph, guiltyTransferList = detectCycles(HostTree, \
-                ParasiteTree, reconciliation)
+                ParasiteTree, reconciliation, skeleton)
         newReconciliation = updateReconciliation(guiltyTransferList, HostTree, \
                 ParasiteTree, reconciliation)
         return newReconciliation, newCycleCheckingGraph
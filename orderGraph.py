@@ -4,20 +4,85 @@
 
 # This file contains a function for topologically ordering a tree graph and detecting cyclic graphs
 
+from collections import deque
+import cycleCheckingGraph
+
 
 def date(cycleGraph):
 	"""takes a CycleCheckingGraph (frankenstien graph compination 
 		of host and parasite tree)and returns a dictionary representation 
 		of the ordering of the tree. If there is a cycle, the function returns timeTravel"""
-	#ordering of the Nodes
-	order = {}
-	#InnerNodes
+	#InnerNodes, with their in-degrees
+	innerNodes, Leaves = findNodes(cycleGraph)
+	for key in innerNodes:
+		for child in cycleGraph[key]:
+			if child in innerNodes:
+				innerNodes[child] += 1
+	return orderNodes(cycleGraph, innerNodes, Leaves)
+
+
+def date_many(host, paras, reconciliations, skeleton=None):
+	"""takes a host tree, a parasite tree and a list of reconciliations and 
+		returns a list with the result of date for the CycleCheckingGraph of 
+		each reconciliation. The graph of the trees and its in-degrees are 
+		built once and reused, instead of a new graph for each 
+		reconciliation. Each reconciliation is still dated with a full pass 
+		over the graph, since date numbers the nodes in the order of the 
+		whole graph, so this is about as fast as calling date on each graph. 
+		A caller that already has the TemporalSkeleton of the trees can pass 
+		it in"""
+	if skeleton == None:
+		skeleton = cycleCheckingGraph.TemporalSkeleton(host, paras)
+	#the graph of the trees, which has the same keys in the same order as the 
+	#graph of every reconciliation
+	graph = skeleton.build({})[0]
+	#the lists of children of the trees, put back in graph after each 
+	#reconciliation
+	skeletonGraph = dict(graph)
+	skeletonInner = findNodes(graph)[0]
+	uniquify = cycleCheckingGraph.uniquify
+	#in-degrees from the inner nodes of the skeleton, counted for every node
+	skeletonDegrees = {}
+	for key in skeletonInner:
+		for child in graph[key]:
+			if child != None:
+				skeletonDegrees[child] = skeletonDegrees.get(child, 0) + 1
+	orders = []
+	for reconciliation in reconciliations:
+		changed = skeleton.changes(reconciliation)[0]
+		#a transfer from the root edge changes the children of Top, which is 
+		#not a node of the graph
+		changed.pop('Top', None)
+		#put the children of the reconciliation in place of those of the trees
+		for node in changed:
+			changed[node] = graph[node] = uniquify(changed[node])
+		innerNodes, Leaves = findNodes(graph)
+		for node in innerNodes:
+			innerNodes[node] = skeletonDegrees.get(node, 0)
+		for node in changed:
+			if node in skeletonInner:
+				for child in skeletonGraph[node]:
+					if child in innerNodes:
+						innerNodes[child] -= 1
+			if node in innerNodes:
+				for child in changed[node]:
+					if child in innerNodes:
+						innerNodes[child] += 1
+		orders.append(orderNodes(graph, innerNodes, Leaves))
+		#assigned one by one, since update can resize the graph and change 
+		#the order of its keys
+		for node in changed:
+			graph[node] = skeletonGraph[node]
+	return orders
+
+
+def findNodes(cycleGraph):
+	"""takes a CycleCheckingGraph and returns a dictionary with the inner 
+		nodes as keys and 0 as values, in the order date numbers them, and a 
+		dictionary with the leaves (nodes with a None child) as keys"""
 	innerNodes = {}
-	# dict of Leaves
 	Leaves = {}
-	#List of Nodes with In-degree zero
-	LonerList = []
-	for key in cycleGraph.keys():
+	for key in cycleGraph:
 		if  key != None:
 			innerNodes[key] = 0
 		for child in cycleGraph[key]:
@@ -25,32 +90,33 @@ def date(cycleGraph):
 				innerNodes[child] = 0
 			else:
 				Leaves[key] = True
-	for key in Leaves.keys():
-		if key in innerNodes.keys():
+	for key in Leaves:
+		if key in innerNodes:
 			del innerNodes[key]
-	for key in innerNodes.keys():
-		for child in cycleGraph[key]:
-			if child != None and child in innerNodes:
-				innerNodes[child] += 1
+	return innerNodes, Leaves
+
+
+def orderNodes(cycleGraph, innerNodes, Leaves):
+	"""takes a CycleCheckingGraph, a dictionary of its inner nodes and their 
+		in-degrees and a dictionary of its leaves, and returns the ordering 
+		of the graph as described in date, or timeTravel if there is a cycle"""
+	#ordering of the Nodes
+	order = {}
+	#Nodes with In-degree zero
+	LonerList = deque(key for key in innerNodes if innerNodes[key] == 0)
 	place = 0
-	for key in innerNodes.keys():
-		if innerNodes[key] == 0:
-			del innerNodes[key]
-			LonerList.append(key)
 	while LonerList:
-		nodeZero = LonerList[0]
-		del LonerList[0]
+		nodeZero = LonerList.popleft()
 		order[nodeZero] = place
 		place += 1
 		for child in cycleGraph[nodeZero]:
-			if child in innerNodes.keys():
+			if child in innerNodes:
 				innerNodes[child] -= 1
 				if innerNodes[child] == 0:
-					del innerNodes[child]
 					LonerList.append(child)
-	if len(innerNodes.keys()) > 0:
+	if place < len(innerNodes):
 		return "timeTravel"
 	else:
 		for leaf in Leaves:
 			order[leaf] = len(Leaves)
-		return order
\ No newline at end of file
+		return order
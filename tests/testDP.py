@@ -0,0 +1,257 @@
+# testDP.py
+
+# Checks DP.DP on the trees of testFiles at several event costs against the
+# golden output in DPgolden.txt (the cost of the maximum parsimony
+# reconciliations, their number, and the events of the DTL graph with the
+# number of reconciliations that contain each of them), and checks the
+# numbers of reconciliations and event frequencies against the
+# reconciliations of the DTL graph listed one by one.  DP.minCost is checked
+# against the same costs and numbers of reconciliations.  Run it from the
+# repository directory with "python -m unittest discover tests".  After a
+# deliberate change to DP.DP, the golden output is written again with
+# "python tests/testDP.py write".
+
+# python libraries
+import glob
+import os
+import sys
+import unittest
+
+# DP libraries
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import DP
+import newickFormatReader
+try:
+    import DPnumpy
+except ImportError:
+    DPnumpy = None
+
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), \
+                      "DPgolden.txt")
+
+# (D, T, L) event costs to test
+COSTS = [(2, 3, 1), (1, 1, 1), (1, 4, 2), (1, 2, 1), (0, 1, 1), (3, 2, 2)]
+
+# The DTL graphs of COG0020 are too large to list in the golden output or to
+# list the reconciliations of, so only the cost and the number of
+# reconciliations are checked, for each (D, T, L) of COSTS
+COG0020 = {(2, 3, 1): (158, 3120), (1, 1, 1): (64, 1728), \
+           (1, 4, 2): (210, 2400), (1, 2, 1): (109, 2400), \
+           (0, 1, 1): (56, 864), (3, 2, 2): (135, 864)}
+
+# The inputs on which the scoring of DP.DP was wrong before it visited each
+# mapping node once, at its deepest level in the graph.  It used to visit
+# the mapping nodes by level and went wrong when a mapping node was reached
+# at more than one depth of the graph.  Each entry gives the
+# right number of reconciliations and the number reported before, and a tip
+# mapping node whose contemporary event is in every reconciliation, with its
+# right frequency and the frequency reported before.
+SCORING_CHANGES = {
+    ("Ficus.newick", (2, 3, 1)): \
+        (12, 192, ('C._appendiculatus', 'F_variegata'), 1.0, 0.25),
+    ("Ficus.newick", (1, 4, 2)): \
+        (17, 21, ('C._appendiculatus', 'F_variegata'), 1.0, 17 / 21.0),
+    ("Ficus.newick", (1, 2, 1)): \
+        (17, 21, ('C._appendiculatus', 'F_variegata'), 1.0, 17 / 21.0),
+    ("Vidua.newick", (2, 3, 1)): \
+        (6, 10, ('V._camerunensis', 'L._rara'), 1.0, 0.6),
+    ("Vidua.newick", (1, 4, 2)): \
+        (45, 45, ('V._interjecta', 'P._phoenicoptera'), 1.0, 3.0),
+    ("Vidua.newick", (1, 2, 1)): \
+        (45, 45, ('V._interjecta', 'P._phoenicoptera'), 1.0, 3.0)}
+
+def testFiles():
+    """Returns the names of the newick files of testFiles other than
+    COG0020, sorted"""
+    fileNames = glob.glob(os.path.join(ROOT, "testFiles", "*.newick"))
+    return sorted(fileName for fileName in fileNames \
+                  if os.path.basename(fileName) != "COG0020.newick")
+
+def bestCost(DTL, parasiteTree):
+    """Takes a DTL graph and a parasite tree and returns the cost of the
+    maximum parsimony reconciliations"""
+    return min(DTL[mapNode][-1] for mapNode in DTL \
+               if mapNode[0] == parasiteTree['pTop'][1])
+
+def eventCounts(DTL, numRecon):
+    """Takes a DTL graph and its number of reconciliations and returns a
+    dictionary with a tuple (mapping node, event type, child, child) for each
+    event as key and the number of reconciliations that contain it as
+    value"""
+    counts = {}
+    for mapNode in DTL:
+        for event in DTL[mapNode][:-1]:
+            key = (mapNode, event[0], event[1], event[2])
+            counts[key] = int(round(event[-1] * numRecon))
+    return counts
+
+def readGolden():
+    """Returns a dictionary with (file name, (D, T, L)) as keys and tuples
+    (cost, number of reconciliations, event counts as in eventCounts) as
+    values, read from the golden output"""
+    golden = {}
+    for line in open(GOLDEN):
+        fields = line.split()
+        if fields == [] or fields[0] == "#":
+            continue
+        if fields[0] == "case":
+            counts = {}
+            D, T, L, cost, numRecon = [int(field) for field in fields[2:]]
+            golden[(fields[1], (D, T, L))] = (cost, numRecon, counts)
+        else:
+            nodes = [None if field == "-" else field for field in fields]
+            key = ((nodes[0], nodes[1]), nodes[2], (nodes[3], nodes[4]), \
+                   (nodes[5], nodes[6]))
+            counts[key] = int(fields[7])
+    return golden
+
+def writeGolden():
+    """Writes the golden output of the current DP.DP"""
+    output = open(GOLDEN, "w")
+    output.write("# Golden output of DP.DP for tests/testDP.py, written by\n" \
+                 "# \"python tests/testDP.py write\".  Each case starts with\n" \
+                 "#   case <file> <D> <T> <L> <cost> <reconciliations>\n" \
+                 "# followed by a line for each event of its DTL graph:\n" \
+                 "#   <p> <h> <event> <child p> <child h> <child p> " \
+                 "<child h> <count>\n" \
+                 "# where a missing child is \"- -\" and count is the number " \
+                 "of\n# reconciliations that contain the event.\n")
+    for fileName in testFiles():
+        hostTree, parasiteTree, phi = newickFormatReader.getInput(fileName)
+        for D, T, L in COSTS:
+            DTL, numRecon = DP.DP(hostTree, parasiteTree, phi, D, T, L)
+            output.write("case %s %d %d %d %d %d\n" % \
+                         (os.path.basename(fileName), D, T, L, \
+                          bestCost(DTL, parasiteTree), numRecon))
+            counts = eventCounts(DTL, numRecon)
+            for key in sorted(counts):
+                mapNode, eventType, child1, child2 = key
+                nodes = list(mapNode) + [eventType] + list(child1) + \
+                        list(child2)
+                output.write(" ".join(["-" if node is None else node \
+                                       for node in nodes]) + \
+                             " %d\n" % counts[key])
+    output.close()
+
+def listReconciliations(DTL, mapNode):
+    """Takes a DTL graph and one of its mapping nodes and returns the list of
+    the reconciliations below that mapping node, each a list of the
+    (mapping node, event index) pairs it uses"""
+    reconciliations = []
+    for i in range(len(DTL[mapNode]) - 1):
+        partial = [[(mapNode, i)]]
+        for child in DTL[mapNode][i][1:3]:
+            if child != (None, None):
+                partial = [recon + childRecon for recon in partial \
+                           for childRecon in listReconciliations(DTL, child)]
+        reconciliations.extend(partial)
+    return reconciliations
+
+def bruteForceScores(DTL, parasiteTree):
+    """Takes a DTL graph and a parasite tree and returns the number of
+    reconciliations in the graph and a dictionary with the frequency of each
+    (mapping node, event index) pair among them"""
+    minimums = dict((mapNode, DTL[mapNode][-1]) for mapNode in DTL)
+    reconciliations = []
+    for root in DP.findBestRoots(parasiteTree, minimums):
+        reconciliations.extend(listReconciliations(DTL, root))
+    counts = {}
+    for recon in reconciliations:
+        for pair in recon:
+            counts[pair] = counts.get(pair, 0) + 1
+    numRecon = len(reconciliations)
+    frequencies = dict((pair, counts[pair] / float(numRecon)) \
+                       for pair in counts)
+    return numRecon, frequencies
+
+class DPTest(unittest.TestCase):
+
+    def testGolden(self):
+        golden = readGolden()
+        cases = 0
+        for fileName in testFiles():
+            name = os.path.basename(fileName)
+            hostTree, parasiteTree, phi = newickFormatReader.getInput(fileName)
+            for D, T, L in COSTS:
+                message = "%s at %s" % (name, (D, T, L))
+                DTL, numRecon = DP.DP(hostTree, parasiteTree, phi, D, T, L)
+                self.assertEqual((bestCost(DTL, parasiteTree), numRecon, \
+                                  eventCounts(DTL, numRecon)), \
+                                 golden[(name, (D, T, L))], message)
+                cases += 1
+        self.assertEqual(cases, len(golden))
+
+    def testBruteForce(self):
+        for fileName in testFiles():
+            name = os.path.basename(fileName)
+            hostTree, parasiteTree, phi = newickFormatReader.getInput(fileName)
+            for D, T, L in COSTS:
+                message = "%s at %s" % (name, (D, T, L))
+                DTL, numRecon = DP.DP(hostTree, parasiteTree, phi, D, T, L)
+                bruteRecon, frequencies = bruteForceScores(DTL, parasiteTree)
+                self.assertEqual(numRecon, bruteRecon, message)
+                for mapNode in DTL:
+                    for i in range(len(DTL[mapNode]) - 1):
+                        self.assertEqual(DTL[mapNode][i][3], \
+                                         frequencies.get((mapNode, i), 0.0), \
+                                         message)
+
+    def testMinCost(self):
+        golden = readGolden()
+        for fileName in testFiles():
+            name = os.path.basename(fileName)
+            hostTree, parasiteTree, phi = newickFormatReader.getInput(fileName)
+            for D, T, L in COSTS:
+                message = "%s at %s" % (name, (D, T, L))
+                DTL, numRecon = DP.DP(hostTree, parasiteTree, phi, D, T, L)
+                self.assertEqual(DP.minCost(hostTree, parasiteTree, phi, \
+                                            D, T, L), \
+                                 bestCost(DTL, parasiteTree), message)
+                cost, reconCount, _ = golden[(name, (D, T, L))]
+                self.assertEqual(DP.minCost(hostTree, parasiteTree, phi, \
+                                            D, T, L, count=True), \
+                                 (cost, reconCount), message)
+        fileName = os.path.join(ROOT, "testFiles", "COG0020.newick")
+        hostTree, parasiteTree, phi = newickFormatReader.getInput(fileName)
+        for (D, T, L), (cost, numRecon) in sorted(COG0020.items()):
+            self.assertEqual(DP.minCost(hostTree, parasiteTree, phi, \
+                                        D, T, L, count=True), \
+                             (cost, numRecon), (D, T, L))
+
+    @unittest.skipIf(DPnumpy is None, "numpy is not installed")
+    def testNumpy(self):
+        for fileName in testFiles():
+            name = os.path.basename(fileName)
+            hostTree, parasiteTree, phi = newickFormatReader.getInput(fileName)
+            for D, T, L in COSTS:
+                message = "%s at %s" % (name, (D, T, L))
+                self.assertEqual(DPnumpy.DP(hostTree, parasiteTree, phi, \
+                                            D, T, L), \
+                                 DP.DP(hostTree, parasiteTree, phi, D, T, L), \
+                                 message)
+
+    def testScoringChanges(self):
+        for (name, (D, T, L)), change in SCORING_CHANGES.items():
+            numRecon, oldRecon, mapNode, frequency, oldFrequency = change
+            fileName = os.path.join(ROOT, "testFiles", name)
+            hostTree, parasiteTree, phi = newickFormatReader.getInput(fileName)
+            DTL, reconCount = DP.DP(hostTree, parasiteTree, phi, D, T, L)
+            message = "%s at %s" % (name, (D, T, L))
+            self.assertEqual(reconCount, numRecon, message)
+            self.assertEqual(DTL[mapNode][0][0], 'C', message)
+            self.assertEqual(DTL[mapNode][0][3], frequency, message)
+
+    def testCOG0020(self):
+        fileName = os.path.join(ROOT, "testFiles", "COG0020.newick")
+        hostTree, parasiteTree, phi = newickFormatReader.getInput(fileName)
+        for (D, T, L), (cost, numRecon) in sorted(COG0020.items()):
+            DTL, reconCount = DP.DP(hostTree, parasiteTree, phi, D, T, L)
+            self.assertEqual((bestCost(DTL, parasiteTree), reconCount), \
+                             (cost, numRecon), (D, T, L))
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["write"]:
+        writeGolden()
+    else:
+        unittest.main()
@@ -0,0 +1,293 @@
+# testDetectCycles.py
+
+# Checks detectCycles.detectCycles, which resumes one depth first search
+# after each guilty transfer is removed, against the detectCycles it
+# replaced, which searched the whole graph again from the host root (and
+# then from every node, once the host root reached no cycle) after each
+# removal.  The reconciliations are random ones of the DTL graphs of the
+# trees of testFiles, at event costs that give cycles with many guilty
+# transfers on COG0020.  Run it from the repository directory with
+# "python -m unittest discover tests".
+
+# python libraries
+import copy
+import glob
+import os
+import random
+import sys
+import unittest
+
+# DP libraries
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import DP
+import Greedy
+import RandomGenerator
+import cycleCheckingGraph
+import detectCycles
+import newickFormatReader
+import orderGraph
+from cycleCheckingGraph import createParentsDict, treeFormat, uniquify
+
+# (D, T, L) event costs to test
+COSTS = [(2, 3, 1), (1, 0, 1), (2, 1, 2)]
+
+# Number of random reconciliations to test for each tree and event costs
+SAMPLES = 25
+
+def testFiles():
+    """Returns the names of the newick files of testFiles, sorted"""
+    return sorted(glob.glob(os.path.join(ROOT, "testFiles", "*.newick")))
+
+# The detectCycles of detectCycles.py before the resumed search, with the
+# functions it used
+
+def oldBuildReconciliation(HostTree, ParasiteTree, reconciliation):
+        """Takes as input a host tree, a parasite tree, and a reconciliation, and
+        returns a graph where the keys are host or parasite nodes, and the values
+        are a list of the children of a particular node. The graph represents 
+        temporal relationships between events. The function also returns a list 
+        transferList containing all the transfers in the reconciliation in the 
+        form """
+
+        #create a dictionary with a list of parents of each host and parasite node
+        parents = createParentsDict(HostTree, ParasiteTree)
+        H = treeFormat(HostTree)
+        P = treeFormat(ParasiteTree)
+        cycleCheckingGraph = H
+        cycleCheckingGraph.update(P)
+        transferList = [] 
+        for key in reconciliation:
+                #deal with transfer case:
+                if reconciliation[key][0] == 'T':
+                        #add the children of the parasite node to the list of children
+                        #of the host node in cycleCheckingGraph
+                        cycleCheckingGraph[key[0]] = P[key[0]] + \
+                                [reconciliation[key][1][1], reconciliation[key][2][1]]
+                        #find the parents of the take-off and landing host nodes
+                        parent1 = parents[reconciliation[key][1][1]]
+                        parent2 = parents[reconciliation[key][2][1]]
+                        #add the parasite node as a child of parent1 and parent2
+                        cycleCheckingGraph[parent1] = cycleCheckingGraph[parent1] + \
+                                [key[0]]
+                        cycleCheckingGraph[parent2] = cycleCheckingGraph[parent2] + \
+                                [key[0]]
+                        transferEdge1 = reconciliation[key][1][1]
+                        transferEdge2 = reconciliation[key][2][1]
+                        transferList.append([key[0], parent1, transferEdge1, parent2, \
+                                transferEdge2])
+
+                #deal with speciation case:
+                elif reconciliation[key][0] == 'S':
+                        parent = parents[key[0]]
+                        if parent != 'Top':
+                                cycleCheckingGraph[parent] = cycleCheckingGraph[parent] + \
+                                        [key[1]]
+                        cycleCheckingGraph[key[1]] = cycleCheckingGraph[key[1]] + \
+                                cycleCheckingGraph[key[0]]
+
+                #deal with duplication case:
+                elif reconciliation[key][0] == 'D':
+                        parent = parents[key[1]]
+                        if parent != 'Top':
+                                cycleCheckingGraph[parent] = cycleCheckingGraph[parent] + \
+                                        [key[0]]
+                        cycleCheckingGraph[key[0]] = cycleCheckingGraph[key[0]] + [key[1]]
+
+                #deal with contemporary case:
+                elif reconciliation[key][0] == 'C':
+                        cycleCheckingGraph[key[1]] = [None]
+                        cycleCheckingGraph[key[0]] = [None]
+
+        for key in cycleCheckingGraph:
+                cycleCheckingGraph[key] = uniquify(cycleCheckingGraph[key])
+
+        return cycleCheckingGraph, transferList
+
+
+def oldDetectCycles(HostTree, ParasiteTree, reconciliation):
+        """This function takes as input the cycle checking graph, 
+        cycleCheckingGraph. It returns a new version of cycleCheckingGraph, 
+        newCycleCheckingGraph, from which the transfer events responsible for the 
+        cycles have been removed. It also returns a list, guiltyTransferList, of 
+        the guilty transfers."""
+
+        guiltyTransferList = []
+        markingDict = {}
+        cycleCheckingGraph, transferList = oldBuildReconciliation(HostTree, \
+                ParasiteTree, reconciliation)
+        Hroot = Greedy.findRoot(HostTree)
+        markingDict[Hroot] = ['check']
+        cycleEdge = oldRecurseChildren(cycleCheckingGraph, markingDict, Hroot)
+        newCycleCheckingGraph, guiltyTransfer, transferList = oldDeleteTransfer(\
+                cycleCheckingGraph, markingDict, transferList, cycleEdge)
+        if guiltyTransfer != []:
+                guiltyTransferList.append(guiltyTransfer)
+        while cycleEdge != None:
+                cycleEdge = None
+                markingDict = {}
+                cycleEdge = oldRecurseChildren(newCycleCheckingGraph, \
+                        {Hroot: ['check']}, Hroot)
+                if cycleEdge == None:
+                        for node in newCycleCheckingGraph:
+                                if not oldChecked(markingDict, node):
+                                        oldCheck(markingDict, node)
+                                        cycleEdge = oldRecurseChildren(newCycleCheckingGraph, \
+                                                markingDict, node)
+                                        if cycleEdge != None:
+                                                break
+                newCycleCheckingGraph, guiltyTransfer, transferList = oldDeleteTransfer(\
+                        newCycleCheckingGraph, markingDict, transferList, cycleEdge)
+                if guiltyTransfer != []:
+                        guiltyTransferList.append(guiltyTransfer)
+
+        return newCycleCheckingGraph, guiltyTransferList
+
+
+def oldChecked(markingDict, node):
+        """This function takes as input a markingDict and a node, and checks the 
+        node in markingDict, marking it as visited."""
+
+        return node in markingDict
+
+
+def oldTicked(markingDict, node):
+        """This function takes as input a markingDict and a checked node, and 
+        returns True if the node is already ticked, False if it is not."""
+
+        return node in markingDict and len(markingDict[node]) == 2
+
+
+def oldTick(markingDict, node):
+        """This function takes as input a markingDict and node which is checked 
+        but not ticked, and ticks the node in markingDict."""
+
+        markingDict[node] = markingDict[node] + ['tick']
+
+
+def oldUntick(markingDict, node):
+        """This function takes as input a markingDict and a ticked node, and 
+        unticks the node in markingDict."""
+
+        markingDict[node] = markingDict[node][:1]
+
+
+def oldCheck(markingDict, node):
+        """This function takes as input markingDict and a node, and checks the 
+        node in markingDict."""
+
+        markingDict[node] = ['check']
+
+
+def oldRecurseChildren(cycleCheckingGraph, markingDict, node):
+        """This function takes as input the cycle checking graph 
+        cycleCheckingGraph, markingDict, a dictionary that keeps track of all the 
+        childNodes that are marked or ticked, and node, the node that we will 
+        recurse on. Nodes are marked permanently as soon as a recursive call is 
+        made on them. Ticks are added to a node when a recursive call is made on 
+        them, and then removed as soon as the recursive call is finished. A cycle 
+        is detected whenever a child of the current node is already ticked. The 
+        function updates markingDict and returns a tuple where the first element 
+        is the parent of the ticked child and the second element is that child. 
+        If the function finds no cycles, it returns None."""
+
+        oldTick(markingDict, node)
+        for child in cycleCheckingGraph[node]:
+                if not oldChecked(markingDict, child) and child != None:
+                        oldCheck(markingDict, child)
+                        cycleEdge = oldRecurseChildren(cycleCheckingGraph, markingDict, \
+                                child)
+
+                        if cycleEdge != None:
+                                return cycleEdge
+
+                elif child != None:
+                        if oldTicked(markingDict, child):
+                                return (node, child)
+
+        oldUntick(markingDict, node)
+
+        return None
+
+
+def oldDeleteTransfer(cycleCheckingGraph, markingDict, transferList, cycleEdge):
+        """This function takes as input the cycle checking graph 
+        cycleCheckingGraph, a dictionary markingDict, a list transferList of all 
+        transfers in the reconciliation, and cycleEdge, which is either a tuple 
+        with two elements, or None. The function returns a new cycle checking 
+        graph newCycleCheckingGraph, from which the guilty transfer has been 
+        removed. It also returns the guilty transfer and transferList with the 
+        guilty transfer removed."""
+
+        newCycleCheckingGraph = copy.deepcopy(cycleCheckingGraph)
+        guiltyTransfer = []
+        if cycleEdge == None:
+                return newCycleCheckingGraph, guiltyTransfer, transferList
+        node, cycleNode = cycleEdge
+        for transfer in transferList:
+
+                if cycleNode in transfer:
+
+                        guiltyTransfer = transfer
+                        transferList.remove(transfer)
+                        #remove all the edges that were added due to the guilty transfer
+                        oldRemoveChild(newCycleCheckingGraph, transfer[1], transfer[0])
+                        oldRemoveChild(newCycleCheckingGraph, transfer[0], transfer[2])
+                        oldRemoveChild(newCycleCheckingGraph, transfer[0], transfer[4])
+                        if transfer[1] != transfer[3]:
+                                oldRemoveChild(newCycleCheckingGraph, transfer[3], transfer[0])
+                        break
+
+        return newCycleCheckingGraph, guiltyTransfer, transferList
+
+
+def oldRemoveChild(cycleCheckingGraph, parent, child):
+        """This function takes as input a graph cycleCheckingGraph, a parent, and 
+        its child. It removes the edge between the parent and child in 
+        cycleCheckingGraph."""
+
+        childList = cycleCheckingGraph[parent]
+        childList.remove(child)
+        cycleCheckingGraph[parent] = childList
+
+class DetectCyclesTest(unittest.TestCase):
+
+    def testRestartedSearch(self):
+        random.seed(0)
+        guiltyCounts = []
+        for fileName in testFiles():
+            name = os.path.basename(fileName)
+            hostTree, parasiteTree, phi = newickFormatReader.getInput(fileName)
+            skeleton = cycleCheckingGraph.TemporalSkeleton(hostTree, \
+                                                           parasiteTree)
+            for D, T, L in COSTS:
+                message = "%s at %s" % (name, (D, T, L))
+                DTL, numRecon = DP.DP(hostTree, parasiteTree, phi, D, T, L)
+                rootList = RandomGenerator.rootGenerator(DTL, parasiteTree)
+                for n in range(SAMPLES):
+                    recon = RandomGenerator.uniformRecon(DTL, \
+                        [random.choice(rootList)], {})
+                    recon = dict((key, recon[key][:-1]) for key in recon)
+                    original = copy.deepcopy(recon)
+                    graph, guiltyTransferList = oldDetectCycles(hostTree, \
+                        parasiteTree, recon)
+                    self.assertEqual(detectCycles.detectCycles(hostTree, \
+                        parasiteTree, recon, skeleton), \
+                        (graph, guiltyTransferList), message)
+                    newReconciliation = detectCycles.updateReconciliation(\
+                        guiltyTransferList, hostTree, parasiteTree, recon)
+                    self.assertEqual(detectCycles.detectCyclesWrapper(\
+                        hostTree, parasiteTree, recon), \
+                        (newReconciliation, graph), message)
+                    self.assertEqual(recon, original, message)
+                    # the graph with the guilty transfers removed is acyclic
+                    self.assertNotEqual(orderGraph.date(graph), "timeTravel", \
+                                        message)
+                    guiltyCounts.append(len(guiltyTransferList))
+        # acyclic reconciliations, and cyclic ones with one and with several
+        # guilty transfers, all come up
+        self.assertTrue(0 in guiltyCounts and 1 in guiltyCounts)
+        self.assertTrue(max(guiltyCounts) >= 5)
+
+if __name__ == "__main__":
+    unittest.main()
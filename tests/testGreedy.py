@@ -0,0 +1,346 @@
+# testGreedy.py
+
+# Checks Greedy.greedyCoverage stopping at its max_reconciliations and
+# min_coverage limits, and the coverage it reports, and checks
+# Greedy.Greedy, which rescores only the mapping nodes whose scores
+# change between rounds, against the Greedy it replaced, which rebuilt its
+# bookkeeping from scratch and reset the collected scores in the DTL graph
+# itself after every reconciliation, on the trees of testFiles at several
+# event costs.  Run it from the repository directory with
+# "python -m unittest discover tests".
+
+# python libraries
+import copy
+import glob
+import os
+import sys
+import unittest
+
+# DP libraries
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import DP
+import Greedy
+import newickFormatReader
+
+# (D, T, L) event costs to test
+COSTS = [(2, 3, 1), (1, 1, 1), (1, 4, 2), (1, 2, 1), (0, 1, 1), (3, 2, 2)]
+
+def testFiles():
+    """Returns the names of the newick files of testFiles other than
+    COG0020, sorted"""
+    fileNames = glob.glob(os.path.join(ROOT, "testFiles", "*.newick"))
+    return sorted(fileName for fileName in fileNames \
+                  if os.path.basename(fileName) != "COG0020.newick")
+
+def graphs():
+    """Returns a list of tuples (message, parasite tree, DTL graph) for the
+    trees of testFiles at each (D, T, L) of COSTS"""
+    cases = []
+    for fileName in testFiles():
+        name = os.path.basename(fileName)
+        hostTree, parasiteTree, phi = newickFormatReader.getInput(fileName)
+        for D, T, L in COSTS:
+            DTL, numRecon = DP.DP(hostTree, parasiteTree, phi, D, T, L)
+            cases.append(("%s at %s" % (name, (D, T, L)), parasiteTree, DTL))
+    return cases
+
+# The Greedy of Greedy.py before the incremental rescoring, which changes the
+# DTL graph it is given
+
+def oldOrderDTL(DTL, ParasiteRoot):
+    """This function takes in a DTL graph and the ParasiteRoot. It outputs a 
+    list, keysL, that contains tuples. Each tuple has two elements. The first
+    is a mapping node of the form (p, h), where p is a parasite node and h is 
+    a host node. The second element is a level representing the depth of that
+    mapping node within the tree."""
+
+    keysL = []
+    topNodes = []
+    for key in DTL:
+        if key[0] == ParasiteRoot:
+            topNodes.append(key)
+    for vertex in topNodes:
+        keysL.extend(oldOrderDTLRoots(DTL, vertex, 0))
+    return keysL
+
+def oldOrderDTLRoots(DTL, vertex, level):
+    """This function takes a DTL graph, one node, a vertex, of the DTL graph, 
+    and level, and returns a list, keysL, that contains tuples. Each tuple has
+    two elements. The first is a mapping node of the form (p, h), where p is a
+    parasite node and h is a host node. The second element is a level 
+    representing the depth of that mapping node within the tree. This function
+    adds the input vertex to keysL and recurses on its children."""
+
+    keysL = []
+    #loop through each event associated with key in DTL
+    for i in range(len(DTL[vertex]) - 1):
+        event = DTL[vertex][i]
+        child1 = event[1]
+        child2 = event[2]
+        keysL = keysL + [(vertex, level)]
+        if child1[0] != None:
+            keysL.extend(oldOrderDTLRoots(DTL, child1, level + 1))
+        if child2[0] != None:
+            keysL.extend(oldOrderDTLRoots(DTL, child2, level + 1)) 
+    return keysL
+
+
+def oldSortHelper(DTL, keysL):
+    """This function takes in a list keysL,and a DTL graph, and returns a new 
+    list, uniqueKeysL that has removed duplicate mapping nodes from keysL.
+    This function chooses the highest level for each mapping node because we 
+    are using the bottom-up approach."""
+    
+    uniqueKeysL = []
+    for key in DTL:
+        maxLevel = float("-inf")
+        for element in keysL:
+            if key == element[0]:
+                if element[1] > maxLevel:
+                    maxLevel = element[1]
+        uniqueKeysL.append((key, maxLevel))
+    return uniqueKeysL
+
+
+def oldPostorderDTLsort(DTL, ParasiteRoot):
+    """This function takes in a DTL graph and ParasiteRoot, and returns a 
+    sorted list, orderedKeysL, that is ordered by level from largest to 
+    smallest, where level 0 is the root and the highest level are tips."""
+
+    keysL = oldOrderDTL(DTL, ParasiteRoot)
+    uniqueKeysL = oldSortHelper(DTL, keysL)
+    orderedKeysL = []
+    levelCounter = 0
+    while len(orderedKeysL) < len(uniqueKeysL):
+        for mapping in uniqueKeysL:
+            if mapping[-1] == levelCounter:
+                orderedKeysL = [mapping] + orderedKeysL
+        levelCounter += 1
+    return orderedKeysL
+
+
+def oldBookkeeping(DTL, ParasiteTree):
+    """This function takes as inputs a DTL graph and ParasiteTree, and then 
+    records what the max is at each mapping node and which event the max came 
+    from. It outputs a dictionary BSFHMap by looping through the keys in a 
+    sorted list of mapping nodes and finding the max score at each mapping 
+    node and event node. BSFHMap has keys of the form (p, h) which are the 
+    mapping nodes, and values which are lists where the first element is an 
+    event with the max score, and the last element is the maxScore."""
+
+    #Example: BSFHMap = {(mapping node): [['event', (p, h), (p, h), score], 
+    #                                                               maxScore]}
+    #Example: BSFHEvent = {(event node): max}
+
+    BSFHMap = {}
+    BSFHEvent = {}
+    ParasiteRoot = Greedy.findRoot(ParasiteTree)
+    orderedKeysL = oldPostorderDTLsort(DTL, ParasiteRoot)   
+    for key in orderedKeysL:
+        mapNode = key[0]
+        #check if the key is a tip:
+        if DTL[mapNode][0][0] == 'C':              
+            BSFHMap[mapNode] = [DTL[mapNode][0], DTL[mapNode][0][-1]]
+        #if the key isn't a tip:
+        else: 
+            #initialize counter                                    
+            maxScore = float("-inf")  
+            #initialize variable to keep track of where max came from
+            maxEvent = [] 
+            #iterate through the events associated with the key node
+            for i in range(len(DTL[mapNode]) - 1):  
+                event = tuple(DTL[mapNode][i])
+                BSFHEvent[event] = event[-1]
+                if event[1] != (None, None):
+                    BSFHEvent[event] = BSFHEvent[event]+BSFHMap[event[1]][-1]
+                if event[2] != (None, None):
+                    BSFHEvent[event] = BSFHEvent[event]+BSFHMap[event[2]][-1]
+                #check if current event has a higher score than current max
+                if BSFHEvent[event] > maxScore:  
+                    maxScore = BSFHEvent[event]  #set new max score
+                    maxEvent = list(event)   #record where new max came from
+            BSFHMap[mapNode] = [maxEvent, maxScore]  #set BSFH value of key
+    return BSFHMap
+
+
+def oldTraceChildren(DTL, GreedyOnce, BSFHMap, key):
+    """This function takes as input a DTL graph, a dictionary GreedyOnce, 
+    containing the root of an optimal reconciliation, a BSFHMap dicitonary, 
+    and a current key, and returns the optimal reconciliation and new DTL 
+    graph, where the scores of the events in the reconciliation are reset to
+    0."""
+
+    resetDTL = {} #the new DTL graph
+    reset1DTL = {} #this DTL graph deals with the recursive call on the child1
+    reset2DTL = {} #this DTL graph deals with the recursive call on the child2
+    child1 = GreedyOnce[key][1]
+    child2 = GreedyOnce[key][2]
+    if child1 != (None, None):
+        GreedyOnce[child1] = BSFHMap[child1][0][0:3] #add event to greedyOnce
+        #this loop resets all the scores of events that have been used to 0 
+        for i in range(len(DTL[child1]) - 1):       
+            if DTL[child1][i] == BSFHMap[child1][0]:
+                newValue = DTL[child1]
+                newValue[i][-1] = 0
+                reset1DTL[child1] = newValue
+        #this recursive call updates GreedyOnce and the DTL graph
+        newGreedyOnce, DTL1 = oldTraceChildren(DTL, GreedyOnce, BSFHMap, child1) 
+        reset1DTL.update(DTL1) 
+        GreedyOnce.update(newGreedyOnce)
+    if child2 != (None, None):
+        GreedyOnce[child2] = BSFHMap[child2][0][0:3]
+        for i in range(len(DTL[child2]) - 1): 
+            if DTL[child2][i] == BSFHMap[child2][0]:
+                newValue = DTL[child2]
+                newValue[i][-1] = 0
+                reset2DTL[child2] = newValue      
+        newGreedyOnce, DTL2 = oldTraceChildren(DTL, GreedyOnce, BSFHMap, child2)
+        reset2DTL.update(DTL2)
+        GreedyOnce.update(newGreedyOnce)
+    resetDTL.update(reset1DTL)
+    resetDTL.update(reset2DTL)
+    return GreedyOnce, resetDTL
+
+
+def oldGreedyOnce(DTL, ParasiteTree):
+    """This function takes the DTL graph and the ParasiteTree as inputs, and 
+    calls bookkeeping to find the dictionary BSFHMap. It returns the 
+    reconciliation with the highest score in a dictionary called GreedyOnce, 
+    and also resets to 0 the scores of the mapping nodes in the optimal 
+    reconciliation. The returned dictionary will have keys which are the 
+    mapping nodes in the optimal reconciliation, and values of the form 
+    (event, child1, child2)."""
+
+    BSFHMap = oldBookkeeping(DTL, ParasiteTree)
+    ParasiteRoot = Greedy.findRoot(ParasiteTree)
+    GreedyOnce = {}            #initialize dictionary we will return
+    bestKey = ()       #variable to hold the key with the highers BSFH value
+    bestScore = float("-inf") #variable to hold the highest BSFH value so far
+    #iterate trough all the keys (verteces) in BSFHMap
+    for key in BSFHMap:   
+        #check if key has a score higher than bestScore and includes PRoot
+        if BSFHMap[key][-1] > bestScore and key[0] == ParasiteRoot: 
+            bestKey = key
+            bestScore = BSFHMap[key][-1]
+    #set value in GreedyOnce of the best key we found
+    GreedyOnce[bestKey] = BSFHMap[bestKey][0][0:3]                  
+    
+    #reset score of the mapping node we used to 0:
+
+    #loop through the events associated with DTL
+    for i in range(len(DTL[bestKey]) - 1):  
+        #check if the event matches the event that gave the best score                      
+        if DTL[bestKey][i] == BSFHMap[bestKey][0]:           
+            newEvent = DTL[bestKey][i][:-1] + [0]
+            newValue = DTL[bestKey][:i] + [newEvent] + DTL[bestKey][i + 1:]
+            DTL[bestKey] = newValue      #set the score to 0
+    newGreedyOnce, resetDTL = oldTraceChildren(DTL, GreedyOnce, BSFHMap, bestKey)
+    GreedyOnce.update(newGreedyOnce)
+    DTL.update(resetDTL)
+    return GreedyOnce, DTL, bestScore
+
+def oldGreedy(DTL, ParasiteTree):
+    """This function takes as input a DTL graph and a ParasiteTree, and 
+    returns TreeList, a list of dictionaries, each of which represent one of 
+    the optimal reconciliations. This function runs till all the scores have 
+    been collected from the DTL graph."""
+    scores = [] #list of reconciliation scores
+    currentDTL = DTL
+    counter = 0
+    rec = [] #list of reconciliations
+    collected = True
+    while collected:
+        #call greedyOnce if all the points have not been collected yet
+        oneTree, currentDTL, score = oldGreedyOnce(currentDTL, ParasiteTree)
+        scores.append(score) 
+        rec.append(oneTree)
+        collected = False #set not0 to False
+        zeroes = 0
+        events = 0
+        #iterate to see if more points need to be collected
+        for key in currentDTL:
+            for i in range(len(currentDTL[key])-1):
+                if currentDTL[key][i][-1] != 0:
+                    collected = True
+
+    return scores, rec
+def totalScore(DTL):
+    """Takes a DTL graph and returns the sum of the scores of its events"""
+    return sum(event[-1] for key in DTL for event in DTL[key][:-1])
+
+def coverages(DTL, scores):
+    """Takes a DTL graph and the scores of the reconciliations Greedy
+    collects from it, and returns the list of the coverages after each of
+    them"""
+    total = totalScore(DTL)
+    return [float(sum(scores[:n + 1])) / total for n in range(len(scores))]
+
+class GreedyTest(unittest.TestCase):
+
+    def testMaxReconciliations(self):
+        for message, parasiteTree, DTL in graphs():
+            scores, rec, coverage = Greedy.greedyCoverage(DTL, parasiteTree)
+            self.assertEqual(coverage, 1.0, message)
+            fractions = coverages(DTL, scores)
+            for n in range(1, len(rec)):
+                limited = Greedy.greedyCoverage(DTL, parasiteTree, \
+                                                max_reconciliations=n)
+                self.assertEqual(limited, (scores[:n], rec[:n], \
+                                           fractions[n - 1]), message)
+            self.assertEqual(Greedy.greedyCoverage(DTL, parasiteTree, \
+                max_reconciliations=len(rec) + 1), (scores, rec, 1.0), message)
+
+    def testMinCoverage(self):
+        for message, parasiteTree, DTL in graphs():
+            scores, rec, coverage = Greedy.greedyCoverage(DTL, parasiteTree)
+            fractions = coverages(DTL, scores)
+            for n in range(len(rec) - 1):
+                # the smallest coverage that stops after n + 1
+                # reconciliations, and one just above the coverage they have
+                for minCoverage in [fractions[n - 1] + 1e-9 if n else 0.0, \
+                                    fractions[n]]:
+                    limited = Greedy.greedyCoverage(DTL, parasiteTree, \
+                                                    min_coverage=minCoverage)
+                    self.assertEqual(limited, (scores[:n + 1], rec[:n + 1], \
+                                               fractions[n]), message)
+            self.assertEqual(Greedy.greedyCoverage(DTL, parasiteTree, \
+                min_coverage=1.0), (scores, rec, 1.0), message)
+            # with both limits, the first one reached stops Greedy
+            self.assertEqual(Greedy.greedyCoverage(DTL, parasiteTree, 1, \
+                1.0)[:2], (scores[:1], rec[:1]), message)
+
+    def testFullRescan(self):
+        for message, parasiteTree, DTL in graphs():
+            original = copy.deepcopy(DTL)
+            self.assertEqual(Greedy.Greedy(DTL, parasiteTree), \
+                             oldGreedy(copy.deepcopy(DTL), parasiteTree), \
+                             message)
+            self.assertEqual(DTL, original, message)
+
+    def testGraphUnchanged(self):
+        # MasterReconciliation.Reconcile passes the DTL graph Greedy ran on
+        # to ReconConversion, so Greedy must leave it as it was, with or
+        # without limits, and a second run on it must give the same result
+        for message, parasiteTree, DTL in graphs():
+            original = copy.deepcopy(DTL)
+            result = Greedy.Greedy(DTL, parasiteTree)
+            self.assertEqual(DTL, original, message)
+            Greedy.Greedy(DTL, parasiteTree, 1)
+            Greedy.Greedy(DTL, parasiteTree, min_coverage=0.5)
+            self.assertEqual(DTL, original, message)
+            self.assertEqual(Greedy.Greedy(DTL, parasiteTree), result, \
+                             message)
+
+    def testGreedyOnce(self):
+        for message, parasiteTree, DTL in graphs():
+            original = copy.deepcopy(DTL)
+            oneTree, newDTL, score = Greedy.greedyOnce(DTL, parasiteTree)
+            oldTree, oldDTL, oldScore = oldGreedyOnce(copy.deepcopy(DTL), \
+                                                      parasiteTree)
+            self.assertEqual((oneTree, score), (oldTree, oldScore), message)
+            self.assertTrue(newDTL is DTL, message)
+            self.assertEqual(DTL, original, message)
+
+if __name__ == "__main__":
+    unittest.main()
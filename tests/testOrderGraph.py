@@ -0,0 +1,78 @@
+# testOrderGraph.py
+
+# Checks that orderGraph.date_many gives the same orders as orderGraph.date on
+# the cycle checking graph of each reconciliation, for the reconciliations
+# Greedy returns and for random reconciliations of the DTL graphs of the
+# trees of testFiles at several event costs.  Run it from the repository
+# directory with "python -m unittest discover tests".
+
+# python libraries
+import glob
+import os
+import random
+import sys
+import unittest
+
+# DP libraries
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import DP
+import Greedy
+import RandomGenerator
+import cycleCheckingGraph
+import newickFormatReader
+import orderGraph
+
+# (D, T, L) event costs to test
+COSTS = [(2, 3, 1), (1, 1, 1), (1, 4, 2)]
+
+# Number of random reconciliations to test for each tree and event costs
+SAMPLES = 20
+
+def testFiles():
+    """Returns the names of the newick files of testFiles other than
+    COG0020, sorted"""
+    fileNames = glob.glob(os.path.join(ROOT, "testFiles", "*.newick"))
+    return sorted(fileName for fileName in fileNames \
+                  if os.path.basename(fileName) != "COG0020.newick")
+
+def reconciliations(DTL, parasiteTree):
+    """Takes a DTL graph and a parasite tree and returns the reconciliations
+    Greedy finds in the graph followed by SAMPLES uniformly random
+    reconciliations of it, without their scores"""
+    recs = Greedy.Greedy(DTL, parasiteTree)[1]
+    rootList = RandomGenerator.rootGenerator(DTL, parasiteTree)
+    for n in range(SAMPLES):
+        recon = RandomGenerator.uniformRecon(DTL, [random.choice(rootList)], {})
+        recs.append(dict((key, recon[key][:-1]) for key in recon))
+    return recs
+
+class OrderGraphTest(unittest.TestCase):
+
+    def testDateMany(self):
+        random.seed(0)
+        ordered = timeTravel = 0
+        for fileName in testFiles():
+            name = os.path.basename(fileName)
+            hostTree, parasiteTree, phi = newickFormatReader.getInput(fileName)
+            skeleton = cycleCheckingGraph.TemporalSkeleton(hostTree, \
+                                                           parasiteTree)
+            for D, T, L in COSTS:
+                message = "%s at %s" % (name, (D, T, L))
+                DTL, numRecon = DP.DP(hostTree, parasiteTree, phi, D, T, L)
+                recs = reconciliations(DTL, parasiteTree)
+                orders = [orderGraph.date(skeleton.build(recon)[0]) \
+                          for recon in recs]
+                self.assertEqual(orderGraph.date_many(hostTree, parasiteTree, \
+                                                      recs, skeleton), \
+                                 orders, message)
+                self.assertEqual(orderGraph.date_many(hostTree, parasiteTree, \
+                                                      recs), \
+                                 orders, message)
+                timeTravel += orders.count("timeTravel")
+                ordered += len(orders) - orders.count("timeTravel")
+        # both acyclic and cyclic graphs are dated
+        self.assertTrue(ordered > 0 and timeTravel > 0)
+
+if __name__ == "__main__":
+    unittest.main()
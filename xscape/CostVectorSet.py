@@ -0,0 +1,171 @@
+# CostVectorSet.py
+
+# CostVectorSet class
+
+# A CostVectorSet is a list of cost vectors in CDSL format, stored as one
+# NumPy integer array per event type and one array of counts, so that the
+# Pareto dynamic program in reconcile.py can combine whole lists of cost
+# vectors with array operations instead of building one CostVector object
+# per pair of solutions.  The counts are kept as Python integers (an array
+# of dtype object), since the number of solutions can exceed what fits in a
+# machine integer.  Infeasible solutions, which are CostVectors with INF
+# entries elsewhere, are not stored at all, so a set with no vectors stands
+# for the [CostVector(INF, INF, INF, INF, 0)] list.
+
+# python libraries
+import numpy as np
+
+# xscape libraries
+from common import *
+from CostVector import *
+
+class CostVectorSet:
+    def __init__(self, c, d, s, l, count):
+        self.c = c
+        self.d = d
+        self.s = s
+        self.l = l
+        self.count = count
+
+    def __len__(self):
+        return len(self.count)
+
+    def shift(self, c, d, s, l):
+        ''' Returns the set of the vectors of this set with <c, d, s, l>
+            added to each of them, as CostVector(c, d, s, l, 1) * CVlist
+            does. '''
+        return CostVectorSet(self.c + c, self.d + d, self.s + s, \
+                             self.l + l, self.count)
+
+    def merge(self, other):
+        ''' Returns the set of the sums of every vector of this set with
+            every vector of the other set, in the order of merge in
+            reconcile.py. '''
+        return CostVectorSet(np.add.outer(self.c, other.c).ravel(), \
+                             np.add.outer(self.d, other.d).ravel(), \
+                             np.add.outer(self.s, other.s).ravel(), \
+                             np.add.outer(self.l, other.l).ravel(), \
+                             np.multiply.outer(self.count, \
+                                               other.count).ravel())
+
+    def CVfilter(self, switchLo, switchHi, lossLo, lossHi):
+        ''' Returns the subset of the vectors that can be optimal in the
+            given cost range, as CVfilter in reconcile.py does. '''
+        if len(self) == 0: return self
+        LUB = (self.d + self.s * switchHi + self.l * lossHi).min()
+        keep = self.d + self.l * lossLo + self.s * switchLo <= LUB
+        return self.select(keep)
+
+    def coalesceDuplicates(self):
+        ''' Returns the set with duplicates removed and their counts added,
+            sorted in lexicographic order of d, s, and l. '''
+        if len(self) == 0: return self
+        order = np.lexsort((self.c, self.l, self.s, self.d))
+        c = self.c[order]
+        d = self.d[order]
+        s = self.s[order]
+        l = self.l[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (c[1:] != c[:-1]) | (d[1:] != d[:-1]) | \
+                    (s[1:] != s[:-1]) | (l[1:] != l[:-1])
+        starts = np.flatnonzero(first)
+        count = np.add.reduceat(self.count[order], starts)
+        return CostVectorSet(c[starts], d[starts], s[starts], l[starts], \
+                             count)
+
+    def paretoFilter(self, switchLo, switchHi, lossLo, lossHi):
+        ''' Returns the Pareto front of the set in the given range of switch
+            and loss costs, in lexicographic order, as paretoFilter in
+            reconcile.py does. '''
+        return self.CVfilter(switchLo, switchHi, lossLo, lossHi).\
+               paretoFront()
+
+    def paretoFront(self):
+        ''' Returns the vectors of the set that no other vector of the set
+            dominates, with duplicates coalesced, in lexicographic order.
+            Of the vectors with the same d, s, and l but different c, only
+            the one with the smallest c is kept, with its own count.
+            paretoFilter in reconcile.py keeps the first of them in the
+            order of a dictionary instead, which no array operation can
+            reproduce.  The two never differ in the dynamic program, where
+            every vector of a table is for the same parasite edge, and so
+            has c = (number of internal parasite nodes) - d - s. '''
+        unique = self.coalesceDuplicates()
+        if len(unique) <= 1: return unique
+        # Of the vectors with the same d and s only the first is kept
+        d = unique.d
+        s = unique.s
+        first = np.ones(len(unique), dtype=bool)
+        first[1:] = (d[1:] != d[:-1]) | (s[1:] != s[:-1])
+        # Sweep the vectors in lexicographic order as paretoFilter in
+        # reconcile.py does, with a Fenwick tree over the ranks of the
+        # switch counts giving the smallest loss count of the earlier
+        # vectors with at most a given number of switches.  Vectors with
+        # the same d, s, and l as the one before them are skipped.
+        switchCounts = np.unique(s)
+        ranks = (np.searchsorted(switchCounts, s) + 1).tolist()
+        losses = unique.l.tolist()
+        firsts = first.tolist()
+        minLoss = [None] * (len(switchCounts) + 1)
+        keep = []
+        for i in range(len(losses)):
+            if firsts[i]:
+                bestLoss = fenwickMin(minLoss, ranks[i])
+                if bestLoss is None or bestLoss > losses[i]:
+                    keep.append(i)
+            fenwickLower(minLoss, ranks[i], losses[i])
+        return unique.select(np.array(keep, dtype=int))
+
+    def select(self, index):
+        ''' Returns the set of the vectors picked by the given index array
+            (an array of positions or a boolean mask). '''
+        return CostVectorSet(self.c[index], self.d[index], self.s[index], \
+                             self.l[index], self.count[index])
+
+    def toCostVectors(self):
+        ''' Returns the list of CostVectors in the set, with the empty set
+            returned as [CostVector(INF, INF, INF, INF, 0)]. '''
+        if len(self) == 0:
+            return [CostVector(INF, INF, INF, INF, 0)]
+        return map(CostVector, self.c.tolist(), self.d.tolist(), \
+                   self.s.tolist(), self.l.tolist(), self.count.tolist())
+
+def fromCostVectors(CVlist):
+    ''' Returns the CostVectorSet of the given list of CostVectors, leaving
+        out those with INF entries. '''
+    CVlist = [cv for cv in CVlist if cv.d != INF]
+    return CostVectorSet(np.array([cv.c for cv in CVlist], dtype=int), \
+                         np.array([cv.d for cv in CVlist], dtype=int), \
+                         np.array([cv.s for cv in CVlist], dtype=int), \
+                         np.array([cv.l for cv in CVlist], dtype=int), \
+                         countArray([cv.count for cv in CVlist]))
+
+def single(c, d, s, l, count):
+    ''' Returns the CostVectorSet holding only <c, d, s, l> with the given
+        count. '''
+    return CostVectorSet(np.array([c]), np.array([d]), np.array([s]), \
+                         np.array([l]), countArray([count]))
+
+def empty():
+    ''' Returns the CostVectorSet with no vectors. '''
+    return CostVectorSet(np.zeros(0, dtype=int), np.zeros(0, dtype=int), \
+                         np.zeros(0, dtype=int), np.zeros(0, dtype=int), \
+                         countArray([]))
+
+def concatenate(CVsets):
+    ''' Returns the CostVectorSet of the vectors of all the given sets, in
+        order. '''
+    CVsets = list(CVsets)
+    if CVsets == []: return empty()
+    if len(CVsets) == 1: return CVsets[0]
+    return CostVectorSet(np.concatenate([cvs.c for cvs in CVsets]), \
+                         np.concatenate([cvs.d for cvs in CVsets]), \
+                         np.concatenate([cvs.s for cvs in CVsets]), \
+                         np.concatenate([cvs.l for cvs in CVsets]), \
+                         np.concatenate([cvs.count for cvs in CVsets]))
+
+def countArray(counts):
+    ''' Returns an array of dtype object holding the given counts. '''
+    output = np.empty(len(counts), dtype=object)
+    output[:] = counts
+    return output
@@ -40,3 +40,19 @@ def getBestCV(CVlist, x, y):
             bestCost = cost
     return bestIndex, bestCV, bestCost
 
+def fenwickMin(tree, rank):
+    ''' Returns the smallest value stored in the Fenwick tree at a rank of at
+        most the given rank, or None if there is none. '''
+    best = None
+    while rank > 0:
+        if tree[rank] is not None and (best is None or tree[rank] < best):
+            best = tree[rank]
+        rank -= rank & -rank
+    return best
+
+def fenwickLower(tree, rank, value):
+    ''' Stores the given value in the Fenwick tree at the given rank. '''
+    while rank < len(tree):
+        if tree[rank] is None or value < tree[rank]:
+            tree[rank] = value
+        rank += rank & -rank
@@ -1,92 +1,195 @@
 # commonAnalytic.py
 
-from shapely.geometry import *
 from CostVector import *
 import random
 
-def getRegions(CVlist, switchMin, switchMax, lossMin, lossMax,
-               restrict=True):
-    regions = {}
+# A cost vector cv costs cv.d + cv.l * x + cv.s * y at loss cost x and switch
+# cost y (relative to the duplication cost), so the region in which cv is
+# optimal is the cell of cv in the lower envelope of these planes over the
+# bounding box.  Each region is convex: it is the bounding box clipped by the
+# half-plane in which cv costs no more than cv2, for each other cost vector
+# cv2.  envelopeRegions does the clipping with plain floats, and getRegions
+# turns the regions into shapely geometries for the callers that draw and
+# measure them, so shapely is only needed for that last step.
 
-    # bounding box
+# Relative tolerance for deciding that a vertex is on a clipping line
+EPSILON = 1e-9
+
+def envelopeRegions(CVlist, switchMin, switchMax, lossMin, lossMax):
+    ''' Returns a dictionary with the string of each cost vector of CVlist as
+        key and the region of the bounding box in which it is optimal as
+        value.  A region is a list of (loss, switch) vertices: a polygon
+        listed clockwise, starting from its vertex with the smallest loss
+        and then smallest switch cost, a line segment (two vertices), a
+        single point, or an empty list. '''
+    regions = {}
+    # The cost vectors have integer entries, so the bounds are made floats
+    # to keep every value below out of integer division
+    switchMin, switchMax = float(switchMin), float(switchMax)
+    lossMin, lossMax = float(lossMin), float(lossMax)
     boundingbox = [(lossMin, switchMin), (lossMin, switchMax), \
                    (lossMax, switchMax), (lossMax, switchMin)]
-    bb = Polygon(boundingbox)
-
-    # find region for each event count vector
-    # Let x and y denote the loss and transfer costs (relative to duplication cost).
-    # A cost vector cv has cost = cv.d + cv.l * x + cv.s * y.
-    # For cv1 to be optimal, then for each cv2 (s.t. cv2 != cv1), it must be that
-    #     cv1.d + cv1.l * x + cv1.s * y <= cv2.d + cv2.l * x + cv2.s * y
-    # that is
-    #     y <= x * (cv2.l - cv1.l)/(cv1.s - cv2.s) + (cv2.d - cv1.d)/(cv1.s - cv2.s)
+    maxLoss = max(abs(lossMin), abs(lossMax))
+    maxSwitch = max(abs(switchMin), abs(switchMax))
+    tolerance = EPSILON * max(maxLoss, maxSwitch, 1.0)
     for cv1 in CVlist:
-        region = bb
+        region = boundingbox
         for cv2 in CVlist:
             if cv2 == cv1:
                 continue    # skip comparison
+            # cv1 costs no more than cv2 where a + b * x + c * y >= 0
+            a = cv2.d - cv1.d
+            b = cv2.l - cv1.l
+            c = cv2.s - cv1.s
+            scale = abs(a) + abs(b) * maxLoss + abs(c) * maxSwitch
+            region = clipRegion(region, a, b, c, EPSILON * scale, tolerance)
+            if region == []:
+                break
+        regions[str(cv1)] = normalizeRegion(region, tolerance)
+    return regions
 
-            if cv1.s == cv2.s:  # vertical line defines the half-space
-                xint = 1.0*(cv2.d - cv1.d)/(cv1.l - cv2.l)  # x-intercept
-                
-                # the variable "below" is True iff half-space is to left of line
-                below = cv1.l - cv2.l > 0
-                
-                # test if half-space is to left or right of the line
-                if below:      # below
-                    lowestx = min(xint, lossMin)
-                    poly = [(xint, switchMin), (xint, switchMax),
-                            (lowestx, switchMax), (lowestx, switchMin)]
-                else:          # above
-                    highestx = max(xint, lossMax)
-                    poly = [(xint, switchMin), (xint, switchMax),
-                            (highestx, switchMax), (highestx, switchMin)]    
+def clipRegion(region, a, b, c, epsilon, tolerance):
+    ''' Returns the part of the convex region (a list of vertices, as in
+        envelopeRegions) in which a + b * x + c * y >= 0.  Vertices within
+        epsilon of the line a + b * x + c * y = 0 are taken to be on it,
+        and repeated vertices (closer than tolerance) are dropped. '''
+    values = [a + b * x + c * y for (x, y) in region]
+    if min(values) >= -epsilon:
+        return region
+    if max(values) < -epsilon:
+        return []
+    output = []
+    n = len(region)
+    for i in range(n):
+        (x1, y1), value1 = region[i], values[i]
+        (x2, y2), value2 = region[(i + 1) % n], values[(i + 1) % n]
+        if value1 >= -epsilon:
+            addVertex(output, (x1, y1), tolerance)
+        if (value1 > epsilon and value2 < -epsilon) or \
+           (value1 < -epsilon and value2 > epsilon):
+            # Solve for the crossing directly on the sides of the bounding
+            # box, which is where most of the vertices are
+            if x1 == x2:
+                crossing = (x1, -(a + b * x1) / float(c))
+            elif y1 == y2:
+                crossing = (-(a + c * y1) / float(b), y1)
             else:
-                m = 1.0*(cv2.l - cv1.l)/(cv1.s - cv2.s)  # slope
-                b = 1.0*(cv2.d - cv1.d)/(cv1.s - cv2.s)  # y-intercept
-                
-                # the variable "below" is True iff half-space is below line
-                below = cv1.s - cv2.s > 0
-                
-                if m == 0:      # horizontal line defines the half-space
-                    # test if half-space is below or above the line
-                    if below:  # below
-                        lowesty = min(b, switchMin)
-                        poly = [(lossMin, b), (lossMax, b),
-                                (lossMax, lowesty), (lossMin, lowesty)]
-                    else:      # above
-                        highesty = max(b, switchMax)
-                        poly = [(lossMin, b), (lossMax, b),
-                                (lossMax, highesty), (lossMin, highesty)]
-                else:           # "slanted" line defines the half-space
-                    # y-coord of intersection with left/right edge of boundingbox 
-                    lefty = m * lossMin + b
-                    righty = m * lossMax + b
-                    
-                    # test if half-space is below or above the line
-                    if below:  # below
-                        lowesty = min(switchMin, lefty, righty)
-                        poly = [(lossMin, lefty), (lossMax, righty),
-                                (lossMax, lowesty), (lossMin, lowesty)]
-                    else:      # above
-                        highesty = max(switchMax, lefty, righty)
-                        poly = [(lossMin, lefty), (lossMax, righty),
-                                (lossMax, highesty), (lossMin, highesty)]
-                
-            # update region
-            P = Polygon(poly)
-            region = region.intersection(P)
-
-        # keep region?
-        keep = True
-        if restrict:
-            if (region.is_empty) or (not region.intersects(bb)):
-                keep = False
-            
-        # update dictionary
-        if keep:
-            regions[str(cv1)] = region
+                t = float(value1) / (value1 - value2)
+                crossing = (x1 + t * (x2 - x1), y1 + t * (y2 - y1))
+            addVertex(output, crossing, tolerance)
+    if len(output) > 1 and close(output[0], output[-1], tolerance):
+        output.pop()
+    return output
+
+def addVertex(vertices, vertex, tolerance):
+    ''' Appends the vertex to the list unless it repeats the last one. '''
+    if vertices == [] or not close(vertices[-1], vertex, tolerance):
+        vertices.append(vertex)
+
+def close(vertex1, vertex2, tolerance):
+    ''' Returns True if the two vertices are closer than tolerance in both
+        coordinates. '''
+    return abs(vertex1[0] - vertex2[0]) <= tolerance and \
+           abs(vertex1[1] - vertex2[1]) <= tolerance
 
+def normalizeRegion(region, tolerance):
+    ''' Returns the region (as in envelopeRegions) as a line segment or point
+        if it has no area, and otherwise without collinear vertices, listed
+        clockwise from its smallest vertex. '''
+    vertices = sorted(region)
+    if len(vertices) > 2:
+        area = 0.0
+        for i in range(len(region)):
+            (x1, y1) = region[i - 1]
+            (x2, y2) = region[i]
+            area += x1 * y2 - x2 * y1
+        xs = [x for (x, y) in region]
+        ys = [y for (x, y) in region]
+        extent = max(max(xs) - min(xs), max(ys) - min(ys))
+        if abs(area) > tolerance * extent:
+            return polygonVertices(region, area, tolerance)
+    # The vertices are on a line, so its ends are the smallest and the
+    # largest of them
+    if vertices == [] or close(vertices[0], vertices[-1], tolerance):
+        return vertices[:1]
+    return [vertices[0], vertices[-1]]
+
+def polygonVertices(region, area, tolerance):
+    ''' Returns the vertices of the convex polygon region, with twice the
+        given signed area, listed clockwise from its smallest vertex and
+        without the vertices that lie on the line through their
+        neighbors. '''
+    vertices = []
+    for i in range(len(region)):
+        (x0, y0) = region[i - 1]
+        (x1, y1) = region[i]
+        (x2, y2) = region[(i + 1) % len(region)]
+        cross = (x1 - x0) * (y2 - y0) - (y1 - y0) * (x2 - x0)
+        length = max(abs(x2 - x0), abs(y2 - y0))
+        if abs(cross) > tolerance * length:
+            vertices.append((x1, y1))
+    if area > 0:    # counterclockwise
+        vertices.reverse()
+    first = vertices.index(min(vertices))
+    return vertices[first:] + vertices[:first]
+
+def regionCenter(region):
+    ''' Returns the center of the region (as in envelopeRegions), which is
+        the centroid of a polygon, the midpoint of a line segment, or the
+        point itself, or None for an empty region. '''
+    if len(region) == 0:
+        return None
+    elif len(region) == 1:
+        return region[0]
+    elif len(region) == 2:
+        (x1, y1), (x2, y2) = region
+        return ((x1 + x2) / 2.0, (y1 + y2) / 2.0)
+    area = 0.0
+    centerX = 0.0
+    centerY = 0.0
+    for i in range(len(region)):
+        (x1, y1) = region[i - 1]
+        (x2, y2) = region[i]
+        cross = x1 * y2 - x2 * y1
+        area += cross
+        centerX += (x1 + x2) * cross
+        centerY += (y1 + y2) * cross
+    return (centerX / (3 * area), centerY / (3 * area))
+
+def toGeometry(region):
+    ''' Returns the shapely geometry of the region (as in envelopeRegions):
+        a Polygon, LineString or Point, or an empty Polygon. '''
+    # shapely is only required to hand the regions on as geometries
+    from shapely.geometry import Point, LineString, Polygon
+    if len(region) == 0:
+        return Polygon()
+    elif len(region) == 1:
+        return Point(region[0])
+    elif len(region) == 2:
+        return LineString(region)
+    else:
+        return Polygon(region)
+
+def getRegions(CVlist, switchMin, switchMax, lossMin, lossMax,
+               restrict=True, geometry=True, degenerate=False):
+    ''' Returns a dictionary with the string of each cost vector of CVlist as
+        key and the shapely geometry of the region of the bounding box in
+        which it is optimal as value.  If restrict is True, cost vectors
+        whose region has no area are left out: those that are not optimal
+        anywhere in the bounding box, and unless degenerate is True, those
+        that are only optimal on a line segment or at a point, where other
+        regions or the bounding box meet.  If geometry is False, the regions
+        are left as lists of vertices (see envelopeRegions) and shapely is
+        not needed. '''
+    regions = {}
+    envelope = envelopeRegions(CVlist, switchMin, switchMax, lossMin, lossMax)
+    for cv in CVlist:
+        region = envelope[str(cv)]
+        if restrict and (region == [] or (len(region) < 3 and not degenerate)):
+            continue
+        if geometry:
+            region = toGeometry(region)
+        regions[str(cv)] = region
     return regions
 
 
@@ -19,6 +19,11 @@ def getInput2(list):
     lossLo=list[4]
     lossHi=list[5]
     log=list[6]
+    # Optional solver for the DP tables (see reconcile.SOLVERS)
+    if len(list) > 7:
+        solver = list[7]
+    else:
+        solver = "memo"
     output = str(outputFile(treeFile)) +"costscape.pdf"
     outtext= str(outputFile(treeFile)) + "costscape.txt"
     while True:
@@ -41,7 +46,7 @@ def getInput2(list):
     lossHi = float(lossHi)
 
     log = log == "True"
-    CVlist = reconcile.reconcile(parasiteTree, hostTree, phi, switchLo, switchHi, lossLo, lossHi)
+    CVlist = reconcile.reconcile(parasiteTree, hostTree, phi, switchLo, switchHi, lossLo, lossHi, solver)
 
     plotcosts.plotcosts(CVlist, switchLo, switchHi, lossLo, lossHi, output, outtext, log, False)
 
@@ -2,7 +2,6 @@
 # python libraries
 from collections import *
 from operator import itemgetter
-from shapely.geometry import *
 import csv
 
 # xscape libraries
@@ -29,7 +28,11 @@ def getInput2(list):
     lossLo=list[4]
     lossHi=list[5]
     UorI=list[6]
-    CONFIG.intersection = UorI == "I"
+    # Optional solver for the DP tables (see reconcile.SOLVERS)
+    if len(list) > 7:
+        solver = list[7]
+    else:
+        solver = "memo"
     outfile = str(outputFile(treeFile)) +".csv"
     while True:
         fileName = treeFile
@@ -47,84 +50,125 @@ def getInput2(list):
     lossLo = float(lossLo)
     lossHi = float(lossHi)
 
-    preCVlist = reconcile.reconcile(parasiteTree, hostTree, phi, switchLo, switchHi, lossLo, lossHi)
+    preCVlist = reconcile.reconcile(parasiteTree, hostTree, phi, switchLo, switchHi, lossLo, lossHi, solver)
+
+    # The regions are found once and used both to pick the candidates and to
+    # restrict the output to the optimal cost vectors.  They are keyed by the
+    # (d, s, l) costs, since the cost vectors that reconciler finds can have
+    # other counts than those of preCVlist.
+    regions = costRegions(preCVlist, switchLo, switchHi, lossLo, lossHi)
+
+    reconciler = ParetoEventReconciler(parasiteTree, hostTree, phi, switchLo, \
+        switchHi, lossLo, lossHi, \
+        restrict(preCVlist, switchLo, switchHi, lossLo, lossHi, regions), \
+        UorI == "I", solver)
 
-    CandidateCVlist.extend(restrict(preCVlist, switchLo, switchHi, lossLo, lossHi))
+    CVlist = reconciler.reconcile()
 
-    CVlist = reconcileEvents(parasiteTree, hostTree, phi, switchLo, switchHi, lossLo, lossHi)
+    output(outfile, CVlist, hostTree, switchLo, switchHi, lossLo, lossHi, root=parasiteTree["pTop"][1], regions=regions, reconciler=reconciler)
 
-    output(outfile, CVlist, hostTree, lossLo, lossHi, switchLo, switchHi, root=parasiteTree["pTop"][1])
 
+def costRegions(CVlist, switchLo, switchHi, lossLo, lossHi):
+    ''' Returns a dictionary with the (d, s, l) costs of each cost vector of
+        CVlist that is optimal in a region of the bounding box as key and
+        its region (see getRegions) as value.  Unlike the string of a cost
+        vector, the key does not depend on its c or count, which is what
+        CostVector.__eq__ compares too. '''
+    regions = getRegions(CVlist, switchLo, switchHi, lossLo, lossHi,
+                         geometry=False)
+    output = {}
+    for cv in CVlist:
+        if str(cv) in regions:
+            output[(cv.d, cv.s, cv.l)] = regions[str(cv)]
+    return output
 
 def restrict(CVlist, switchLo, switchHi, lossLo, lossHi, regions=None):
+    ''' Returns the cost vectors of CVlist with a region in regions, as
+        found by costRegions (for CVlist if regions is None), without
+        repeating the same (d, s, l) costs. '''
     restrictedList = []
+    seen = set()    # the (d, s, l) of the cost vectors in restrictedList
 
     if regions is None:
-        regions = getRegions(CVlist, switchLo, switchHi, lossLo, lossHi)
+        regions = costRegions(CVlist, switchLo, switchHi, lossLo, lossHi)
     for cv in CVlist:
-        if str(cv) in regions:
-            if cv not in restrictedList:
-                restrictedList.append(cv)
+        costs = (cv.d, cv.s, cv.l)
+        if costs in regions and costs not in seen:
+            seen.add(costs)
+            restrictedList.append(cv)
 
     return restrictedList
 
 def output(outfile, CVlist, hostTree, switchMin, switchMax, lossMin, lossMax,
-           root="Root", regions=None):
-    intersection = CONFIG.intersection
-    if not intersection:
-        global CVallEvents
+           root="Root", regions=None, reconciler=None):
+    # The events come from the given ParetoEventReconciler, or from the last
+    # call to reconcileEvents if there is none
+    if reconciler is None:
+        intersection = CONFIG.intersection
+        unionEvents = CVallEvents
+        commonEvents = CVcommonEvents
+        eventList = Events
     else:
-        global CVcommonEvents
+        intersection = reconciler.intersection
+        unionEvents = reconciler.CVallEvents
+        commonEvents = reconciler.CVcommonEvents
+        eventList = reconciler.Events
 
     if regions is None:
-        regions = getRegions(CVlist, switchMin, switchMax, lossMin, lossMax)
+        regions = costRegions(CVlist, switchMin, switchMax, lossMin, lossMax)
 
-    ofile = open(outfile, "wb")
-    writer = csv.writer(ofile, delimiter = ",")
     optimalCVlist = restrict(CVlist, switchMin, switchMax, lossMin, lossMax,
                              regions=regions)
 
-    allEvents = set()  # set of all events in optimal solutions in the cost space
-    if not intersection:
-        allEventsThisCV = defaultdict(set)  # set of all events in this Pareto CV
+    # The rows are written as they are found, in one pass over the optimal
+    # cost vectors that also counts the regions each event number is in.
+    # The sets of events are bitsets (see ParetoEventReconciler), which are
+    # only decoded into events to display them.
+    regionCounts = defaultdict(int)
+    displayed = {}      # display version of each event number
+    ofile = open(outfile, "wb")
+    writer = csv.writer(ofile, delimiter = ",")
     for cv in optimalCVlist:
         outputRow = [cv]
         thisCV = cv.toTupleCDSL()
 
         if not intersection:
+            eventsThisCV = 0    # set of all events in this Pareto CV
             for eh in hostTree:
                 key = ("pTop", eh) + thisCV
-                events = CVallEvents[key]
-                allEventsThisCV[thisCV] |= events
-                allEvents |= events
-                for event in events:
-                    outputRow.append(displayVersion(event, root))
+                events = unionEvents[key]
+                eventsThisCV |= events
+                outputRow.extend(displayEvents(eventNumbers(events), \
+                                               eventList, root, displayed))
         else:
-            events = CVcommonEvents[thisCV]
-            allEvents |= events
-            for event in events:
-                outputRow.append(displayVersion(event, root))
+            eventsThisCV = commonEvents[thisCV]
+            outputRow.extend(displayEvents(eventNumbers(eventsThisCV), \
+                                           eventList, root, displayed))
 
         writer.writerow(outputRow)
+        for i in eventNumbers(eventsThisCV):
+            regionCounts[i] += 1
 
-    eventsWithCounts = []
-    if not intersection:
-        eventsDict = allEventsThisCV
-    else:
-        eventsDict = CVcommonEvents
-    for event in allEvents:
-        eventcount = 0
-        for bestCV in optimalCVlist:
-            if event in eventsDict[bestCV.toTupleCDSL()]:
-                eventcount += 1
-        eventsWithCounts.append((event, eventcount))
-    eventsWithCounts.sort(key = itemgetter(1), reverse = True)
+    eventsByCount = defaultdict(list)
+    for i in sorted(regionCounts):
+        eventsByCount[regionCounts[i]].append(i)
     maxCounts = len(optimalCVlist)
     for count in range(maxCounts, 0, -1):
         row = ["Events in " + str(count) + " regions"]
-        row.extend([displayVersion(event[0], root) for event in eventsWithCounts \
-                    if event[1] == count])
+        row.extend(displayEvents(eventsByCount[count], eventList, root, \
+                                 displayed))
         writer.writerow(row)
+    ofile.close()
+
+def displayEvents(numbers, eventList, root, displayed):
+    ''' Returns the display versions of the events with the given numbers,
+        looking them up in, or adding them to, the displayed dictionary. '''
+    output = []
+    for i in numbers:
+        if i not in displayed:
+            displayed[i] = displayVersion(eventList[i], root)
+        output.append(displayed[i])
+    return output
 
 def displayVersion(event, root="Root", sep=" "):
     if event[0] == "pTop": parasiteNode = root
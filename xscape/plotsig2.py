@@ -4,11 +4,13 @@ import random
 
 # matplotlib libraries
 import matplotlib.pyplot as plt
+import numpy as np
 
 # xscape libraries
 from common import *
 from CostVector import *
 import collections
+import math
 import os
 
 def plotsig(CVlist, randomTrialsCVlist,
@@ -25,36 +27,35 @@ def plotsig(CVlist, randomTrialsCVlist,
     plt.xlabel("Loss cost relative to duplication")
     plt.ylabel("Switch cost relative to duplication")
 
-    greenCounter = 0
-    yellowCounter = 0
-    redCounter = 0
-    totalSamples = 0
-
     # process
-    pts = collections.defaultdict(list)  # key = pColor
-    for x in frange(lossMin, lossMax, steps, log=log):
-        for y in frange(switchMin, switchMax, steps, log=log):
-            totalSamples += 1
-            junkIndex, junkCV, bestOriginal = getBestCV(CVlist, x, y)
-            counter = 0
-            for trialCVlist in randomTrialsCVlist:
-                junkIndex, junkCV, bestThisTrial = getBestCV(trialCVlist, x, y)
-                if bestOriginal <  bestThisTrial: counter += 1
-            pValue = 1.0 - 1.0 * counter / numTrials
-            if pValue < 0.01:
-                pColor = (0, 1, 0)       # Very significant = green
-                greenCounter += 1
-            elif 0.01 <= pValue < 0.05:
-                pColor = (1, 1, 0)       # Significant = yellow
-                yellowCounter += 1
-            else:
-                pColor = (1, 0, 0)       # Not significant = red
-                redCounter += 1
-            pts[pColor].append((x,y))
+    # The p-value at each point of the grid is the fraction of trials whose
+    # best cost there is not more than the best cost of CVlist.
+    xs = frange(lossMin, lossMax, steps, log=log)
+    ys = frange(switchMin, switchMax, steps, log=log)
+    counter = trialCounter(CVlist, randomTrialsCVlist, xs, ys)
+    pValue = 1.0 - 1.0 * counter / numTrials
+
+    green = pValue < 0.01               # Very significant = green
+    yellow = (0.01 <= pValue) & (pValue < 0.05)  # Significant = yellow
+    red = ~(green | yellow)             # Not significant = red
+    greenCounter = int(green.sum())
+    yellowCounter = int(yellow.sum())
+    redCounter = int(red.sum())
+    totalSamples = pValue.size
+
+    # The points of each color, with the colors in the order in which they
+    # first come up in the grid (x major, y minor)
+    X, Y = np.meshgrid(xs, ys, indexing="ij")
+    colors = [((0, 1, 0), green), ((1, 1, 0), yellow), ((1, 0, 0), red)]
+    colors = [(np.argmax(mask), pColor, mask) for (pColor, mask) in colors \
+              if mask.any()]
+    colors.sort()
+    pts = {}
+    for junkIndex, pColor, mask in colors:
+        pts[pColor] = (X[mask], Y[mask])
 
     # plot
-    for pColor, p in pts.iteritems():
-        x, y = zip(*p)
+    for pColor, (x, y) in pts.iteritems():
         plt.plot(x, y, "o", color=pColor)
 
     # statistics
@@ -73,4 +74,98 @@ def plotsig(CVlist, randomTrialsCVlist,
     if outfile != "":
         plt.savefig(outfile, format="pdf")
     if display:
-        plt.show()
\ No newline at end of file
+        plt.show()
+
+def trialCounter(CVlist, randomTrialsCVlist, xs, ys):
+    ''' Takes the CostVector list of the original tip mapping, the list of
+        CostVector lists of the trials, a list xs of loss costs and a list ys
+        of switch costs, and returns the array of the number of trials whose
+        best cost is more than the best cost of CVlist at each loss cost
+        (row) and switch cost (column).  The best costs are found for the
+        whole grid at once, and only once for each distinct set of trial
+        cost vectors. '''
+    bestOriginal = bestCosts(costKey(CVlist), xs, ys)
+    trialCounts = collections.defaultdict(int)
+    for trialCVlist in randomTrialsCVlist:
+        trialCounts[costKey(trialCVlist)] += 1
+    counter = np.zeros((len(xs), len(ys)), dtype=int)
+    for key, count in trialCounts.iteritems():
+        bestThisTrial = bestCosts(key, xs, ys)
+        counter += count * (bestOriginal < bestThisTrial)
+    return counter
+
+def costKey(CVlist):
+    ''' Returns a tuple of the distinct (d, l, s) costs of the finite
+        CostVectors in CVlist, which is all that their best costs depend on.
+        Vectors with INF costs are left out, since getBestCV never picks
+        them. '''
+    return tuple(sorted(set([(cv.d, cv.l, cv.s) for cv in CVlist \
+                             if cv.d != INF])))
+
+def bestCosts(costs, xs, ys):
+    ''' Takes a tuple of (d, l, s) costs (as from costKey), a list xs of
+        loss costs and a list ys of switch costs, and returns the array of
+        the best cost at each loss cost (row) and switch cost (column), as
+        getBestCV computes it. '''
+    x = np.array(xs, dtype=float)[:, np.newaxis]
+    y = np.array(ys, dtype=float)[np.newaxis, :]
+    best = np.empty((len(xs), len(ys)))
+    best.fill(INF)
+    for d, l, s in costs:
+        np.minimum(best, d + l * x + s * y, best)
+    return best
+
+def colorsSettled(counter, numTrials, confidence, numLooks=1):
+    ''' Takes the array counter of the number of trials, out of numTrials,
+        whose best cost is more than the best cost of the original tip
+        mapping at each point (as in plotsig), and returns True if at every
+        point the exact (Clopper-Pearson) binomial confidence interval for
+        the p-value lies within one of the color ranges of plotsig.  Each
+        interval holds at the given confidence level for its point over all
+        numLooks times the caller checks the same growing series of trials:
+        it is taken at confidence 1 - (1 - confidence) / numLooks, a
+        Bonferroni correction over the looks only, so that the number of
+        points of the grid does not put off the stop.  A point with a
+        p-value below 0.01 cannot be settled before
+        minSettledTrials(confidence, numLooks) trials, and a point whose
+        p-value is at 0.01 or 0.05 is never settled. '''
+    alpha = (1.0 - confidence) / numLooks
+    # The number of trials whose best cost is at most the original one at
+    # each point, whose fraction of the trials is the p-value
+    below = numTrials - np.asarray(counter)
+    # The upper end of the interval is less than p exactly when at most
+    # below trials would be that cheap with probability less than alpha / 2
+    # if p were the p-value, and the lower end is at least p exactly when at
+    # least below trials would be with probability at most alpha / 2
+    atMost01, atLeast01 = binomialTails(numTrials, 0.01)
+    atMost05, atLeast05 = binomialTails(numTrials, 0.05)
+    settled = (atMost01[below] < alpha / 2) | \
+              ((atLeast01[below] <= alpha / 2) & \
+               (atMost05[below] < alpha / 2)) | \
+              (atLeast05[below] <= alpha / 2)
+    return bool(settled.all())
+
+def binomialTails(n, p):
+    ''' Returns the arrays of the probabilities that a binomial variable
+        with n trials and success probability p is at most k and at least
+        k, for k from 0 to n.  Each tail is summed from its own end, so
+        that small tail probabilities keep their precision. '''
+    k = np.arange(1, n + 1)
+    logChoose = np.concatenate(([0.0], \
+                                np.cumsum(np.log(n - k + 1.0) - np.log(k))))
+    pmf = np.exp(logChoose + np.arange(n + 1) * math.log(p) + \
+                 (n - np.arange(n + 1)) * math.log(1 - p))
+    return np.cumsum(pmf), np.cumsum(pmf[::-1])[::-1]
+
+def minSettledTrials(confidence, numLooks=1):
+    ''' Returns the smallest number of trials at which colorsSettled can
+        settle a point with a p-value below 0.01.  The interval of a point
+        at which every trial costs more (p-value 0) is [0, u] with
+        (1 - u) ** numTrials = alpha / 2, for alpha = (1 - confidence) /
+        numLooks, which is below 0.01 once 0.99 ** numTrials < alpha / 2;
+        any other p-value needs more trials.  At confidence 0.99 this is 528
+        trials for one look, and 757 for 10 looks, 826 for 20 and 986 for
+        100.  A grid with no such point, whose p-values are all well above
+        0.05, can be settled at the first look. '''
+    alpha = (1.0 - confidence) / numLooks
+    return int(math.floor(math.log(alpha / 2) / math.log(0.99))) + 1
@@ -21,138 +21,300 @@ from collections import *
 # xscape libraries
 from common import *
 from CostVector import *
+import CostVectorSet
 
-# The three dictionaries below correspond to the A, C, and Best DP tables
-# described in the technical report.  These are set to None here but initialized
-# in the reconcile function.  They need to be reset before each run since
-# they change for each sigscape randomization trial.
+# The switchLo, switchHi, lossLo, and lossHi values are the user-specified
+# low and high ranges for the switch and loss costs, relative to the unit
+# cost of duplication.
+
+# The ways of filling the DP tables.  "memo" computes each entry when it is
+# first needed, by mutual recursion between the A, C, and switches methods,
+# which can reach Python's recursion limit for large trees.  "bottomup"
+# first fills the tables in postorder over the parasite and host edges, as
+# DP.py does.  Both give the same solutions.
+SOLVERS = ("memo", "bottomup")
+
+class ParetoProblem:
+    ''' The parts of the Pareto reconciliation of a parasite tree and host
+        tree over a range of switch and loss costs that do not depend on the
+        tip mapping: the parents and Euler tour intervals of the host edges,
+        the postorders of both trees, and the tables of the parasite tip
+        edges for each host tip they can be mapped to.  The withPhi method
+        returns the ParetoReconciler for a tip mapping, which shares all of
+        these, so solving for many tip mappings, as sigscape does, only
+        fills in the tables of the internal parasite edges each time. '''
+
+    def __init__(self, parasiteTree, hostTree, switchLo, switchHi, \
+                 lossLo, lossHi, solver="memo"):
+        if solver not in SOLVERS:
+            raise ValueError("Unknown Pareto solver: " + str(solver))
+        self.solver = solver
+        self.parasiteTree = parasiteTree
+        self.hostTree = hostTree
+        self.switchLo = switchLo
+        self.switchHi = switchHi
+        self.lossLo = lossLo
+        self.lossHi = lossHi
+        # The parents of the host edges let the switches method find the
+        # valid landing sites for a switch from those of the parent edge,
+        # and the Euler tour intervals tell whether two host edges are
+        # comparable in constant time.
+        self.hostParent = parentEdges(hostTree)
+        self.intervals = eulerIntervals(hostTree)
+        self.hostOrder = postorder(hostTree)
+        self.parasiteOrder = postorder(parasiteTree)
+        self.parasiteTips = [ep for ep in self.parasiteOrder \
+                             if tipEdge(ep, parasiteTree)]
+        self.tipTables = None
+
+    def withPhi(self, phi):
+        ''' Returns the ParetoReconciler for the tip mapping phi, with the
+            tables of the parasite tip edges already filled in. '''
+        reconciler = ParetoReconciler(self.parasiteTree, self.hostTree, phi, \
+                                      self.switchLo, self.switchHi, \
+                                      self.lossLo, self.lossHi, self.solver, \
+                                      self)
+        if self.tipTables is None:
+            self.tipTables = self.fillTipTables()
+        Ctips, Otips, Besttips = self.tipTables
+        for ep in self.parasiteTips:
+            hostTip = phi[endVertex(ep, self.parasiteTree)]
+            for eh in self.hostOrder:
+                reconciler.Cmemo[(ep, eh)] = Ctips[(hostTip, eh)]
+                reconciler.Omemo[(ep, eh)] = Otips[(hostTip, eh)]
+                reconciler.Bestmemo[(ep, eh)] = Besttips[(hostTip, eh)]
+        return reconciler
+
+    def fillTipTables(self):
+        ''' Returns the C, O and Best tables of a parasite tip edge mapped to
+            each host tip, as dictionaries keyed by the host tip and the host
+            edge.  They are the tables of a parasite tree made of one tip
+            edge per host tip, each mapped to the host tip of the same name,
+            filled in by the bottom up solver. '''
+        hostTips = [endVertex(eh, self.hostTree) for eh in self.hostOrder \
+                    if tipEdge(eh, self.hostTree)]
+        tipTree = {}
+        for hostTip in hostTips:
+            tipTree[hostTip] = (None, hostTip, None, None)
+        tipReconciler = ParetoReconciler(tipTree, self.hostTree, \
+                                         dict(zip(hostTips, hostTips)), \
+                                         self.switchLo, self.switchHi, \
+                                         self.lossLo, self.lossHi, \
+                                         "bottomup")
+        tipReconciler.fillTables()
+        Ctips = {}
+        Otips = {}
+        Besttips = {}
+        for hostTip in hostTips:
+            for eh in self.hostOrder:
+                Ctips[(hostTip, eh)] = tipReconciler.C(hostTip, eh)
+                Otips[(hostTip, eh)] = tipReconciler.O(hostTip, eh)
+                Besttips[(hostTip, eh)] = tipReconciler.switches(hostTip, eh)
+        return Ctips, Otips, Besttips
+
+class ParetoReconciler:
+    ''' The Pareto reconciliation dynamic program for one parasite tree, host
+        tree, tip mapping and range of switch and loss costs.  Each instance
+        owns its A, C, O, and Best tables (described in the technical
+        report) and shares the rest of its ParetoProblem, which is made for
+        it unless one is given, so independent instances can be used at the
+        same time, for example in separate threads or processes, and the
+        tables are freed along with the instance. '''
+
+    def __init__(self, parasiteTree, hostTree, phi, switchLo, switchHi, \
+                 lossLo, lossHi, solver="memo", problem=None):
+        if problem is None:
+            problem = ParetoProblem(parasiteTree, hostTree, switchLo, \
+                                    switchHi, lossLo, lossHi, solver)
+        self.solver = solver
+        self.parasiteTree = parasiteTree
+        self.hostTree = hostTree
+        self.phi = phi
+        self.switchLo = switchLo
+        self.switchHi = switchHi
+        self.lossLo = lossLo
+        self.lossHi = lossHi
+        self.Amemo = {}
+        self.Cmemo = {}
+        self.Omemo = {}
+        self.Bestmemo = {}
+        self.hostParent = problem.hostParent
+        self.intervals = problem.intervals
+        self.hostOrder = problem.hostOrder
+        self.parasiteOrder = problem.parasiteOrder
+
+    def reconcile(self):
+        ''' Returns the list of the Pareto optimal solutions over the
+            parasite tree rooted at every possible edge of the host tree. '''
+        if self.solver == "bottomup":
+            self.fillTables()
+        solutions = CostVectorSet.concatenate([self.C("pTop", eh) \
+                                               for eh in self.hostTree])
+        return self.paretoFilterSet(solutions).toCostVectors()
+
+    def fillTables(self):
+        ''' Fills the A and C tables for every parasite edge in postorder
+            and, for each of them, every host edge in postorder, followed by
+            the O and Best tables of the parasite edge (see fillSwitches).
+            Every entry then only depends on entries that are already in the
+            tables, so the methods never recurse more than one level, however
+            deep the trees are. '''
+        for ep in self.parasiteOrder:
+            for eh in self.hostOrder:
+                self.C(ep, eh)
+            self.fillSwitches(ep, self.hostOrder)
+
+    def fillSwitches(self, ep, hostOrder):
+        ''' Fills the O table of ep for the host edges in the given postorder
+            and then its Best table in the reverse order, from the root of
+            the host tree down. '''
+        for eh in hostOrder:
+            self.O(ep, eh)
+        for eh in reversed(hostOrder):
+            self.switches(ep, eh)
+
+    # The A, C, and switches methods return CostVectorSets, which are only
+    # turned into lists of CostVectors by reconcile.
+
+    def A(self, ep, eh):
+        ''' The A table for the dynamic program. '''
+        if (ep, eh) in self.Amemo: return self.Amemo[(ep, eh)]
+
+        parasiteTree = self.parasiteTree
+        hostTree = self.hostTree
+        if tipEdge(eh, hostTree):
+            if tipEdge(ep, parasiteTree) and \
+               self.phi[endVertex(ep, parasiteTree)] == endVertex(eh, hostTree):
+                return CostVectorSet.single(0, 0, 0, 0, 1)
+            else:
+                return CostVectorSet.empty()
+        else:
+            ehLeftChild = leftChildEdge(eh, hostTree)
+            ehRightChild = rightChildEdge(eh, hostTree)
 
-Amemo = None
-Cmemo = None
-Bestmemo = None
+            # Cospeciation
+            if tipEdge(ep, parasiteTree):
+                cospeciation = []
+            else:
+                epLeftChild = leftChildEdge(ep, parasiteTree)
+                epRightChild = rightChildEdge(ep, parasiteTree)
 
-# The Ancestors and Descendants dictionaries are precomputed in the reconcile
-# function and allow the switch function to determine the valid landing sites
-# for a switch. 
+                cospeciation1 = self.C(epLeftChild, ehLeftChild).\
+                                merge(self.C(epRightChild, ehRightChild)).\
+                                shift(1, 0, 0, 0)
 
-Ancestors = None
-Descendants = None
+                cospeciation2 = self.C(epLeftChild, ehRightChild).\
+                                merge(self.C(epRightChild, ehLeftChild)).\
+                                shift(1, 0, 0, 0)
 
-# The switchLo, switchHi, lossLo, and lossHi values are the user-specified
-# low and high ranges for the switch and loss costs, relative to the unit
-# cost of duplication.  They are shown here only for clarity.  
+                cospeciation = [cospeciation1, cospeciation2]
 
-switchLo = None
-switchHi = None
-lossLo = None
-lossHi = None
+            # Loss
+            loss1 = self.C(ep, ehLeftChild).shift(0, 0, 0, 1)
 
-# This is the main function for this file.  It seeks to find the best
-# reconciliation for the parasite tree, rooted at every possible edge of the
-# host tree.
-def reconcile(parasiteTree, hostTree, phi, smin, smax, lmin, lmax):
-    ''' Takes dictionary representations of the parasite tree, host tree
-        and phi as input and returns a list of the Pareto optimal solutions. '''
-            
-    global switchLo, switchHi, lossLo, lossHi
-    global Amemo, Cmemo, Bestmemo
-    global Ancestors, Descendants
-    Amemo = {}; Cmemo = {}; Bestmemo = {}  # These need to be reset on each run
-    Ancestors = {}; Descendants = {}
-    
-    switchLo = smin; switchHi = smax; lossLo = lmin; lossHi = lmax
-    
-    ancestorsAndDescendants(hostTree) # Set the Ancestors and Descendants
-        
-    solutions = []
-    for eh in hostTree:
-        solutions.extend(C(parasiteTree, hostTree, phi, "pTop", eh))
-    return paretoFilter(solutions)
-
-def A(parasiteTree, hostTree, phi, ep, eh):
-    ''' The A table for the dynamic program. '''
-    
-    global Amemo
-    
-    if (ep, eh) in Amemo: return Amemo[(ep, eh)]
+            loss2 = self.C(ep, ehRightChild).shift(0, 0, 0, 1)
 
-    if tipEdge(eh, hostTree):
-        if tipEdge(ep, parasiteTree) and \
-           phi[endVertex(ep, parasiteTree)] == endVertex(eh, hostTree):
-            return [CostVector(0, 0, 0, 0, 1)]
-        else:
-            return [CostVector(INF, INF, INF, INF, 0)]
-    else:
-        ehLeftChild = leftChildEdge(eh, hostTree)
-        ehRightChild = rightChildEdge(eh, hostTree)
+            loss = [loss1, loss2]
+
+            output = self.paretoFilterSet(\
+                CostVectorSet.concatenate(cospeciation + loss))
+            self.Amemo[(ep, eh)] = output
+            return output
+
+    def C(self, ep, eh):
+        ''' The C table for the dynamic program. '''
+        if (ep, eh) in self.Cmemo: return self.Cmemo[(ep, eh)]
+
+        # Option 1:  Pass through
+        passThrough = self.A(ep, eh)
+
+        if tipEdge(ep, self.parasiteTree):   # The options below don't apply to tips
+            return passThrough
 
-        # Cospeciation
-        if tipEdge(ep, parasiteTree):
-            cospeciation = [CostVector(INF, INF, INF, INF, 0)]
         else:
-            epLeftChild = leftChildEdge(ep, parasiteTree)
-            epRightChild = rightChildEdge(ep, parasiteTree)
+            epLeftChild = leftChildEdge(ep, self.parasiteTree)
+            epRightChild = rightChildEdge(ep, self.parasiteTree)
 
-            cospeciation1 = CostVector(1, 0, 0, 0, 1) * \
-              merge(C(parasiteTree, hostTree, phi, epLeftChild, ehLeftChild), \
-                    C(parasiteTree, hostTree, phi, epRightChild, ehRightChild))
+            # Option 2:  Duplicate here
+            duplicate = self.C(epLeftChild, eh).\
+                        merge(self.C(epRightChild, eh)).shift(0, 1, 0, 0)
 
-            cospeciation2 = CostVector(1, 0, 0, 0, 1) * \
-              merge(C(parasiteTree, hostTree, phi, epLeftChild, ehRightChild), \
-                    C(parasiteTree, hostTree, phi, epRightChild, ehLeftChild)) \
+            # Option 3:  Switch here
 
-            cospeciation = cospeciation1 + cospeciation2
-            
-        # Loss
-        loss1 = CostVector(0, 0, 0, 1, 1) * \
-                C(parasiteTree, hostTree, phi, ep, ehLeftChild)
+            switch1 = self.C(epLeftChild, eh).\
+                      merge(self.switches(epRightChild, eh)).shift(0, 0, 1, 0)
 
-        loss2 = CostVector(0, 0, 0, 1, 1) * \
-                C(parasiteTree, hostTree, phi, ep, ehRightChild)
+            switch2 = self.C(epRightChild, eh).\
+                      merge(self.switches(epLeftChild, eh)).shift(0, 0, 1, 0)
 
-        loss = loss1 + loss2
-        
-        output = paretoFilter(cospeciation + loss) 
-        Amemo[(ep, eh)] = output
+        output = self.paretoFilterSet(CostVectorSet.concatenate(\
+            [passThrough, duplicate, switch1, switch2]))
+        self.Cmemo[(ep, eh)] = output
         return output
-        
-def C(parasiteTree, hostTree, phi, ep, eh):
-    ''' The C table for the dynamic program. '''
-    
-    global Cmemo
-    
-    if (ep, eh) in Cmemo: return Cmemo[(ep, eh)]
-    
-    # Option 1:  Pass through
-    passThrough = A(parasiteTree, hostTree, phi, ep, eh)
-    
-    if tipEdge(ep, parasiteTree):   # The options below don't apply to tips
-        return passThrough
 
-    else:
-        epLeftChild = leftChildEdge(ep, parasiteTree)
-        epRightChild = rightChildEdge(ep, parasiteTree)
-    
-        # Option 2:  Duplicate here
-        duplicate = CostVector(0, 1, 0, 0, 1) * \
-                    merge(C(parasiteTree, hostTree, phi, epLeftChild, eh), \
-                          C(parasiteTree, hostTree, phi, epRightChild, eh)) 
-    
-        # Option 3:  Switch here
+    def O(self, ep, eh):
+        ''' The O table for the dynamic program: the Pareto front of the
+            cost vectors of ep on eh and on every descendant of eh. '''
+        if (ep, eh) in self.Omemo: return self.Omemo[(ep, eh)]
+
+        if tipEdge(eh, self.hostTree):
+            output = self.C(ep, eh)
+        else:
+            output = CostVectorSet.concatenate(\
+                [self.C(ep, eh), \
+                 self.O(ep, leftChildEdge(eh, self.hostTree)), \
+                 self.O(ep, rightChildEdge(eh, self.hostTree))]).paretoFront()
+        self.Omemo[(ep, eh)] = output
+        return output
 
-        switch1 = CostVector(0, 0, 1, 0, 1) * \
-                  merge(C(parasiteTree, hostTree, phi, epLeftChild, eh), \
-                        switches(parasiteTree, hostTree, phi, epRightChild, eh))
+    def switches(self, ep, eh):
+        ''' Returns the Pareto front of the cost vectors in which the given
+            parasite edge ep switches from eh to any valid landing site, that
+            is any host edge which is neither eh nor one of its ancestors or
+            descendants.  The landing sites of eh are those of its parent
+            together with its sibling and the sibling's descendants, so the
+            fronts are found from the root of the host tree down, as
+            bestSwitch is in DP.py.  Only dominated vectors are dropped, not
+            those outside the cost range, so merging the front gives the same
+            Pareto optimal solutions as merging the cost vectors of every
+            landing site. '''
+        if (ep, eh) in self.Bestmemo: return self.Bestmemo[(ep, eh)]
+
+        parent = self.hostParent[eh]
+        if parent is None:
+            output = CostVectorSet.empty()
+        else:
+            sibling = leftChildEdge(parent, self.hostTree)
+            if sibling == eh:
+                sibling = rightChildEdge(parent, self.hostTree)
+            output = CostVectorSet.concatenate(\
+                [self.switches(ep, parent), \
+                 self.O(ep, sibling)]).paretoFront()
+        self.Bestmemo[(ep, eh)] = output
+        return output
 
-        switch2 = CostVector(0, 0, 1, 0, 1) * \
-                  merge(C(parasiteTree, hostTree, phi, epRightChild, eh), \
-                        switches(parasiteTree, hostTree, phi, epLeftChild, eh))
+    def paretoFilterSet(self, CVset):
+        ''' Returns the Pareto front for the given CostVectorSet in the cost
+            range of this reconciler. '''
+        return CVset.paretoFilter(self.switchLo, self.switchHi, \
+                                  self.lossLo, self.lossHi)
 
-        switch = switch1 + switch2
-        
-    output = paretoFilter(passThrough + duplicate + switch) 
-    Cmemo[(ep, eh)] = output
-    return output
+    def paretoFilter(self, CVlist):
+        ''' Returns the Pareto front for the given list of CostVectors in the
+            cost range of this reconciler. '''
+        return paretoFilter(CVlist, self.switchLo, self.switchHi, \
+                            self.lossLo, self.lossHi)
+
+# This is the main function for this file.  It seeks to find the best
+# reconciliation for the parasite tree, rooted at every possible edge of the
+# host tree.
+def reconcile(parasiteTree, hostTree, phi, smin, smax, lmin, lmax, \
+              solver="memo"):
+    ''' Takes dictionary representations of the parasite tree, host tree
+        and phi as input and returns a list of the Pareto optimal solutions.
+        The solver is one of SOLVERS. '''
+    return ParetoReconciler(parasiteTree, hostTree, phi, smin, smax, \
+                            lmin, lmax, solver).reconcile()
 
 def merge(CVlist1, CVlist2):
     ''' Given two lists of CostVectors, returns a new list of CostVectors, each
@@ -163,44 +325,50 @@ def merge(CVlist1, CVlist2):
             output.append(v+w)
     return output
 
-def switches(parasiteTree, hostTree, phi, ep, eh):
-    ''' Returns the list of all CostVectors in which the given parasite edge ep
-        switches to all possible host edges. '''
-        
-    global Bestmemo
-    global Ancestors, Descendants
-    
-    if (ep, eh) in Bestmemo: return Bestmemo[(ep, eh)]
-    output = []
-    for switchEdge in hostTree:     # for every possible host edge
-        if switchEdge != eh and switchEdge not in Ancestors[eh] and \
-           switchEdge not in Descendants[eh]:
-            output.extend(C(parasiteTree, hostTree, phi, ep, switchEdge))
-    Bestmemo[(ep, eh)] = output
-    return output
-
-def paretoFilter(CVlist):
-    ''' Returns the Pareto front for the given list of CostVectors. '''
-    CVlist = CVfilter(CVlist)
+def paretoFilter(CVlist, switchLo, switchHi, lossLo, lossHi):
+    ''' Returns the Pareto front for the given list of CostVectors in the given
+        range of switch and loss costs, in lexicographic order.  Duplicates
+        are coalesced as in coalesceDuplicates, and of the vectors with the
+        same d and s only the first in lexicographic order is kept. '''
+    CVlist = CVfilter(CVlist, switchLo, switchHi, lossLo, lossHi)
+    if CVlist == []: return []
     uniqueCVlist = coalesceDuplicates(CVlist)
-    uniqueCVlist.sort(CostVector.lex)
+    uniqueCVlist.sort(key=lexKey)
     if len(uniqueCVlist) == 1: return uniqueCVlist
-    lexlist = [uniqueCVlist[0]]
-    for i in range(1, len(uniqueCVlist)):
-        predecessor = uniqueCVlist[i-1]
-        current = uniqueCVlist[i]
-        if predecessor.d < current.d or predecessor.s < current.s:
-            lexlist.append(current)
+    # Sweep the vectors in lexicographic order.  Every vector that dominates
+    # v comes before it, so v is dominated exactly when one of the earlier
+    # vectors with a different (d, s, l) has s and l no larger than its own.
+    # minLoss is a Fenwick tree over the ranks of the switch counts that
+    # gives the smallest loss count of the earlier vectors with at most a
+    # given number of switches.
+    switchCounts = sorted(set([cv.s for cv in uniqueCVlist]))
+    switchRank = {}
+    for i, s in enumerate(switchCounts):
+        switchRank[s] = i + 1
+    minLoss = [None] * (len(switchCounts) + 1)
     output = []
-    for v in lexlist:
-        if minimal(v, CVlist): output.append(v)
-    return output        
+    i = 0
+    while i < len(uniqueCVlist):
+        v = uniqueCVlist[i]
+        rank = switchRank[v.s]
+        if i == 0 or uniqueCVlist[i-1].d < v.d or uniqueCVlist[i-1].s < v.s:
+            bestLoss = fenwickMin(minLoss, rank)
+            if bestLoss is None or bestLoss > v.l:
+                output.append(v)
+        # Skip the other vectors with the same d, s and l as v
+        i += 1
+        while i < len(uniqueCVlist) and uniqueCVlist[i] == v:
+            i += 1
+        fenwickLower(minLoss, rank, v.l)
+    return output
+
+def lexKey(cv):
+    ''' The key that sorts CostVectors in the order of CostVector.lex. '''
+    return (cv.d, cv.s, cv.l)
 
-def CVfilter(CVlist):
+def CVfilter(CVlist, switchLo, switchHi, lossLo, lossHi):
     ''' Filter the CVlist to a subset that removes those cost vectors that
         cannot be optimal in the given cost range. '''
-        
-    global switchLo, switchHi, lossLo, lossHi 
     
     if CVlist == []: return []
     else:
@@ -232,35 +400,66 @@ def coalesceDuplicates(CVlist):
 def tupleToCV(entry):
     return CostVector(entry[0], entry[1], entry[2], entry[3], entry[4])
 
-def minimal(v, CVlist):
-    ''' Returns True if v is a minimal element of the CostVector list. '''
-    for w in CVlist:
-        if w < v: return False
-    return True
-
-def descendants(edge, tree):
-    ''' returns the list of descendant edges of the given edge in the
-        given tree.'''
-    if tipEdge(edge, tree): return []
-    else: return [leftChildEdge(edge, tree), rightChildEdge(edge, tree)] + \
-                  descendants(leftChildEdge(edge, tree), tree) + \
-                  descendants(rightChildEdge(edge, tree), tree)
-                  
-def ancestorsAndDescendants(tree):
-    ''' Returns a two dictionaries D and A, where D[e] is the list
-        of descendant edges of e and A[e] is the list of ancestral edges
-        of e. '''
-    global Ancestors, Descendants
-    
-    # First, compute all the descendants
+def parentEdges(tree):
+    ''' Returns a dictionary with the parent edge of every edge of the given
+        tree, and None for the root edge. '''
+    parents = dict.fromkeys(tree)
     for e in tree:
-        Descendants[e] = descendants(e, tree)
-    # Next, compute ancestors 
-    for e in tree: Ancestors[e] = []  # initialize A dictionary      
+        if not tipEdge(e, tree):
+            parents[leftChildEdge(e, tree)] = e
+            parents[rightChildEdge(e, tree)] = e
+    return parents
+
+def eulerIntervals(tree):
+    ''' Returns a dictionary with a pair (enter, exit) for every edge of the
+        given tree, the times at which a depth first traversal of the tree
+        enters and leaves the edge.  The interval of an edge contains the
+        intervals of exactly its descendants. '''
+    intervals = {}
+    time = 0
+    for e in postorder(tree):
+        if tipEdge(e, tree):
+            intervals[e] = (time, time + 1)
+            time += 2
+        else:
+            # In postorder, the edges below e are exactly the ones numbered
+            # since its leftmost tip was entered
+            enter = intervals[leftChildEdge(e, tree)][0]
+            intervals[e] = (enter, time)
+            time += 1
+    return intervals
+
+def comparable(edge1, edge2, intervals):
+    ''' Returns True if the two edges are the same edge or one of them is a
+        descendant of the other, using the intervals from eulerIntervals. '''
+    enter1, exit1 = intervals[edge1]
+    enter2, exit2 = intervals[edge2]
+    return (enter1 <= enter2 and exit2 <= exit1) or \
+           (enter2 <= enter1 and exit1 <= exit2)
+
+def postorder(tree):
+    ''' Returns a list of the edges of the given tree in which every edge
+        comes after its child edges. '''
+    childEdges = set()
     for e in tree:
-        for d in Descendants[e]: # d descendant of e => e ancestor of d
-            Ancestors[d].append(e)
-        
+        if not tipEdge(e, tree):
+            childEdges.add(leftChildEdge(e, tree))
+            childEdges.add(rightChildEdge(e, tree))
+    order = []
+    for root in tree:
+        if root in childEdges: continue
+        # Iterative depth first traversal, so deep trees are no problem
+        stack = [(root, False)]
+        while stack:
+            e, childrenDone = stack.pop()
+            if childrenDone or tipEdge(e, tree):
+                order.append(e)
+            else:
+                stack.append((e, True))
+                stack.append((rightChildEdge(e, tree), False))
+                stack.append((leftChildEdge(e, tree), False))
+    return order
+
 def tipEdge(edge, tree):
     ''' returns True if the edge terminates at a tip  '''
     return leftChildEdge(edge, tree) == None  # This edge has no edge children
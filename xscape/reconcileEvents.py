@@ -15,363 +15,310 @@ import copy
 # xscape libraries
 from common import *
 from CostVector import *
+from reconcile import ParetoReconciler, paretoFilter, CVfilter, \
+     coalesceDuplicates, comparable, tipEdge, startVertex, endVertex, \
+     leftChildEdge, rightChildEdge
+
+# The CVevents, CVallEvents, CVcommonEvents and CVseen dictionaries and the
+# Events list below hold the events found by the last call to
+# reconcileEvents, and CandidateCVlist and CONFIG.intersection are its options
+# (see ParetoEventReconciler).  They are kept for code that uses the module as
+# a whole; ParetoEventReconciler keeps its own copies of all of them.
+CVevents = defaultdict(int)
+CVallEvents = defaultdict(int)
+Events = list()
+CandidateCVlist = list()
 
-# The three dictionaries below correspond to the A, C, and Best DP tables
-# described in the technical report.
+# looking at union OR intersection of events?
+class Config:     # to get around immutable globals
+    pass
+CONFIG = Config()
+CONFIG.intersection = False
+CVseen = defaultdict(bool) # Initially all values are False by default
+CVcommonEvents = defaultdict(int)
+
+class ParetoEventReconciler(ParetoReconciler):
+    ''' The Pareto reconciliation dynamic program of ParetoReconciler, which
+        also records the events in the solutions it finds.
+
+        Each event, a tuple of the form (ep, eh, eventTypeString, c, d, s, l),
+        is numbered in the order it is first found, and sets of events are
+        held as integers whose bit i is set if the set holds the event
+        self.Events[i] (see decodeEvents).  The CVevents dictionary has keys
+        that are tuples of the form (ep, eh, eventType, c, d, s, l) and
+        values that are the sets of all the events in that solution
+        associated with ep on eh with cost vector <c, d, s, l>.
+        CVallEvents[(ep, eh, c, d, s, l)] is the union of the events of every
+        solution of ep on eh with that cost vector.  If intersection is True, CVcommonEvents[(c, d, s, l)] is
+        the intersection of the events of every solution with that cost
+        vector.  Solutions dominated by one of the candidates cost vectors are
+        not recorded.  A ParetoProblem can be given to share its host and
+        parasite edge orders, but not the tip tables of its withPhi method,
+        which record no events. '''
+
+    def __init__(self, parasiteTree, hostTree, phi, switchLo, switchHi, \
+                 lossLo, lossHi, candidates=(), intersection=False, \
+                 solver="memo", problem=None):
+        ParetoReconciler.__init__(self, parasiteTree, hostTree, phi, \
+                                  switchLo, switchHi, lossLo, lossHi, solver, \
+                                  problem)
+        self.CandidateCVlist = list(candidates)
+        self.intersection = intersection
+        self.CVevents = defaultdict(int)
+        self.CVallEvents = defaultdict(int)
+        self.CVseen = defaultdict(bool) # Initially all values are False by default
+        self.CVcommonEvents = defaultdict(int)
+        self.Events = []
+        self.eventBits = {}
+
+    def reconcile(self):
+        ''' Returns the list of the Pareto optimal solutions over the
+            parasite tree rooted at every possible edge of the host tree. '''
+        if self.solver == "bottomup":
+            self.fillTables()
+        solutions = []
+        for eh in self.hostTree:
+            solutions.extend(self.C("pTop", eh))
+        return self.paretoFilter(solutions)
+
+    # The A and C methods implement the A and C DPs in the HMC Tech Report
+    # "Faster Dynamic Programming Algorithms for the Cophylogeny Reconstruction
+    # Problem" available at www.cs.hmc.edu/~hadas/jane/TechReportCS-2011-1.pdf
+    # This implementation uses memoization rather than DP.
+
+    def A(self, ep, eh):
+        ''' The A table for the dynamic program. '''
+        if (ep, eh) in self.Amemo: return self.Amemo[(ep, eh)]
+
+        parasiteTree = self.parasiteTree
+        hostTree = self.hostTree
+        if tipEdge(eh, hostTree):
+            if tipEdge(ep, parasiteTree) and \
+               self.phi[endVertex(ep, parasiteTree)] == endVertex(eh, hostTree):
+                return [CostVector(0, 0, 0, 0, 1)]
+            else:
+                return [CostVector(INF, INF, INF, INF, 0)]
+        else:
+            ehLeftChild = leftChildEdge(eh, hostTree)
+            ehRightChild = rightChildEdge(eh, hostTree)
 
-Amemo = {}
-Cmemo = {}
-Bestmemo = {}
+            # Cospeciation
+            if tipEdge(ep, parasiteTree):
+                cospeciation = [CostVector(INF, INF, INF, INF, 0)]
+            else:
+                epLeftChild = leftChildEdge(ep, parasiteTree)
+                epRightChild = rightChildEdge(ep, parasiteTree)
 
-# The Ancestors and Descendants dictionaries are precomputed in the reconcile
-# function and allow the switch function to determine the valid landing sites
-# for a switch.
+                cospeciation1 = self.merge(self.C(epLeftChild, ehLeftChild), \
+                                           self.C(epRightChild, ehRightChild), \
+                                           ep, eh, epLeftChild, ehLeftChild, \
+                                           epRightChild, ehRightChild, \
+                                           "cospeciation")
 
-Ancestors = {}
-Descendants = {}
+                cospeciation2 = self.merge(self.C(epLeftChild, ehRightChild), \
+                                           self.C(epRightChild, ehLeftChild), \
+                                           ep, eh, epLeftChild, ehRightChild, \
+                                           epRightChild, ehLeftChild, \
+                                           "cospeciation")
 
-# The switchLo, switchHi, lossLo, and lossHi values are the user-specified
-# low and high ranges for the switch and loss costs, relative to the unit
-# cost of duplication.  They are shown here only for clarity.  
+                cospeciation = cospeciation1 + cospeciation2
 
-switchLo = None
-switchHi = None
-lossLo = None
-lossHi = None
+            # Loss
+            loss1 = self.lossmerge(ep, eh, ehLeftChild, \
+                                   self.C(ep, ehLeftChild))
 
-# The CVevents global dictionary has keys that are tuples of the form
-# (ep, eh, eventType c, d, s, l) and values that are all the events in 
-# that solution of the form (ep', eh', eventTypeString) associated with 
-# ep on eh with cost vector <c, d, s, l>
-CVevents = defaultdict(set)
-CVallEvents = defaultdict(set)
-CandidateCVlist = list()
+            loss2 = self.lossmerge(ep, eh, ehRightChild, \
+                                   self.C(ep, ehRightChild))
 
-# looking at union OR intersection of events?
-class Config:     # to get around immutable globals
-    pass
-CONFIG = Config()
-CVseen = defaultdict(bool) # Initially all values are False by default
-CVcommonEvents = defaultdict(set)
+            loss = loss1 + loss2
+
+            output = self.paretoFilter(cospeciation + loss)
+            self.Amemo[(ep, eh)] = output
+            return output
+
+    def C(self, ep, eh):
+        ''' The C table for the dynamic program. '''
+        if (ep, eh) in self.Cmemo: return self.Cmemo[(ep, eh)]
+
+        # Option 1:  Pass through
+        passThrough = self.A(ep, eh)
+
+        if tipEdge(ep, self.parasiteTree):   # The options below don't apply to tips
+            return passThrough
 
-# This is the main function for this file.  It seeks to find the best
-# reconciliation for the parasite tree, rooted at every possible edge of the
-# host tree.
-def reconcileEvents(parasiteTree, hostTree, phi, smin, smax, lmin, lmax):
-    ''' Takes dictionary representations of the parasite tree, host tree
-        and phi as input and returns a list of the Pareto optimal solutions. '''
-    
-    global switchLo, switchHi, lossLo, lossHi
-    switchLo = smin; switchHi = smax; lossLo = lmin; lossHi = lmax
-
-    ancestorsAndDescendants(hostTree) # Set the Ancestors and Descendants
-    
-    solutions = []
-    for eh in hostTree:
-        solutions.extend(C(parasiteTree, hostTree, phi, "pTop", eh))
-    return(paretoFilter(solutions))
-
-# The A and C functions implement the A and C DPs in the HMC Tech Report
-# "Faster Dynamic Programming Algorithms for the Cophylogeny Reconstruction
-# Problem" available at www.cs.hmc.edu/~hadas/jane/TechReportCS-2011-1.pdf
-# This implementation uses memoization rather than DP.
-
-def A(parasiteTree, hostTree, phi, ep, eh):
-    ''' The A table for the dynamic program. '''
-    global Amemo
-    
-    if (ep, eh) in Amemo: return Amemo[(ep, eh)]
-
-    if tipEdge(eh, hostTree):
-        if tipEdge(ep, parasiteTree) and \
-           phi[endVertex(ep, parasiteTree)] == endVertex(eh, hostTree):
-            return [CostVector(0, 0, 0, 0, 1)]
-        else:
-            return [CostVector(INF, INF, INF, INF, 0)]
-    else:
-        ehLeftChild = leftChildEdge(eh, hostTree)
-        ehRightChild = rightChildEdge(eh, hostTree)
-
-        # Cospeciation
-        if tipEdge(ep, parasiteTree):
-            cospeciation = [CostVector(INF, INF, INF, INF, 0)]
         else:
-            epLeftChild = leftChildEdge(ep, parasiteTree)
-            epRightChild = rightChildEdge(ep, parasiteTree)
-
-            cospeciation1 = merge(C(parasiteTree, hostTree, phi, \
-                                    epLeftChild, ehLeftChild), \
-                                  C(parasiteTree, hostTree, phi, \
-                                    epRightChild, ehRightChild), \
-                                  ep, eh, epLeftChild, ehLeftChild, \
-                                  epRightChild, ehRightChild, "cospeciation")
-
-            cospeciation2 = merge(C(parasiteTree, hostTree, phi, \
-                                    epLeftChild, ehRightChild), \
-                                  C(parasiteTree, hostTree, phi, \
-                                    epRightChild, ehLeftChild), \
-                                  ep, eh, epLeftChild, ehRightChild, \
-                                  epRightChild, ehLeftChild, "cospeciation")
-
-            cospeciation = cospeciation1 + cospeciation2
-            
-        # Loss
-        loss1 = lossmerge(ep, eh, ehLeftChild, \
-                     C(parasiteTree, hostTree, phi, ep, ehLeftChild))
-                       
-        loss2 = lossmerge(ep, eh, ehRightChild, \
-                     C(parasiteTree, hostTree, phi, ep, ehRightChild))
-
-        loss = loss1 + loss2
-        
-        output = paretoFilter(cospeciation + loss)
-        Amemo[(ep, eh)] = output
+            epLeftChild = leftChildEdge(ep, self.parasiteTree)
+            epRightChild = rightChildEdge(ep, self.parasiteTree)
+
+            # Option 2:  Duplicate here
+
+            duplicate = self.merge(self.C(epLeftChild, eh), \
+                                   self.C(epRightChild, eh), \
+                                   ep, eh, epLeftChild, eh, \
+                                   epRightChild, eh, "duplication")
+
+            switch = []
+            leftCVlist = self.C(epLeftChild, eh)
+            rightPairs = self.allSwitches(epRightChild, eh)
+            for (switchEdge, rightCVlist) in rightPairs:
+                switch.extend(self.merge(leftCVlist, rightCVlist, \
+                                         ep, eh, epLeftChild, eh, epRightChild, \
+                                         switchEdge, "switch"))
+
+            leftCVlist = self.C(epRightChild, eh)
+            rightPairs = self.allSwitches(epLeftChild, eh)
+            for (switchEdge, rightCVlist) in rightPairs:
+                switch.extend(self.merge(leftCVlist, rightCVlist, \
+                                         ep, eh, epRightChild, eh, epLeftChild, \
+                                         switchEdge, "switch"))
+
+        output = self.paretoFilter(passThrough + duplicate + switch)
+        self.Cmemo[(ep, eh)] = output
+
         return output
-        
-def C(parasiteTree, hostTree, phi, ep, eh):
-    ''' The C table for the dynamic program. '''
-    
-    global Cmemo
-    
-    if (ep, eh) in Cmemo: return Cmemo[(ep, eh)]
-
-    # Option 1:  Pass through
-    passThrough = A(parasiteTree, hostTree, phi, ep, eh)
-    
-    if tipEdge(ep, parasiteTree):   # The options below don't apply to tips
-        return passThrough
-
-    else:
-        epLeftChild = leftChildEdge(ep, parasiteTree)
-        epRightChild = rightChildEdge(ep, parasiteTree)
-    
-        # Option 2:  Duplicate here
-        
-        duplicate = merge(C(parasiteTree, hostTree, phi, epLeftChild, eh), \
-                          C(parasiteTree, hostTree, phi, epRightChild, eh), \
-                            ep, eh, epLeftChild, eh, \
-                            epRightChild, eh, "duplication")
-    
-        switch = []
-        leftCVlist = C(parasiteTree, hostTree, phi, epLeftChild, eh)
-        rightPairs = allSwitches(parasiteTree, hostTree, phi, epRightChild, eh)
-        for (switchEdge, rightCVlist) in rightPairs:
-            switch.extend(merge(leftCVlist, rightCVlist, \
-                                ep, eh, epLeftChild, eh, epRightChild, \
-                                switchEdge, "switch"))
-            
-        leftCVlist = C(parasiteTree, hostTree, phi, epRightChild, eh)
-        rightPairs = allSwitches(parasiteTree, hostTree, phi, epLeftChild, eh)
-        for (switchEdge, rightCVlist) in rightPairs:
-            switch.extend(merge(leftCVlist, rightCVlist, \
-                                ep, eh, epRightChild, eh, epLeftChild, \
-                                switchEdge, "switch"))
-               
-    output = paretoFilter(passThrough + duplicate + switch)
-    Cmemo[(ep, eh)] = output
 
-    return output
+    def merge(self, CVlist1, CVlist2, ep, eh, epChild1, ehChild1, epChild2, \
+              ehChild2, eventType):
+        ''' Given two lists of CostVectors, returns a new list of CostVectors,
+            each of which is the sum of a pair of vectors from the two given
+            lists, and records the events of the new solutions.'''
+        CVevents = self.CVevents
+        CVallEvents = self.CVallEvents
+        intersection = self.intersection
+
+        output = []
+        for v in CVlist1:
+            for w in CVlist2:
+                if eventType == "cospeciation":
+                    newCV = CostVector(1, 0, 0, 0, 1) + v + w
+                elif eventType == "duplication":
+                    newCV = CostVector(0, 1, 0, 0, 1) + v + w
+                else:   # eventType == "switch":
+                    newCV = CostVector(0, 0, 1, 0, 1) + v + w
+
+                if self.keep(newCV):
+                    output.append(newCV)
+                    vsoln = (epChild1, ehChild1) + v.toTupleCDSL()
+                    wsoln = (epChild2, ehChild2) + w.toTupleCDSL()
+                    if eventType == "switch": eventType = "switch to "+str(ehChild2)
+                    nswe = (ep, eh, eventType) + newCV.toTupleCDSL()
+                    ns = (ep, eh) + newCV.toTupleCDSL()
+                    CVevents[nswe] |= self.eventBit(nswe) | \
+                                      CVallEvents[vsoln] | CVallEvents[wsoln]
+                    CVallEvents[ns] |= CVevents[nswe]
+
+                    if intersection:
+                        self.intersect(newCV, CVevents[nswe])
+        return output
+
+    def lossmerge(self, ep, eh, ehChild, CVlist):
+        ''' Returns the list of CostVectors of the solutions in which ep is
+            lost from eh into ehChild, and records their events. '''
+        CVevents = self.CVevents
+        CVallEvents = self.CVallEvents
+        intersection = self.intersection
 
-def merge(CVlist1, CVlist2, ep, eh, epChild1, ehChild1, epChild2, \
-          ehChild2, eventType):
-    ''' Given two lists of CostVectors, returns a new list of CostVectors, each
-        of which is the sum of a pair of vectors from the two given lists.'''
-    global CVevents
-    global CVallEvents
-    global CandidateCVlist
-
-    intersection = CONFIG.intersection
-    if intersection:
-        global CVseen
-        global CVcommonEvents
-        
-    output = []
-    for v in CVlist1:
-        for w in CVlist2:
-            if eventType == "cospeciation":
-                newCV = CostVector(1, 0, 0, 0, 1) + v + w
-            elif eventType == "duplication":
-                newCV = CostVector(0, 1, 0, 0, 1) + v + w
-            else:   # eventType == "switch":
-                newCV = CostVector(0, 0, 1, 0, 1) + v + w
-            keepnewCV = True
-            for cv in CandidateCVlist:
-                if cv < newCV: 
-                    keepnewCV = False
-                    break
-    
-            if keepnewCV:
+        output = []
+        for v in CVlist:
+            newCV = CostVector(0, 0, 0, 1, 1) + v
+
+            if self.keep(newCV):
                 output.append(newCV)
-                vsoln = (epChild1, ehChild1) + v.toTupleCDSL()
-                wsoln = (epChild2, ehChild2) + w.toTupleCDSL()
-                if eventType == "switch": eventType = "switch to "+str(ehChild2)
-                nswe = (ep, eh, eventType) + newCV.toTupleCDSL()
+                vsoln = (ep, ehChild) + v.toTupleCDSL()
+                nswe = (ep, eh, "loss "+str(ehChild)) + newCV.toTupleCDSL()
                 ns = (ep, eh) + newCV.toTupleCDSL()
-                CVevents[nswe].add(nswe)
-                CVevents[nswe] = CVevents[nswe].\
-                                 union(CVallEvents[vsoln]).\
-                                 union(CVallEvents[wsoln])
-                CVallEvents[ns] = CVallEvents[ns].union(CVevents[nswe])
+                CVevents[nswe] |= self.eventBit(nswe) | CVallEvents[vsoln]
+                CVallEvents[ns] |= CVevents[nswe]
 
                 if intersection:
-                    key = newCV.toTupleCDSL()
-                    if CVseen[key]:
-                        CVcommonEvents[key] = CVcommonEvents[key].\
-                                              intersection(CVevents[nswe])
-                    else:
-                        CVcommonEvents[key] = CVevents[nswe]
-                        CVseen[key] = True
-    return output
+                    self.intersect(newCV, CVevents[nswe])
+        return output
 
-def lossmerge(ep, eh, ehChild, CVlist):
-    global CVevents
-    global CVallEvents
-    global CandidateCVlist
-
-    intersection = CONFIG.intersection
-    if intersection:
-        global CVseen
-        global CVcommonEvents
-    
-    output = []
-    for v in CVlist:
-        newCV = CostVector(0, 0, 0, 1, 1) + v
-        keepnewCV = True
-        for cv in CandidateCVlist:
-            if cv < newCV: 
-                keepnewCV = False
-                break
-    
-        if keepnewCV:
-            output.append(newCV)
-            vsoln = (ep, ehChild) + v.toTupleCDSL()
-            nswe = (ep, eh, "loss "+str(ehChild)) + newCV.toTupleCDSL()
-            ns = (ep, eh) + newCV.toTupleCDSL()
-            CVevents[nswe].add(nswe)
-            CVevents[nswe] = CVevents[nswe].union(CVallEvents[vsoln])
-            CVallEvents[ns] = CVallEvents[ns].union(CVevents[nswe])
-
-            if intersection:
-                key = newCV.toTupleCDSL()
-                if CVseen[key]:
-                    CVcommonEvents[key] = CVcommonEvents[key].\
-                                              intersection(CVevents[nswe])
-                else:
-                    CVcommonEvents[key] = CVevents[nswe]
-                    CVseen[key] = True
-    return output
-    
-def allSwitches(parasiteTree, hostTree, phi, ep, eh):
-    ''' Returns the list of all CostVectors in which the given parasite edge ep
-        switches to all possible host edges. '''
-    global Bestmemo
-    if (ep, eh) in Bestmemo: return Bestmemo[(ep, eh)]
-    output = []
-    for switchEdge in hostTree:     # for every possible host edge
-        if switchEdge != eh and switchEdge not in Ancestors[eh] and \
-           switchEdge not in Descendants[eh]:
-            output.append((switchEdge, \
-                               C(parasiteTree, hostTree, phi, ep, switchEdge)))
-    Bestmemo[(ep, eh)] = output
-    return output
+    def keep(self, newCV):
+        ''' Returns False if newCV is dominated by one of the candidate
+            CostVectors. '''
+        for cv in self.CandidateCVlist:
+            if cv < newCV:
+                return False
+        return True
+
+    def eventBit(self, event):
+        ''' Returns the set holding only the given event, numbering the event
+            if it is new. '''
+        if event not in self.eventBits:
+            self.eventBits[event] = 1 << len(self.Events)
+            self.Events.append(event)
+        return self.eventBits[event]
+
+    def decodeEvents(self, events):
+        ''' Returns the list of the events in the given set, in the order
+            they were first found. '''
+        return decodeEvents(events, self.Events)
+
+    def intersect(self, newCV, events):
+        ''' Intersects the common events of the cost vector of newCV with
+            the given events. '''
+        key = newCV.toTupleCDSL()
+        if self.CVseen[key]:
+            self.CVcommonEvents[key] &= events
+        else:
+            self.CVcommonEvents[key] = events
+            self.CVseen[key] = True
 
-def paretoFilter(CVlist):
-    ''' Returns the Pareto front for the given list of CostVectors. '''
-    CVlist = CVfilter(CVlist)
-    if CVlist == []: return []
-    uniqueCVlist = coalesceDuplicates(CVlist)
-    uniqueCVlist.sort(CostVector.lex)
-    if len(uniqueCVlist) == 1: return uniqueCVlist
-    lexlist = [uniqueCVlist[0]]
-    for i in range(1, len(uniqueCVlist)):
-        predecessor = uniqueCVlist[i-1]
-        current = uniqueCVlist[i]
-        if predecessor.d < current.d or predecessor.s < current.s:
-            lexlist.append(current)
-    output = []
-    for v in lexlist:
-        if minimal(v, CVlist): output.append(v)
-    return output 
-  
-def CVfilter(CVlist):
-    ''' Filter the CVlist to a subset that removes those cost vectors that
-        cannot be optimal in the given cost range. '''
-        
-    global switchLo, switchHi, lossLo, lossHi
-    
-    if CVlist == []: return []
-    else:
-        LUB = min([cv.d + cv.l * lossHi + cv.s * switchHi for cv in CVlist])
+    def allSwitches(self, ep, eh):
+        ''' Returns the list of all CostVectors in which the given parasite
+            edge ep switches to all possible host edges. '''
+        if (ep, eh) in self.Bestmemo: return self.Bestmemo[(ep, eh)]
         output = []
-        for cv in CVlist:
-            mincost = cv.d + cv.l * lossLo + cv.s * switchLo 
-            if mincost <= LUB:
-                output.append(cv)
+        for switchEdge in self.hostTree:     # for every possible host edge
+            if not comparable(switchEdge, eh, self.intervals):
+                output.append((switchEdge, self.C(ep, switchEdge)))
+        self.Bestmemo[(ep, eh)] = output
         return output
-            
-def coalesceDuplicates(CVlist):
-    counts = {}
-    for cv in CVlist:
-        cvtup = cv.toTupleCDSL()
-        count = cv.count
-        if cvtup not in counts:
-            counts[cvtup] = count
-        else:
-            counts[cvtup] = counts[cvtup] + count
-    output = []
-    for entry in counts:
-        entryWithCounts = entry + (counts[entry],)
-        output.append(tupleToCV(entryWithCounts))
-    return output    
-
-def tupleToCV(entry):
-    return CostVector(entry[0], entry[1], entry[2], entry[3], entry[4])
-
-def minimal(v, CVlist):
-    ''' Returns True if v is a minimal element of the CostVector list. '''
-    for w in CVlist:
-        if w < v: return False
-    return True
-
-def descendants(edge, tree):
-    ''' returns the list of descendant edges of the given edge in the
-        given tree.'''
-    if tipEdge(edge, tree): return []
-    else: return [leftChildEdge(edge, tree), rightChildEdge(edge, tree)] + \
-                  descendants(leftChildEdge(edge, tree), tree) + \
-                  descendants(rightChildEdge(edge, tree), tree)
-                  
-def ancestorsAndDescendants(tree):
-    ''' Returns a two dictionaries D and A, where D[e] is the list
-        of descendant edges of e and A[e] is the list of ancestral edges
-        of e. '''
-    global Ancestors, Descendants
-    
-    # First, compute all the descendants
-    for e in tree:
-        Descendants[e] = descendants(e, tree)
-    # Next, compute ancestors 
-    for e in tree: Ancestors[e] = []  # initialize A dictionary      
-    for e in tree:
-        for d in Descendants[e]: # d descendant of e => e ancestor of d
-            Ancestors[d].append(e)
-        
-def tipEdge(edge, tree):
-    ''' returns True if the edge terminates at a tip  '''
-    return leftChildEdge(edge, tree) == None  # This edge has no edge children
-    
-def startVertex(edge, tree):
-    ''' returns the start vertex of an edge '''
-    return tree[edge][0]
-
-def endVertex(edge, tree):
-    ''' returns the end vertex of an edge '''
-    return tree[edge][1]
-
-def leftChildEdge(edge, tree):
-    ''' returns the left child edge of the given edge '''
-    return tree[edge][2]
-
-def rightChildEdge(edge, tree):
-    ''' returns the right child edge of the given edge '''
-    return tree[edge][3]
+
+    def fillSwitches(self, ep, hostOrder):
+        ''' The switches of ep are recorded landing site by landing site, so
+            allSwitches finds them when they are first needed and there is
+            nothing to fill in advance. '''
+
+    def paretoFilter(self, CVlist):
+        ''' Returns the Pareto front for the given list of CostVectors in the
+            cost range of this reconciler. '''
+        return paretoFilter(CVlist, self.switchLo, self.switchHi, \
+                            self.lossLo, self.lossHi)
+
+# This is the main function for this file.  It seeks to find the best
+# reconciliation for the parasite tree, rooted at every possible edge of the
+# host tree.
+def reconcileEvents(parasiteTree, hostTree, phi, smin, smax, lmin, lmax, \
+                    solver="memo"):
+    ''' Takes dictionary representations of the parasite tree, host tree
+        and phi as input and returns a list of the Pareto optimal solutions.
+        The solver is one of reconcile.SOLVERS.  The events of the solutions
+        replace those of any earlier call in the module dictionaries
+        CVevents, CVallEvents, CVseen and CVcommonEvents and the list
+        Events of their numbers. '''
+    reconciler = ParetoEventReconciler(parasiteTree, hostTree, phi, smin, \
+                                       smax, lmin, lmax, CandidateCVlist, \
+                                       CONFIG.intersection, solver)
+    output = reconciler.reconcile()
+    Events[:] = reconciler.Events
+    for table, events in [(CVevents, reconciler.CVevents), \
+                          (CVallEvents, reconciler.CVallEvents), \
+                          (CVseen, reconciler.CVseen), \
+                          (CVcommonEvents, reconciler.CVcommonEvents)]:
+        table.clear()
+        table.update(events)
+    return output
+
+def eventNumbers(events):
+    ''' Returns the list of the numbers of the events in the set events, an
+        integer whose bit i is set if it holds event number i, in
+        increasing order. '''
+    # The binary digits of the set, from bit 0 up, followed by "b0"
+    return [i for i, bit in enumerate(reversed(bin(events))) if bit == "1"]
+
+def decodeEvents(events, eventList):
+    ''' Returns the list of the events in the set events, in which event
+        number i is eventList[i], in order. '''
+    return [eventList[i] for i in eventNumbers(events)]
@@ -1,8 +1,13 @@
 #sigscape2.py
-from multiprocessing import Process, Queue  # For multiprocessing random trials
+from multiprocessing import Process, Queue, cpu_count  # For multiprocessing random trials
+from Queue import Empty
 import random
 import sys
 import time
+import traceback
+import warnings
+
+import numpy as np
 
 
 from os.path import realpath, dirname, join
@@ -15,6 +20,9 @@ from sys import argv
 from newickFormatReader2 import *
 
 DOTS = 100
+# Seconds TrialPool waits for a trial result before it checks that its
+# workers are still running
+POLL_SECONDS = 1.0
 def outputFile(fileName):
 	if fileName[-6:] == "newick":
 		return fileName[:-7]
@@ -31,6 +39,29 @@ def getInput2(list):
     log=list[6]
     numTrials=list[7]
     numTrials = int(numTrials)
+    # Optional solver for the DP tables (see reconcile.SOLVERS)
+    if len(list) > 8:
+        solver = list[8]
+    else:
+        solver = "memo"
+    # Optional number of worker processes for the trials and seed for their
+    # random tip mappings (see parTrials); without them the trials are run
+    # by seqTrials
+    numWorkers = None
+    seed = None
+    if len(list) > 9 and str(list[9]).lower() != "none":
+        numWorkers = int(list[9])
+    if len(list) > 10 and str(list[10]).lower() != "none":
+        seed = int(list[10])
+    # Optional confidence level at which to stop the trials once every
+    # p-value color is settled, with numTrials as the largest number of
+    # trials, and size of the batches of trials (see adaptiveTrials)
+    confidence = None
+    batchSize = 100
+    if len(list) > 11 and str(list[11]).lower() != "none":
+        confidence = float(list[11])
+    if len(list) > 12:
+        batchSize = int(list[12])
     output = str(outputFile(treeFile)) +"sigscape.pdf"
     outtext= str(outputFile(treeFile)) + "sigscape.txt"
     while True:
@@ -52,9 +83,17 @@ def getInput2(list):
     lossHi = float(lossHi)
 
     log = log == "True"
-    CVlist = reconcile.reconcile(parasiteTree, hostTree, phi, switchLo, switchHi, lossLo, lossHi)
+    CVlist = reconcile.reconcile(parasiteTree, hostTree, phi, switchLo, switchHi, lossLo, lossHi, solver)
 
-    randomTrialsCVlist = seqTrials(parasiteTree, hostTree, phi, numTrials, switchLo, switchHi, lossLo, lossHi)
+    if confidence is not None:
+        randomTrialsCVlist = adaptiveTrials(parasiteTree, hostTree, phi, CVlist, numTrials, switchLo, switchHi, lossLo, lossHi, DOTS, log, confidence, batchSize, numWorkers, seed, solver=solver)
+        outputText = open(outtext, 'a')
+        outputText.write("Stopped after " + str(len(randomTrialsCVlist)) + " of " + str(numTrials) + " trials at confidence " + str(confidence) + " for each point over all batches\n")
+        outputText.close()
+    elif numWorkers is None:
+        randomTrialsCVlist = seqTrials(parasiteTree, hostTree, phi, numTrials, switchLo, switchHi, lossLo, lossHi, solver=solver)
+    else:
+        randomTrialsCVlist = parTrials(parasiteTree, hostTree, phi, numTrials, switchLo, switchHi, lossLo, lossHi, numWorkers, seed, solver=solver)
 
     plotsig2.plotsig(CVlist, randomTrialsCVlist, switchLo, switchHi, \
                     lossLo, lossHi, DOTS, output, outtext, log, False)
@@ -62,25 +101,218 @@ def getInput2(list):
 
 def seqTrials(parasiteTree, hostTree, phi, numTrials,
               switchLo, switchHi, lossLo, lossHi,
-              verbose=True):
+              verbose=True, solver="memo"):
     ''' Perform numTrials randomization trials sequentially.  Although
         parTrials could be used to do this too, this function doesn't
         require the multiprocessing package and thus may be preferable
         to some users in some situation.'''
     parasiteTips, hostTips = getTipLists(parasiteTree, hostTree, phi)
+    problem = reconcile.ParetoProblem(parasiteTree, hostTree, switchLo,
+                                      switchHi, lossLo, lossHi, solver)
     output = []
     for t in range(numTrials):
         if verbose:
             print ".",      # Progress indicator!
         sys.stdout.flush()
         newPhi = randomizeTips(parasiteTips, hostTips)
-        output.append(reconcile.reconcile(parasiteTree, hostTree, newPhi,
-                                          switchLo, switchHi, lossLo, lossHi))
+        output.append(problem.withPhi(newPhi).reconcile())
+
+    if verbose:
+        print               # Newline
+    return output
+
+def parTrials(parasiteTree, hostTree, phi, numTrials,
+              switchLo, switchHi, lossLo, lossHi,
+              numWorkers=None, seed=None, verbose=True, solver="memo"):
+    ''' Perform numTrials randomization trials in numWorkers processes (one
+        per CPU by default).  Each trial randomizes the tips with its own
+        random number generator, seeded from seed and the number of the
+        trial (see trialSeeds), so the trials are the same for any number of
+        workers.  If seed is None it is drawn from the random module.
+        Returns the Pareto lists of the trials in order.'''
+    pool = TrialPool(parasiteTree, hostTree, phi, numTrials,
+                     switchLo, switchHi, lossLo, lossHi,
+                     numWorkers, seed, solver)
+    try:
+        output = pool.run(range(numTrials), verbose)
+    except:
+        pool.close(failed=True)
+        raise
+    pool.close()
+    if verbose:
+        print               # Newline
+    return output
 
+def adaptiveTrials(parasiteTree, hostTree, phi, CVlist, maxTrials,
+                   switchLo, switchHi, lossLo, lossHi, steps, log=True,
+                   confidence=0.99, batchSize=100, numWorkers=None,
+                   seed=None, verbose=True, solver="memo"):
+    ''' Perform randomization trials as parTrials does, in batches of
+        batchSize trials, until the color of the p-value of every point of
+        the sigscape grid (see plotsig2.plotsig, with steps steps) is
+        settled or maxTrials trials have been run.  The colors are checked
+        after every batch, and the given confidence level holds at each
+        point for all the batches together (see plotsig2.colorsSettled), so
+        a grid with a p-value below 0.01 is not settled before
+        plotsig2.minSettledTrials(confidence, number of batches) trials,
+        and a warning is given if that is more than maxTrials.  Returns the
+        Pareto lists of the trials that were run, which are the first
+        trials that parTrials runs with the same seed.'''
+    xs = frange(lossLo, lossHi, steps, log=log)
+    ys = frange(switchLo, switchHi, steps, log=log)
+    bestOriginal = plotsig2.bestCosts(plotsig2.costKey(CVlist), xs, ys)
+    counter = np.zeros(bestOriginal.shape, dtype=int)
+    numBatches = (maxTrials + batchSize - 1) // batchSize
+    minTrials = plotsig2.minSettledTrials(confidence, numBatches)
+    if minTrials > maxTrials:
+        warnings.warn("A p-value below 0.01 needs " + str(minTrials) + \
+                      " trials to settle at confidence " + str(confidence) + \
+                      " over " + str(numBatches) + " batches, more than " + \
+                      str(maxTrials) + " trials")
+    pool = TrialPool(parasiteTree, hostTree, phi, maxTrials,
+                     switchLo, switchHi, lossLo, lossHi,
+                     numWorkers, seed, solver)
+    output = []
+    try:
+        while len(output) < maxTrials:
+            batch = range(len(output), min(len(output) + batchSize, maxTrials))
+            for trialCVlist in pool.run(batch, verbose):
+                bestThisTrial = plotsig2.bestCosts(\
+                    plotsig2.costKey(trialCVlist), xs, ys)
+                counter += bestOriginal < bestThisTrial
+                output.append(trialCVlist)
+            if plotsig2.colorsSettled(counter, len(output), confidence,
+                                      numBatches):
+                break
+    except:
+        pool.close(failed=True)
+        raise
+    pool.close()
     if verbose:
         print               # Newline
     return output
 
+class TrialPool:
+    ''' Worker processes that run the randomization trials numbered 0 to
+        numTrials - 1 of parTrials, in batches given to the run method.
+        The trees are passed to each worker once, when it starts, and the
+        workers send back only the Pareto lists, as tuples. '''
+
+    def __init__(self, parasiteTree, hostTree, phi, numTrials,
+                 switchLo, switchHi, lossLo, lossHi,
+                 numWorkers=None, seed=None, solver="memo"):
+        if numWorkers is None:
+            numWorkers = cpu_count()
+        numWorkers = max(1, min(numWorkers, numTrials))
+        if seed is None:
+            seed = random.getrandbits(64)
+        seeds = trialSeeds(seed, numTrials)
+        # The tips are sorted so the random mappings do not depend on the
+        # order of the keys of phi
+        parasiteTips, hostTips = getTipLists(parasiteTree, hostTree, phi)
+        parasiteTips.sort()
+        hostTips.sort()
+
+        self.tasks = Queue()
+        self.results = Queue()
+        self.workers = []
+        for w in range(numWorkers):
+            worker = Process(target=trialWorker,
+                             args=(parasiteTree, hostTree, parasiteTips,
+                                   hostTips, seeds, switchLo, switchHi,
+                                   lossLo, lossHi, solver, self.tasks,
+                                   self.results))
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+
+    def run(self, trialNumbers, verbose=False):
+        ''' Runs the trials with the given numbers and returns their Pareto
+            lists in the same order.  Raises RuntimeError if a trial fails
+            or a worker stops before the trials are done. '''
+        position = {}
+        for i, t in enumerate(trialNumbers):
+            position[t] = i
+            self.tasks.put(t)
+        output = [None] * len(position)
+        for i in range(len(position)):
+            t, trialCVs = self.nextResult()
+            if t is None:
+                self.close(failed=True)
+                raise RuntimeError("Randomization trial failed:\n" + trialCVs)
+            output[position[t]] = [CostVector(*cv) for cv in trialCVs]
+            if verbose:
+                print ".",      # Progress indicator!
+                sys.stdout.flush()
+        return output
+
+    def nextResult(self):
+        ''' Returns the next (trial number, Pareto list) pair from the
+            results queue, checking every POLL_SECONDS that the workers are
+            still running.  A worker only stops on its own after a trial
+            fails, and then puts the traceback in the queue first; a worker
+            that stopped without it (killed, or out of memory) would leave
+            its trial unfinished, so the pool is closed and RuntimeError
+            raised instead of waiting for it. '''
+        while True:
+            try:
+                return self.results.get(timeout=POLL_SECONDS)
+            except Empty:
+                pass
+            stopped = [worker for worker in self.workers
+                       if not worker.is_alive()]
+            if stopped:
+                # What the worker put in the queue before it stopped
+                try:
+                    return self.results.get(timeout=POLL_SECONDS)
+                except Empty:
+                    self.close(failed=True)
+                    raise RuntimeError("Randomization worker stopped with "
+                                       "exit code %s" % stopped[0].exitcode)
+
+    def close(self, failed=False):
+        ''' Stops the workers, after the trials they have been given unless
+            failed is True. '''
+        for worker in self.workers:
+            if failed:
+                worker.terminate()
+            else:
+                self.tasks.put(None)    # One stop signal per worker
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+
+def trialWorker(parasiteTree, hostTree, parasiteTips, hostTips, seeds,
+                switchLo, switchHi, lossLo, lossHi, solver, tasks, results):
+    ''' Runs the trials whose numbers it takes from the tasks queue, until
+        it takes None, and puts the number and Pareto list of each trial, as
+        a list of tuples, in the results queue.  The trials share one
+        reconcile.ParetoProblem.  If a trial fails, puts None and the
+        traceback in the results queue instead and stops. '''
+    try:
+        problem = reconcile.ParetoProblem(parasiteTree, hostTree, switchLo,
+                                          switchHi, lossLo, lossHi, solver)
+        for t in iter(tasks.get, None):
+            CVlist = runTrial(problem, parasiteTips, hostTips, seeds[t])
+            results.put((t, [cv.toTupleCDSLCount() for cv in CVlist]))
+    except Exception:
+        results.put((None, traceback.format_exc()))
+
+def runTrial(problem, parasiteTips, hostTips, trialSeed):
+    ''' Returns the Pareto list of one randomization trial of the given
+        reconcile.ParetoProblem, in which the tips are mapped at random by a
+        random number generator seeded with trialSeed. '''
+    rng = random.Random(trialSeed)
+    newPhi = randomizeTips(list(parasiteTips), list(hostTips), rng)
+    return problem.withPhi(newPhi).reconcile()
+
+def trialSeeds(seed, numTrials):
+    ''' Returns the seeds of the random number generators of numTrials
+        trials, which are drawn in order from a generator seeded with
+        seed. '''
+    master = random.Random(seed)
+    return [master.getrandbits(64) for t in range(numTrials)]
+
 def getTipLists(parasiteTree, hostTree, phi):
     ''' Return the lists of tips in the given parasite and host trees.'''
     parasiteTips = phi.keys()
@@ -90,13 +322,14 @@ def getTipLists(parasiteTree, hostTree, phi):
         if not h in hostTips: hostTips.append(h)
     return parasiteTips, hostTips
 
-def randomizeTips(parasiteTips, hostTips):
+def randomizeTips(parasiteTips, hostTips, rng=random):
     ''' Takes a list of parasiteTips and a list of hostTips as input and
         returns a random tip mapping dictionary that maps each parasite tip
         to a random host tip such that each host tip gets at least one \
-        parasite tip mapped onto it.'''
-    random.shuffle(hostTips)        # shuffle hostTips list in place
-    random.shuffle(parasiteTips)    # shuffle parasiteTips list in place
+        parasite tip mapped onto it.  The random choices are made by rng,
+        the random module by default.'''
+    rng.shuffle(hostTips)           # shuffle hostTips list in place
+    rng.shuffle(parasiteTips)       # shuffle parasiteTips list in place
     randomPhi = {}
     numPtips = len(parasiteTips)
     numHtips = len(hostTips)
@@ -106,7 +339,7 @@ def randomizeTips(parasiteTips, hostTips):
         randomPhi[parasiteTips[i]] = hostTips[i]
     # Map the remaining parasite tips at random to the hostTips
     for j in range(numHtips, numPtips):
-        randomPhi[parasiteTips[j]] = random.choice(hostTips)
+        randomPhi[parasiteTips[j]] = rng.choice(hostTips)
     return randomPhi
 
 def main():
@@ -0,0 +1,205 @@
+# testCommonAnalytic.py
+
+# Checks the costscape regions of commonAnalytic.envelopeRegions against
+# regions found exactly, with rational arithmetic, by brute force: the region
+# of a cost vector is the convex hull of the points where two of its boundary
+# lines cross and it costs no more than any other cost vector.  Also checks
+# the regions with area that getRegions keeps by default against those the
+# shapely getRegions found before, in regionsGolden.txt.  Run it from the
+# xscape directory with "python -m unittest discover tests".
+
+# python libraries
+import os
+import sys
+import unittest
+from fractions import Fraction
+
+# xscape libraries
+XSCAPE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, XSCAPE)
+from CostVector import *
+from commonAnalytic import envelopeRegions, getRegions, regionCenter
+from newickFormatReader2 import newickFormatReader
+import reconcile
+
+TESTFILES = os.path.join(os.path.dirname(XSCAPE), "testFiles")
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), \
+                      "regionsGolden.txt")
+
+# Some of the cost vectors of the COG0020 Pareto front in the range
+# [0, 10] x [0, 10], in CDSL format with counts: those with 7 duplications
+# and a few that cut their regions along the diagonal.  With integer bounds
+# the regions of <54, 7, 46, 11> and <47, 7, 53, 4> used to come out wrong.
+COG0020 = [(63, 7, 37, 54, 6480000), (62, 7, 38, 43, 216000),
+           (61, 7, 39, 34, 7200), (60, 7, 40, 28, 15600),
+           (59, 7, 41, 22, 2400), (58, 7, 42, 19, 6720),
+           (57, 7, 43, 17, 13440), (56, 7, 44, 15, 8960),
+           (55, 7, 45, 13, 22400), (54, 7, 46, 11, 8960),
+           (53, 7, 47, 10, 110976), (52, 7, 48, 9, 584960),
+           (51, 7, 49, 8, 1785344), (50, 7, 50, 7, 3510272),
+           (49, 7, 51, 6, 4444160), (48, 7, 52, 5, 3391488),
+           (47, 7, 53, 4, 1310720), (45, 7, 55, 3, 49807360),
+           (43, 7, 57, 2, 283115520), (41, 7, 59, 1, 1090519040),
+           (39, 7, 61, 0, 2684354560), (63, 8, 36, 54, 6480000),
+           (54, 8, 45, 11, 8960), (47, 8, 52, 4, 1310720),
+           (39, 8, 60, 0, 2684354560), (55, 52, 0, 294, 1)]
+
+# Largest difference allowed between a vertex and its exact value
+TOLERANCE = 1e-7
+
+def exactRegion(cv, CVlist, switchMin, switchMax, lossMin, lossMax):
+    ''' Returns the region in which cv is optimal as the sorted list of the
+        extreme points of its convex hull, as pairs of Fractions.  The
+        bounds are taken to be the decimal values they are written as, so
+        0.2 is 1/5. '''
+    lossMin, lossMax = Fraction(repr(lossMin)), Fraction(repr(lossMax))
+    switchMin, switchMax = Fraction(repr(switchMin)), Fraction(repr(switchMax))
+    # Each line (a, b, c) bounds the half-plane a + b * x + c * y >= 0
+    lines = [(-lossMin, 1, 0), (lossMax, -1, 0), \
+             (-switchMin, 0, 1), (switchMax, 0, -1)]
+    for cv2 in CVlist:
+        if cv2 != cv:
+            lines.append((cv2.d - cv.d, cv2.l - cv.l, cv2.s - cv.s))
+    points = set()
+    for i in range(len(lines)):
+        a1, b1, c1 = lines[i]
+        for j in range(i + 1, len(lines)):
+            a2, b2, c2 = lines[j]
+            det = b1 * c2 - b2 * c1
+            if det == 0:
+                continue
+            x = Fraction(a2 * c1 - a1 * c2) / det
+            y = Fraction(a1 * b2 - a2 * b1) / det
+            if all(a + b * x + c * y >= 0 for (a, b, c) in lines):
+                points.add((x, y))
+    return hull(sorted(points))
+
+def hull(points):
+    ''' Returns the extreme points of the convex hull of the sorted list of
+        points, sorted. '''
+    if len(points) <= 1:
+        return points
+    def half(points):
+        chain = []
+        for p in points:
+            while len(chain) > 1 and cross(chain[-2], chain[-1], p) <= 0:
+                chain.pop()
+            chain.append(p)
+        return chain
+    return sorted(set(half(points) + half(points[::-1])))
+
+def cross(o, p, q):
+    return (p[0] - o[0]) * (q[1] - o[1]) - (p[1] - o[1]) * (q[0] - o[0])
+
+def paretoFront(fileName, switchMin, switchMax, lossMin, lossMax):
+    fileHandle = open(fileName)
+    hostTree, parasiteTree, phi = newickFormatReader(fileHandle)
+    fileHandle.close()
+    return reconcile.reconcile(parasiteTree, hostTree, phi, switchMin, \
+                               switchMax, lossMin, lossMax)
+
+def readGolden():
+    ''' Returns a list of (file name, bounds, regions) for the cases of the
+        golden output, where regions is a dictionary with the (c, d, s, l,
+        count) of each cost vector as key and (area, centroid loss,
+        centroid switch) as value. '''
+    cases = []
+    for line in open(GOLDEN):
+        fields = line.split()
+        if fields == [] or fields[0] == "#":
+            continue
+        if fields[0] == "case":
+            regions = {}
+            bounds = tuple([eval(field) for field in fields[2:]])
+            cases.append((fields[1], bounds, regions))
+        else:
+            regions[tuple([int(field) for field in fields[:5]])] = \
+                tuple([float(field) for field in fields[5:]])
+    return cases
+
+def area(region):
+    ''' Returns the area of the polygon region, a list of vertices. '''
+    total = 0.0
+    for i in range(len(region)):
+        (x1, y1) = region[i - 1]
+        (x2, y2) = region[i]
+        total += x1 * y2 - x2 * y1
+    return abs(total) / 2.0
+
+class EnvelopeRegionsTest(unittest.TestCase):
+
+    def checkRegions(self, CVlist, switchMin, switchMax, lossMin, lossMax):
+        regions = envelopeRegions(CVlist, switchMin, switchMax, lossMin, \
+                                  lossMax)
+        for cv in CVlist:
+            exact = exactRegion(cv, CVlist, switchMin, switchMax, lossMin, \
+                                lossMax)
+            region = sorted(regions[str(cv)])
+            message = "%s in %s: %s instead of %s" % \
+                      (cv, (switchMin, switchMax, lossMin, lossMax), \
+                       region, [(float(x), float(y)) for (x, y) in exact])
+            self.assertEqual(len(region), len(exact), message)
+            for (x, y), (exactX, exactY) in zip(region, exact):
+                self.assertTrue(abs(x - exactX) <= TOLERANCE and \
+                                abs(y - exactY) <= TOLERANCE, message)
+
+    def testCOG0020IntegerBounds(self):
+        CVlist = [CostVector(*entry) for entry in COG0020]
+        self.checkRegions(CVlist, 0, 10, 0, 10)
+        self.checkRegions(CVlist, 1, 5, 1, 5)
+
+    def testCOG0020FloatBounds(self):
+        CVlist = [CostVector(*entry) for entry in COG0020]
+        self.checkRegions(CVlist, 0.0, 10.0, 0.0, 10.0)
+        self.checkRegions(CVlist, 0.5, 3.0, 0.2, 2.0)
+
+    def testParetoFronts(self):
+        for name in ["TenTips", "test7tree", "gopher_louse", "Vidua"]:
+            fileName = os.path.join(TESTFILES, name + ".newick")
+            for bounds in [(1, 5, 1, 5), (0, 10, 0, 10), \
+                           (0.5, 3.0, 0.2, 2.0), (0.1, 10.0, 0.1, 10.0)]:
+                CVlist = paretoFront(fileName, *bounds)
+                self.checkRegions(CVlist, *bounds)
+
+class GetRegionsTest(unittest.TestCase):
+
+    def testBaseline(self):
+        for name, bounds, golden in readGolden():
+            fileName = os.path.join(TESTFILES, name + ".newick")
+            CVlist = paretoFront(fileName, *bounds)
+            regions = getRegions(CVlist, *bounds, geometry=False)
+            message = "%s in %s" % (name, bounds)
+            self.assertEqual(sorted([cv.toTupleCDSLCount() for cv in CVlist \
+                                     if str(cv) in regions]), \
+                             sorted(golden), message)
+            for cv in CVlist:
+                if str(cv) in regions:
+                    region = regions[str(cv)]
+                    centerX, centerY = regionCenter(region)
+                    goldenArea, goldenX, goldenY = golden[cv.toTupleCDSLCount()]
+                    self.assertTrue(abs(area(region) - goldenArea) <= TOLERANCE \
+                                    and abs(centerX - goldenX) <= TOLERANCE \
+                                    and abs(centerY - goldenY) <= TOLERANCE, \
+                                    "%s: %s" % (message, cv))
+
+    def testDegenerate(self):
+        # <4, 0, 5, 0> is only optimal on the bottom edge of the box, and
+        # <6, 1, 2, 3> on the line where two regions meet
+        fileName = os.path.join(TESTFILES, "gopher_louse.newick")
+        CVlist = paretoFront(fileName, 1, 5, 1, 5)
+        regions = getRegions(CVlist, 1, 5, 1, 5, geometry=False)
+        allRegions = getRegions(CVlist, 1, 5, 1, 5, geometry=False, \
+                                degenerate=True)
+        extra = {}
+        for cv in CVlist:
+            if str(cv) in regions:
+                self.assertEqual(regions[str(cv)], allRegions[str(cv)])
+            elif str(cv) in allRegions:
+                extra[cv.toTupleCDSLCount()] = allRegions[str(cv)]
+        self.assertEqual(sorted(extra), [(4, 0, 5, 0, 4), (6, 1, 2, 3, 3)])
+        self.assertEqual(sorted(extra[(4, 0, 5, 0, 4)]), \
+                         [(2.0, 1.0), (5.0, 1.0)])
+        self.assertEqual(len(extra[(6, 1, 2, 3, 3)]), 2)
+
+if __name__ == "__main__":
+    unittest.main()
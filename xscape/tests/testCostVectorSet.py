@@ -0,0 +1,108 @@
+# testCostVectorSet.py
+
+# Checks the shift, merge, coalesceDuplicates and paretoFront methods of
+# CostVectorSet against the CostVector list operations they stand for, on
+# random sets of cost vectors, with counts too large for a machine integer,
+# and with vectors that have the same d, s, and l but different c.  Run it
+# from the xscape directory with "python -m unittest discover tests".
+
+# python libraries
+import os
+import random
+import sys
+import unittest
+
+# xscape libraries
+XSCAPE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, XSCAPE)
+from CostVector import *
+import CostVectorSet
+import reconcile
+from testParetoFilter import minimal, randomCVlist, tuples
+
+# Number of random sets to check
+TRIALS = 500
+
+# A count that does not fit in an int64
+BIG = 2 ** 70
+
+def lexTuples(CVlist):
+    ''' The (c, d, s, l, count) tuples of the list, sorted by d, s, l, and
+        then c. '''
+    return sorted(tuples(CVlist), key=lambda t: (t[1], t[2], t[3], t[0]))
+
+def setOf(CVlist):
+    return CostVectorSet.fromCostVectors(CVlist)
+
+class CostVectorSetTest(unittest.TestCase):
+
+    def testShift(self):
+        rand = random.Random(20)
+        for trial in range(TRIALS):
+            CVlist = randomCVlist(rand)
+            shift = [rand.randint(0, 3) for i in range(4)]
+            expected = CostVector(*(shift + [1])) * CVlist
+            output = setOf(CVlist).shift(*shift).toCostVectors()
+            self.assertEqual(tuples(output), tuples(expected), CVlist)
+
+    def testMerge(self):
+        rand = random.Random(21)
+        for trial in range(TRIALS):
+            CVlist1 = randomCVlist(rand)
+            CVlist2 = randomCVlist(rand)
+            expected = reconcile.merge(CVlist1, CVlist2)
+            output = setOf(CVlist1).merge(setOf(CVlist2)).toCostVectors()
+            self.assertEqual(tuples(output), tuples(expected), \
+                             (CVlist1, CVlist2))
+
+    def testCoalesceDuplicates(self):
+        rand = random.Random(22)
+        for trial in range(TRIALS):
+            CVlist = randomCVlist(rand)
+            expected = reconcile.coalesceDuplicates(CVlist)
+            output = setOf(CVlist).coalesceDuplicates().toCostVectors()
+            # The list is in dictionary order and the set in lexicographic
+            # order of d, s, l, and c
+            self.assertEqual(tuples(output), lexTuples(expected), CVlist)
+
+    def testParetoFront(self):
+        rand = random.Random(23)
+        for trial in range(TRIALS):
+            CVlist = randomCVlist(rand, 12)
+            expected = [cv for cv in reconcile.coalesceDuplicates(CVlist) \
+                        if minimal(cv, CVlist)]
+            output = setOf(CVlist).paretoFront().toCostVectors()
+            self.assertEqual(tuples(output), lexTuples(expected), CVlist)
+
+    def testBigCounts(self):
+        CVset = CostVectorSet.concatenate(\
+            [CostVectorSet.single(1, 0, 1, 2, BIG), \
+             CostVectorSet.single(1, 0, 1, 2, BIG), \
+             CostVectorSet.single(0, 1, 1, 3, BIG - 1)])
+        self.assertEqual(tuples(CVset.shift(1, 0, 0, 0).toCostVectors()), \
+                         [(2, 0, 1, 2, BIG), (2, 0, 1, 2, BIG), \
+                          (1, 1, 1, 3, BIG - 1)])
+        merged = CVset.merge(CostVectorSet.single(0, 0, 0, 1, BIG))
+        self.assertEqual(tuples(merged.toCostVectors()), \
+                         [(1, 0, 1, 3, BIG * BIG), (1, 0, 1, 3, BIG * BIG), \
+                          (0, 1, 1, 4, (BIG - 1) * BIG)])
+        self.assertEqual(tuples(merged.coalesceDuplicates().toCostVectors()), \
+                         [(1, 0, 1, 3, 2 * BIG * BIG), \
+                          (0, 1, 1, 4, (BIG - 1) * BIG)])
+        self.assertEqual(tuples(merged.paretoFront().toCostVectors()), \
+                         [(1, 0, 1, 3, 2 * BIG * BIG)])
+
+    def testTies(self):
+        # Of the vectors with the same d, s, and l, the front keeps the one
+        # with the smallest c, with its own count only
+        CVlist = [CostVector(3, 1, 1, 1, 5), CostVector(1, 1, 1, 1, 7), \
+                  CostVector(2, 1, 1, 1, 11), CostVector(0, 2, 1, 0, 1)]
+        self.assertEqual(tuples(setOf(CVlist).paretoFront().toCostVectors()), \
+                         [(1, 1, 1, 1, 7), (0, 2, 1, 0, 1)])
+        # The list keeps one of them too, with its own count
+        output = tuples(reconcile.paretoFilter(CVlist[:3], 1, 1, 1, 1))
+        self.assertEqual(len(output), 1)
+        self.assertTrue(output[0] in tuples(CVlist[:3]))
+
+if __name__ == "__main__":
+    unittest.main()
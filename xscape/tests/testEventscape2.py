@@ -0,0 +1,168 @@
+# testEventscape2.py
+
+# Checks the CSV file that eventscape2.getInput2 writes against the one the
+# output function it replaced wrote from the events of the old list
+# implementation of reconcileEvents, for the union and the intersection of
+# the events, on the trees of testFiles other than COG0020 over several
+# ranges of switch and loss costs.  The events of a row are compared in
+# sorted order, since the old sets of events had no order.  Also checks that
+# the regions eventscape2 restricts its output to are matched by the (d, s,
+# l) costs of the cost vectors, whatever their c and counts.  Run it from
+# the xscape directory with "python -m unittest discover tests".
+
+# python libraries
+from collections import defaultdict
+from operator import itemgetter
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# xscape libraries
+XSCAPE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, XSCAPE)
+from commonAnalytic import getRegions
+from CostVector import *
+import eventscape2
+from newickFormatReader2 import newickFormatReader
+import reconcile
+import reconcileEvents
+from testReconcile import BOXES, testFiles
+from testReconcileEvents import OldEventReconciler
+
+def oldRestrict(CVlist, switchLo, switchHi, lossLo, lossHi, regions=None):
+    ''' The restrict function of eventscape2 before the regions were keyed
+        by (d, s, l). '''
+    restrictedList = []
+    if regions is None:
+        regions = getRegions(CVlist, switchLo, switchHi, lossLo, lossHi, \
+                             geometry=False)
+    for cv in CVlist:
+        if str(cv) in regions:
+            if cv not in restrictedList:
+                restrictedList.append(cv)
+    return restrictedList
+
+def oldOutput(outfile, CVlist, hostTree, switchMin, switchMax, lossMin, \
+              lossMax, root, old):
+    ''' The output function of eventscape2 before the events were bitsets,
+        with the events of the old reconciler old. '''
+    intersection = old.intersection
+    regions = getRegions(CVlist, switchMin, switchMax, lossMin, lossMax, \
+                         geometry=False)
+    ofile = open(outfile, "wb")
+    writer = csv.writer(ofile, delimiter = ",")
+    optimalCVlist = oldRestrict(CVlist, switchMin, switchMax, lossMin, \
+                                lossMax, regions=regions)
+    allEvents = set()
+    if not intersection:
+        allEventsThisCV = defaultdict(set)
+    for cv in optimalCVlist:
+        outputRow = [cv]
+        thisCV = cv.toTupleCDSL()
+        if not intersection:
+            for eh in hostTree:
+                key = ("pTop", eh) + thisCV
+                events = old.CVallEvents[key]
+                allEventsThisCV[thisCV] |= events
+                allEvents |= events
+                for event in events:
+                    outputRow.append(eventscape2.displayVersion(event, root))
+        else:
+            events = old.CVcommonEvents[thisCV]
+            allEvents |= events
+            for event in events:
+                outputRow.append(eventscape2.displayVersion(event, root))
+        writer.writerow(outputRow)
+    eventsWithCounts = []
+    if not intersection:
+        eventsDict = allEventsThisCV
+    else:
+        eventsDict = old.CVcommonEvents
+    for event in allEvents:
+        eventcount = 0
+        for bestCV in optimalCVlist:
+            if event in eventsDict[bestCV.toTupleCDSL()]:
+                eventcount += 1
+        eventsWithCounts.append((event, eventcount))
+    eventsWithCounts.sort(key = itemgetter(1), reverse = True)
+    maxCounts = len(optimalCVlist)
+    for count in range(maxCounts, 0, -1):
+        row = ["Events in " + str(count) + " regions"]
+        row.extend([eventscape2.displayVersion(event[0], root) \
+                    for event in eventsWithCounts if event[1] == count])
+        writer.writerow(row)
+    ofile.close()
+
+def readRows(fileName):
+    ''' Returns the rows of the given CSV file with the events of each row
+        sorted. '''
+    with open(fileName, "rb") as handle:
+        return [[row[0]] + sorted(row[1:]) for row in csv.reader(handle)]
+
+class EventscapeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testAgainstOld(self):
+        optimalRows = 0
+        for fileName in testFiles():
+            name = os.path.basename(fileName)
+            treeFile = os.path.join(self.directory, name)
+            shutil.copy(fileName, treeFile)
+            csvFile = treeFile[:-len(".newick")] + ".csv"
+            oldFile = os.path.join(self.directory, "old.csv")
+            hostTree, parasiteTree, phi = newickFormatReader(fileName)
+            root = parasiteTree["pTop"][1]
+            for bounds in BOXES:
+                preCVlist = reconcile.reconcile(parasiteTree, hostTree, phi, \
+                                                *bounds)
+                candidates = oldRestrict(preCVlist, *bounds)
+                for UorI in ["U", "I"]:
+                    message = "%s in %s with %s" % (name, bounds, UorI)
+                    old = OldEventReconciler(parasiteTree, hostTree, phi, \
+                                             *(bounds + (candidates, \
+                                                         UorI == "I")))
+                    oldOutput(oldFile, old.reconcile(), hostTree, \
+                              *(bounds + (root, old)))
+                    eventscape2.getInput2(["eventscape2.py", treeFile] + \
+                                          map(str, bounds) + [UorI])
+                    expected = readRows(oldFile)
+                    self.assertEqual(readRows(csvFile), expected, message)
+                    optimalRows += len(candidates)
+        self.assertTrue(optimalRows > 0)
+
+    def testRegionCosts(self):
+        # Regions found for cost vectors with other c and counts pick the
+        # same cost vectors, and so give the same rows
+        fileName = testFiles()[0]
+        hostTree, parasiteTree, phi = newickFormatReader(fileName)
+        bounds = BOXES[0]
+        CVlist = reconcile.reconcile(parasiteTree, hostTree, phi, *bounds)
+        others = [CostVector(cv.c + 1, cv.d, cv.s, cv.l, cv.count + 1) \
+                  for cv in CVlist]
+        regions = eventscape2.costRegions(others, *bounds)
+        optimal = eventscape2.restrict(CVlist, *bounds)
+        self.assertTrue(optimal != [])
+        self.assertEqual(eventscape2.restrict(CVlist, *(bounds + (regions,))), \
+                         optimal)
+        csvFile = os.path.join(self.directory, "regions.csv")
+        otherFile = os.path.join(self.directory, "others.csv")
+        reconciler = reconcileEvents.ParetoEventReconciler(parasiteTree, \
+            hostTree, phi, *(bounds + (optimal,)))
+        CVlist = reconciler.reconcile()
+        eventscape2.output(csvFile, CVlist, hostTree, *bounds, \
+                           reconciler=reconciler)
+        eventscape2.output(otherFile, CVlist, hostTree, *bounds, \
+                           regions=regions, reconciler=reconciler)
+        self.assertEqual(readRows(otherFile), readRows(csvFile))
+        self.assertEqual(len(readRows(csvFile)), 2 * len(optimal))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+# testParetoFilter.py
+
+# Checks the sweep in reconcile.paretoFilter and CostVectorSet.paretoFilter
+# against the paretoFilter it replaced, which kept the vectors of the
+# lexicographic list that minimal() found no other vector dominated, on
+# random lists of cost vectors with many repeated (d, s, l) entries.  Run it
+# from the xscape directory with "python -m unittest discover tests".
+
+# python libraries
+import os
+import random
+import sys
+import unittest
+
+# xscape libraries
+XSCAPE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, XSCAPE)
+from CostVector import *
+import CostVectorSet
+import reconcile
+
+# Number of random lists to check
+TRIALS = 2000
+
+def minimal(v, CVlist):
+    ''' Returns True if v is a minimal element of the CostVector list. '''
+    for w in CVlist:
+        if w < v: return False
+    return True
+
+def oldParetoFilter(CVlist, switchLo, switchHi, lossLo, lossHi):
+    ''' The paretoFilter of reconcile.py before the sweep. '''
+    CVlist = reconcile.CVfilter(CVlist, switchLo, switchHi, lossLo, lossHi)
+    uniqueCVlist = reconcile.coalesceDuplicates(CVlist)
+    uniqueCVlist.sort(CostVector.lex)
+    if len(uniqueCVlist) == 1: return uniqueCVlist
+    lexlist = [uniqueCVlist[0]]
+    for i in range(1, len(uniqueCVlist)):
+        predecessor = uniqueCVlist[i-1]
+        current = uniqueCVlist[i]
+        if predecessor.d < current.d or predecessor.s < current.s:
+            lexlist.append(current)
+    output = []
+    for v in lexlist:
+        if minimal(v, CVlist): output.append(v)
+    return output
+
+def randomCVlist(rand, nodes=None):
+    ''' Returns a random list of CostVectors with small entries, so that
+        many of them share d, s, and l, with some of them repeated.  If
+        nodes is given, c is nodes - d - s, as it is in reconciliations of
+        a parasite tree with that many internal nodes. '''
+    size = rand.randint(1, 40)
+    top = rand.randint(1, 6)
+    CVlist = []
+    for i in range(size):
+        if CVlist != [] and rand.random() < 0.2:
+            cv = rand.choice(CVlist)
+            CVlist.append(CostVector(cv.c, cv.d, cv.s, cv.l, \
+                                     rand.randint(1, 10)))
+        else:
+            d = rand.randint(0, top)
+            s = rand.randint(0, top)
+            if nodes is None:
+                c = rand.randint(0, 2)
+            else:
+                c = nodes - d - s
+            CVlist.append(CostVector(c, d, s, rand.randint(0, top), \
+                                     rand.randint(1, 10)))
+    rand.shuffle(CVlist)
+    return CVlist
+
+def randomRange(rand):
+    ''' Returns random (switchLo, switchHi, lossLo, lossHi) bounds. '''
+    switchLo = rand.choice([0, 1, rand.uniform(0, 2)])
+    lossLo = rand.choice([0, 1, rand.uniform(0, 2)])
+    return switchLo, switchLo + rand.choice([0, 1, 4, rand.uniform(0, 5)]), \
+           lossLo, lossLo + rand.choice([0, 1, 4, rand.uniform(0, 5)])
+
+def tuples(CVlist):
+    return [cv.toTupleCDSLCount() for cv in CVlist]
+
+class ParetoFilterTest(unittest.TestCase):
+
+    def testAgainstMinimal(self):
+        rand = random.Random(15)
+        for trial in range(TRIALS):
+            CVlist = randomCVlist(rand)
+            bounds = randomRange(rand)
+            message = "%s in %s" % (CVlist, bounds)
+            expected = oldParetoFilter(CVlist, *bounds)
+            output = reconcile.paretoFilter(CVlist, *bounds)
+            self.assertEqual(tuples(output), tuples(expected), message)
+
+    def testCounts(self):
+        rand = random.Random(16)
+        for trial in range(TRIALS):
+            CVlist = randomCVlist(rand)
+            bounds = randomRange(rand)
+            message = "%s in %s" % (CVlist, bounds)
+            totals = {}
+            for cv in CVlist:
+                key = cv.toTupleCDSL()
+                totals[key] = totals.get(key, 0) + cv.count
+            output = reconcile.paretoFilter(CVlist, *bounds)
+            keys = [cv.toTupleCDSL() for cv in output]
+            self.assertEqual(len(set(keys)), len(keys), message)
+            for cv in output:
+                self.assertEqual(cv.count, totals[cv.toTupleCDSL()], message)
+
+    def testCostVectorSet(self):
+        # Of the vectors with the same d, s, and l but different c, the
+        # list keeps the first in dictionary order and the set the one with
+        # the smallest c, so c is made to depend on d and s as it does in a
+        # reconciliation
+        rand = random.Random(17)
+        for trial in range(TRIALS):
+            CVlist = randomCVlist(rand, 12)
+            bounds = randomRange(rand)
+            message = "%s in %s" % (CVlist, bounds)
+            expected = oldParetoFilter(CVlist, *bounds)
+            output = CostVectorSet.fromCostVectors(CVlist).\
+                     paretoFilter(*bounds).toCostVectors()
+            self.assertEqual(tuples(output), tuples(expected), message)
+
+    def testEmpty(self):
+        self.assertEqual(reconcile.paretoFilter([], 1, 5, 1, 5), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,235 @@
+# testPlotsig2.py
+
+# Checks the p-value grid of plotsig2.plotsig against getBestCV at each point
+# of the grid, as the original sigscape computed it, and when
+# plotsig2.colorsSettled stops the adaptive sigscape trials of
+# sigscape2.adaptiveTrials: a grid whose colors are obvious, green ones
+# included, has to settle before the largest number of trials.  Run it from
+# the xscape directory with "python -m unittest discover tests".
+
+# python libraries
+import os
+import random
+import sys
+import tempfile
+import unittest
+import warnings
+from StringIO import StringIO
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+
+# xscape libraries
+XSCAPE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, XSCAPE)
+from common import *
+from CostVector import *
+from newickFormatReader2 import newickFormatReader
+import plotsig2
+import reconcile
+import sigscape2
+
+# Trees with two tips, whose only other tip mapping is the mirror image of
+# the original one and costs the same, so that every p-value is 1
+TWO_TIPS = "(h1,h2)h0;\n(p1,p2)p0;\np1:h1\np2:h2\n"
+
+# Matching ladder trees with seven tips.  Of the 5040 random tip mappings,
+# only the original one and the one that swaps p1 and p2 are as cheap, so
+# that in practice every p-value is 0
+LADDER = "((((((h1,h2)h9,h3)h10,h4)h11,h5)h12,h6)h13,h7)h0;\n" + \
+         "((((((p1,p2)p9,p3)p10,p4)p11,p5)p12,p6)p13,p7)p0;\n" + \
+         "".join(["p%d:h%d\n" % (i, i) for i in range(1, 8)])
+
+# Number of random original tip mappings to check for each grid
+CASES = 20
+
+# Number of trials for each of them
+TRIALS = 100
+
+def oldCounter(CVlist, randomTrialsCVlist, xs, ys):
+    ''' The number of trials whose best cost is more than the best cost of
+        CVlist at each point of the grid, found with getBestCV at each point
+        as plotsig did before it computed the whole grid at once. '''
+    counter = np.zeros((len(xs), len(ys)), dtype=int)
+    for i, x in enumerate(xs):
+        for j, y in enumerate(ys):
+            junkIndex, junkCV, bestOriginal = getBestCV(CVlist, x, y)
+            for trialCVlist in randomTrialsCVlist:
+                junkIndex, junkCV, bestThisTrial = getBestCV(trialCVlist, x, y)
+                if bestOriginal < bestThisTrial: counter[i, j] += 1
+    return counter
+
+def oldText(counter, numTrials):
+    ''' The statistics plotsig writes for the given counter, counted point
+        by point as plotsig did before it computed the whole grid at
+        once. '''
+    greenCounter = yellowCounter = redCounter = 0
+    for count in counter.flat:
+        pValue = 1.0 - 1.0 * count / numTrials
+        if pValue < 0.01:
+            greenCounter += 1
+        elif 0.01 <= pValue < 0.05:
+            yellowCounter += 1
+        else:
+            redCounter += 1
+    totalSamples = counter.size
+    return "Using "+ str(numTrials)+ " trials \n" + \
+           "  Percentage green (p-value < 0.01):" + \
+           str(100.0 * greenCounter / totalSamples) + "\n" + \
+           "  Percentage yellow (0.01 <= p-value < 0.05):" + \
+           str(100.0 * yellowCounter / totalSamples) + "\n" + \
+           "  Percentage red (0.05 <= p-value):" + \
+           str(100.0 * redCounter / totalSamples) + "\n"
+
+def randomCVlist(rng):
+    ''' Returns a random list of CostVectors with small costs, where some
+        (d, l, s) costs come up more than once and one vector may have INF
+        costs. '''
+    CVlist = []
+    for i in range(rng.randint(1, 6)):
+        d, s, l = rng.randint(0, 6), rng.randint(0, 6), rng.randint(0, 6)
+        CVlist.append(CostVector(0, d, s, l, rng.randint(1, 3)))
+    for i in range(rng.randint(1, 3)):
+        cv = rng.choice(CVlist)
+        CVlist.append(CostVector(cv.c + 1, cv.d, cv.s, cv.l, cv.count + 1))
+    if rng.random() < 0.3:
+        CVlist.append(CostVector(INF, INF, INF, INF, 1))
+    rng.shuffle(CVlist)
+    return CVlist
+
+def randomTrials(CVlist, rng):
+    ''' Returns TRIALS CostVector lists, most of which cost one more than
+        CVlist everywhere, and a random number of which are random, so that
+        the grid has points of every color. '''
+    numRandom = rng.choice([0, 1, 3, 10, 50])
+    trials = []
+    for n in range(TRIALS):
+        if n < numRandom:
+            trials.append(randomCVlist(rng))
+        else:
+            trials.append([CostVector(cv.c, cv.d + 1, cv.s, cv.l, cv.count) \
+                           for cv in CVlist])
+    rng.shuffle(trials)
+    return trials
+
+class PlotsigTest(unittest.TestCase):
+
+    def checkGrid(self, switchMin, switchMax, lossMin, lossMax, steps, log):
+        rng = random.Random(steps)
+        xs = frange(lossMin, lossMax, steps, log=log)
+        ys = frange(switchMin, switchMax, steps, log=log)
+        handle, outtext = tempfile.mkstemp()
+        os.close(handle)
+        colors = set()
+        try:
+            for case in range(CASES):
+                CVlist = randomCVlist(rng)
+                trials = randomTrials(CVlist, rng)
+                counter = oldCounter(CVlist, trials, xs, ys)
+                self.assertTrue(np.array_equal(plotsig2.trialCounter(CVlist, \
+                                trials, xs, ys), counter))
+                open(outtext, "w").close()
+                plotsig2.plotsig(CVlist, trials, switchMin, switchMax, \
+                                 lossMin, lossMax, steps, "", outtext, log=log)
+                plt.close("all")
+                self.assertEqual(open(outtext).read(), \
+                                 oldText(counter, TRIALS))
+                pValue = 1.0 - 1.0 * counter / TRIALS
+                colors.update([int(pValue.min() >= 0.01) + \
+                               int(pValue.min() >= 0.05), \
+                               int(pValue.max() >= 0.01) + \
+                               int(pValue.max() >= 0.05)])
+        finally:
+            os.remove(outtext)
+        # green, yellow and red points all come up
+        self.assertEqual(colors, set([0, 1, 2]))
+
+    def testLogGrid(self):
+        self.checkGrid(0.1, 10, 0.1, 10, 12, True)
+
+    def testLinearGrid(self):
+        self.checkGrid(0, 5, 0, 5, 10, False)
+
+class ColorsSettledTest(unittest.TestCase):
+
+    def testZeroPValues(self):
+        # Every trial costs more than the original tip mapping at every
+        # point of a 101 x 101 grid, checked after every batch of 100 of at
+        # most 10000 trials
+        numLooks = 100
+        minTrials = plotsig2.minSettledTrials(0.99, numLooks)
+        self.assertTrue(minTrials < 1000)
+        stop = None
+        for numTrials in range(100, 10001, 100):
+            counter = np.zeros((101, 101), dtype=int) + numTrials
+            if plotsig2.colorsSettled(counter, numTrials, 0.99, numLooks):
+                stop = numTrials
+                break
+        self.assertEqual(stop, (minTrials + 99) // 100 * 100)
+
+    def testMinSettledTrials(self):
+        for numLooks in [1, 10, 100]:
+            minTrials = plotsig2.minSettledTrials(0.99, numLooks)
+            counter = np.zeros((11, 11), dtype=int)
+            self.assertTrue(plotsig2.colorsSettled(counter + minTrials, \
+                            minTrials, 0.99, numLooks))
+            self.assertFalse(plotsig2.colorsSettled(counter + minTrials - 1, \
+                             minTrials - 1, 0.99, numLooks))
+
+    def testUndecided(self):
+        # The p-value is 0.5 at one point, which is settled, and 0.01 at the
+        # others, right on a color boundary, which never are
+        counter = np.zeros((11, 11), dtype=int) + 99000
+        counter[5, 5] = 50000
+        self.assertFalse(plotsig2.colorsSettled(counter, 100000, 0.99, 100))
+
+    def testAdaptiveTrials(self):
+        hostTree, parasiteTree, phi = newickFormatReader(StringIO(TWO_TIPS))
+        CVlist = reconcile.reconcile(parasiteTree, hostTree, phi, 1, 5, 1, 5)
+        output = sigscape2.adaptiveTrials(parasiteTree, hostTree, phi, \
+                                          CVlist, 1000, 1, 5, 1, 5, 10, \
+                                          batchSize=10, numWorkers=1, \
+                                          seed=1, verbose=False)
+        self.assertEqual(len(output), 10)
+
+    def testGreenStopsEarly(self):
+        # With the usual 1000 trials in batches of 100, a grid of green
+        # points settles at the first batch after minSettledTrials
+        hostTree, parasiteTree, phi = newickFormatReader(StringIO(LADDER))
+        CVlist = reconcile.reconcile(parasiteTree, hostTree, phi, 1, 5, 1, 5)
+        output = sigscape2.adaptiveTrials(parasiteTree, hostTree, phi, \
+                                          CVlist, 1000, 1, 5, 1, 5, 5, \
+                                          batchSize=100, numWorkers=2, \
+                                          seed=1, verbose=False)
+        minTrials = plotsig2.minSettledTrials(0.99, 10)
+        self.assertEqual(len(output), (minTrials + 99) // 100 * 100)
+        self.assertTrue(len(output) < 1000)
+        xs = frange(1, 5, 5, log=True)
+        ys = frange(1, 5, 5, log=True)
+        counter = plotsig2.trialCounter(CVlist, output, xs, ys)
+        self.assertTrue((counter == len(output)).all())
+
+    def testWarning(self):
+        # A p-value below 0.01 cannot settle in 500 trials, though a grid
+        # of p-values of 1 still settles at the first batch
+        hostTree, parasiteTree, phi = newickFormatReader(StringIO(TWO_TIPS))
+        CVlist = reconcile.reconcile(parasiteTree, hostTree, phi, 1, 5, 1, 5)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            output = sigscape2.adaptiveTrials(parasiteTree, hostTree, phi, \
+                                              CVlist, 500, 1, 5, 1, 5, 10, \
+                                              batchSize=100, numWorkers=1, \
+                                              seed=1, verbose=False)
+        self.assertEqual(len(output), 100)
+        self.assertEqual(len(caught), 1)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            sigscape2.adaptiveTrials(parasiteTree, hostTree, phi, CVlist, \
+                                     1000, 1, 5, 1, 5, 10, batchSize=100, \
+                                     numWorkers=1, seed=1, verbose=False)
+        self.assertEqual(caught, [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,249 @@
+# testReconcile.py
+
+# Checks reconcile.reconcile against the list implementation it replaced,
+# which kept the A, C, and Best tables as lists of CostVectors and found the
+# landing sites of a switch from lists of the ancestors and descendants of
+# each host edge, on the trees of testFiles other than COG0020 over several
+# ranges of switch and loss costs, with the tables filled by each of
+# reconcile.SOLVERS.  It also checks the comparable host edges found from
+# reconcile.eulerIntervals and the fronts of the switches found from the
+# root of the host tree down against those lists, and that the randomization
+# trials of sigscape, which share a reconcile.ParetoProblem, give the same
+# solutions as reconcile.reconcile with the same random tip mapping.  Run it
+# from the xscape directory with "python -m unittest discover tests".
+
+# python libraries
+import glob
+import os
+import random
+import sys
+import unittest
+
+import matplotlib
+matplotlib.use("Agg")
+
+# xscape libraries
+XSCAPE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, XSCAPE)
+from common import *
+from CostVector import *
+from newickFormatReader2 import newickFormatReader
+import reconcile
+import sigscape2
+from testParetoFilter import oldParetoFilter
+
+# (switchLo, switchHi, lossLo, lossHi) ranges to test.  The lower bounds are
+# above 0, since the old paretoFilter fails on a list of infeasible vectors
+# when one of them is 0.
+BOXES = [(1, 5, 1, 5), (0.5, 2, 0.5, 2), (2, 3, 0.2, 1)]
+
+# Number of random tip mappings to test for each tree and cost range
+TRIALS = 3
+
+def testFiles():
+    ''' Returns the names of the newick files of testFiles other than
+        COG0020, sorted. '''
+    fileNames = glob.glob(os.path.join(os.path.dirname(XSCAPE), \
+                                       "testFiles", "*.newick"))
+    return sorted(fileName for fileName in fileNames \
+                  if os.path.basename(fileName) != "COG0020.newick")
+
+def tuples(CVlist):
+    return [cv.toTupleCDSLCount() for cv in CVlist]
+
+def descendants(edge, tree):
+    ''' returns the list of descendant edges of the given edge in the
+        given tree.'''
+    if reconcile.tipEdge(edge, tree): return []
+    else: return [reconcile.leftChildEdge(edge, tree), \
+                  reconcile.rightChildEdge(edge, tree)] + \
+                 descendants(reconcile.leftChildEdge(edge, tree), tree) + \
+                 descendants(reconcile.rightChildEdge(edge, tree), tree)
+
+def ancestorsAndDescendants(tree):
+    ''' Returns two dictionaries A and D, where A[e] is the list of
+        ancestral edges of e and D[e] is the list of descendant edges of
+        e. '''
+    Descendants = {}
+    Ancestors = {}
+    for e in tree:
+        Descendants[e] = descendants(e, tree)
+    for e in tree: Ancestors[e] = []
+    for e in tree:
+        for d in Descendants[e]: # d descendant of e => e ancestor of d
+            Ancestors[d].append(e)
+    return Ancestors, Descendants
+
+class OldReconciler:
+    ''' The reconcile module before ParetoReconciler, with its module
+        globals kept on the instance. '''
+
+    def __init__(self, parasiteTree, hostTree, phi, smin, smax, lmin, lmax):
+        self.parasiteTree = parasiteTree
+        self.hostTree = hostTree
+        self.phi = phi
+        self.bounds = (smin, smax, lmin, lmax)
+        self.Amemo = {}; self.Cmemo = {}; self.Bestmemo = {}
+        self.Ancestors, self.Descendants = ancestorsAndDescendants(hostTree)
+
+    def reconcile(self):
+        solutions = []
+        for eh in self.hostTree:
+            solutions.extend(self.C("pTop", eh))
+        return self.paretoFilter(solutions)
+
+    def A(self, ep, eh):
+        if (ep, eh) in self.Amemo: return self.Amemo[(ep, eh)]
+        parasiteTree = self.parasiteTree
+        hostTree = self.hostTree
+        if reconcile.tipEdge(eh, hostTree):
+            if reconcile.tipEdge(ep, parasiteTree) and \
+               self.phi[reconcile.endVertex(ep, parasiteTree)] == \
+               reconcile.endVertex(eh, hostTree):
+                return [CostVector(0, 0, 0, 0, 1)]
+            else:
+                return [CostVector(INF, INF, INF, INF, 0)]
+        else:
+            ehLeftChild = reconcile.leftChildEdge(eh, hostTree)
+            ehRightChild = reconcile.rightChildEdge(eh, hostTree)
+            if reconcile.tipEdge(ep, parasiteTree):
+                cospeciation = [CostVector(INF, INF, INF, INF, 0)]
+            else:
+                epLeftChild = reconcile.leftChildEdge(ep, parasiteTree)
+                epRightChild = reconcile.rightChildEdge(ep, parasiteTree)
+                cospeciation1 = CostVector(1, 0, 0, 0, 1) * \
+                  reconcile.merge(self.C(epLeftChild, ehLeftChild), \
+                                  self.C(epRightChild, ehRightChild))
+                cospeciation2 = CostVector(1, 0, 0, 0, 1) * \
+                  reconcile.merge(self.C(epLeftChild, ehRightChild), \
+                                  self.C(epRightChild, ehLeftChild))
+                cospeciation = cospeciation1 + cospeciation2
+            loss1 = CostVector(0, 0, 0, 1, 1) * self.C(ep, ehLeftChild)
+            loss2 = CostVector(0, 0, 0, 1, 1) * self.C(ep, ehRightChild)
+            output = self.paretoFilter(cospeciation + loss1 + loss2)
+            self.Amemo[(ep, eh)] = output
+            return output
+
+    def C(self, ep, eh):
+        if (ep, eh) in self.Cmemo: return self.Cmemo[(ep, eh)]
+        passThrough = self.A(ep, eh)
+        if reconcile.tipEdge(ep, self.parasiteTree):
+            return passThrough
+        else:
+            epLeftChild = reconcile.leftChildEdge(ep, self.parasiteTree)
+            epRightChild = reconcile.rightChildEdge(ep, self.parasiteTree)
+            duplicate = CostVector(0, 1, 0, 0, 1) * \
+                        reconcile.merge(self.C(epLeftChild, eh), \
+                                        self.C(epRightChild, eh))
+            switch1 = CostVector(0, 0, 1, 0, 1) * \
+                      reconcile.merge(self.C(epLeftChild, eh), \
+                                      self.switches(epRightChild, eh))
+            switch2 = CostVector(0, 0, 1, 0, 1) * \
+                      reconcile.merge(self.C(epRightChild, eh), \
+                                      self.switches(epLeftChild, eh))
+        output = self.paretoFilter(passThrough + duplicate + switch1 + \
+                                   switch2)
+        self.Cmemo[(ep, eh)] = output
+        return output
+
+    def switches(self, ep, eh):
+        ''' Returns the list of all CostVectors in which ep switches from eh
+            to every valid landing site. '''
+        if (ep, eh) in self.Bestmemo: return self.Bestmemo[(ep, eh)]
+        output = []
+        for switchEdge in self.hostTree:
+            if switchEdge != eh and switchEdge not in self.Ancestors[eh] and \
+               switchEdge not in self.Descendants[eh]:
+                output.extend(self.C(ep, switchEdge))
+        self.Bestmemo[(ep, eh)] = output
+        return output
+
+    def paretoFilter(self, CVlist):
+        return oldParetoFilter(CVlist, *self.bounds)
+
+class ReconcileTest(unittest.TestCase):
+
+    def testAgainstOld(self):
+        for fileName in testFiles():
+            name = os.path.basename(fileName)
+            hostTree, parasiteTree, phi = newickFormatReader(fileName)
+            for bounds in BOXES:
+                message = "%s in %s" % (name, bounds)
+                expected = OldReconciler(parasiteTree, hostTree, phi, \
+                                         *bounds).reconcile()
+                # Every solver gives the old solutions, and so the same ones
+                for solver in reconcile.SOLVERS:
+                    output = reconcile.reconcile(parasiteTree, hostTree, \
+                                                 phi, *(bounds + (solver,)))
+                    self.assertEqual(tuples(output), tuples(expected), \
+                                     message + " by " + solver)
+
+    def testComparable(self):
+        for fileName in testFiles():
+            hostTree = newickFormatReader(fileName)[0]
+            Ancestors, Descendants = ancestorsAndDescendants(hostTree)
+            intervals = reconcile.eulerIntervals(hostTree)
+            for edge1 in hostTree:
+                for edge2 in hostTree:
+                    expected = edge1 == edge2 or edge2 in Ancestors[edge1] or \
+                               edge2 in Descendants[edge1]
+                    self.assertEqual(reconcile.comparable(edge1, edge2, \
+                                                          intervals), \
+                                     expected, (fileName, edge1, edge2))
+
+    def testSwitches(self):
+        # The Pareto front of the landing sites found from the root of the
+        # host tree down, in the cost range, is that of the list of every
+        # landing site of the old switches
+        for fileName in testFiles():
+            name = os.path.basename(fileName)
+            hostTree, parasiteTree, phi = newickFormatReader(fileName)
+            for bounds in BOXES:
+                old = OldReconciler(parasiteTree, hostTree, phi, *bounds)
+                old.reconcile()
+                for solver in reconcile.SOLVERS:
+                    reconciler = reconcile.ParetoReconciler(parasiteTree, \
+                        hostTree, phi, *(bounds + (solver,)))
+                    reconciler.reconcile()
+                    for (ep, eh), CVlist in old.Bestmemo.items():
+                        message = "%s in %s by %s at %s" % \
+                                  (name, bounds, solver, (ep, eh))
+                        output = reconciler.paretoFilterSet(\
+                            reconciler.switches(ep, eh))
+                        if CVlist == []:
+                            # eh is the root of the host tree
+                            self.assertEqual(len(output), 0, message)
+                        else:
+                            self.assertEqual(\
+                                tuples(output.toCostVectors()), \
+                                tuples(old.paretoFilter(CVlist)), message)
+
+    def testWithPhi(self):
+        # A randomization trial of sigscape, which fills in only the tables
+        # of the internal parasite edges of a ParetoProblem shared with the
+        # trials before it, gives the solutions of a fresh reconciliation
+        # with the same random tip mapping
+        for fileName in testFiles():
+            name = os.path.basename(fileName)
+            hostTree, parasiteTree, phi = newickFormatReader(fileName)
+            parasiteTips, hostTips = sigscape2.getTipLists(parasiteTree, \
+                                                           hostTree, phi)
+            for bounds in BOXES:
+                for solver in reconcile.SOLVERS:
+                    problem = reconcile.ParetoProblem(parasiteTree, \
+                        hostTree, *(bounds + (solver,)))
+                    for seed in range(TRIALS):
+                        message = "%s in %s by %s with seed %d" % \
+                                  (name, bounds, solver, seed)
+                        newPhi = sigscape2.randomizeTips(\
+                            list(parasiteTips), list(hostTips), \
+                            random.Random(seed))
+                        expected = reconcile.reconcile(parasiteTree, \
+                            hostTree, newPhi, *(bounds + (solver,)))
+                        output = sigscape2.runTrial(problem, parasiteTips, \
+                                                    hostTips, seed)
+                        self.assertEqual(tuples(output), tuples(expected), \
+                                         message)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,296 @@
+# testReconcileEvents.py
+
+# Checks reconcileEvents.reconcileEvents against the list implementation it
+# replaced, which kept its tables in module globals and the events of each
+# solution as sets of tuples, on the trees of testFiles other than COG0020
+# over several ranges of switch and loss costs, with the Pareto optimal cost
+# vectors as candidates, as eventscape gives them, and for the smaller
+# trees without candidates, with the tables filled by each of
+# reconcile.SOLVERS.  The sets of events, now bitsets, have to decode to
+# the same events, for the union and for the intersection of the events of
+# the solutions with each cost vector.  Run it from the xscape directory with
+# "python -m unittest discover tests".
+
+# python libraries
+from collections import defaultdict
+import os
+import sys
+import unittest
+
+# xscape libraries
+XSCAPE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, XSCAPE)
+from common import *
+from CostVector import *
+from newickFormatReader2 import newickFormatReader
+import reconcile
+import reconcileEvents
+from testParetoFilter import oldParetoFilter
+from testReconcile import BOXES, testFiles, tuples, ancestorsAndDescendants
+
+# Largest number of host edges of the trees to test without candidates, for
+# which the sets of events of the old implementation take little time and
+# memory
+SMALL = 20
+
+# The solvers and whether to find the intersection of the events to test
+# each case with.  The union of the events is found either way.
+RUNS = [("memo", False), ("memo", True), ("bottomup", True)]
+
+class OldEventReconciler:
+    ''' The reconcileEvents module before ParetoEventReconciler, with its
+        module globals, CandidateCVlist and CONFIG.intersection kept on the
+        instance. '''
+
+    def __init__(self, parasiteTree, hostTree, phi, smin, smax, lmin, lmax, \
+                 candidates, intersection):
+        self.parasiteTree = parasiteTree
+        self.hostTree = hostTree
+        self.phi = phi
+        self.bounds = (smin, smax, lmin, lmax)
+        self.CandidateCVlist = candidates
+        self.intersection = intersection
+        self.Amemo = {}; self.Cmemo = {}; self.Bestmemo = {}
+        self.Ancestors, self.Descendants = ancestorsAndDescendants(hostTree)
+        self.CVevents = defaultdict(set)
+        self.CVallEvents = defaultdict(set)
+        self.CVseen = defaultdict(bool)
+        self.CVcommonEvents = defaultdict(set)
+
+    def reconcile(self):
+        solutions = []
+        for eh in self.hostTree:
+            solutions.extend(self.C("pTop", eh))
+        return self.paretoFilter(solutions)
+
+    def A(self, ep, eh):
+        if (ep, eh) in self.Amemo: return self.Amemo[(ep, eh)]
+        parasiteTree = self.parasiteTree
+        hostTree = self.hostTree
+        if reconcile.tipEdge(eh, hostTree):
+            if reconcile.tipEdge(ep, parasiteTree) and \
+               self.phi[reconcile.endVertex(ep, parasiteTree)] == \
+               reconcile.endVertex(eh, hostTree):
+                return [CostVector(0, 0, 0, 0, 1)]
+            else:
+                return [CostVector(INF, INF, INF, INF, 0)]
+        else:
+            ehLeftChild = reconcile.leftChildEdge(eh, hostTree)
+            ehRightChild = reconcile.rightChildEdge(eh, hostTree)
+            if reconcile.tipEdge(ep, parasiteTree):
+                cospeciation = [CostVector(INF, INF, INF, INF, 0)]
+            else:
+                epLeftChild = reconcile.leftChildEdge(ep, parasiteTree)
+                epRightChild = reconcile.rightChildEdge(ep, parasiteTree)
+                cospeciation1 = self.merge(self.C(epLeftChild, ehLeftChild), \
+                                           self.C(epRightChild, ehRightChild), \
+                                           ep, eh, epLeftChild, ehLeftChild, \
+                                           epRightChild, ehRightChild, \
+                                           "cospeciation")
+                cospeciation2 = self.merge(self.C(epLeftChild, ehRightChild), \
+                                           self.C(epRightChild, ehLeftChild), \
+                                           ep, eh, epLeftChild, ehRightChild, \
+                                           epRightChild, ehLeftChild, \
+                                           "cospeciation")
+                cospeciation = cospeciation1 + cospeciation2
+            loss1 = self.lossmerge(ep, eh, ehLeftChild, \
+                                   self.C(ep, ehLeftChild))
+            loss2 = self.lossmerge(ep, eh, ehRightChild, \
+                                   self.C(ep, ehRightChild))
+            output = self.paretoFilter(cospeciation + loss1 + loss2)
+            self.Amemo[(ep, eh)] = output
+            return output
+
+    def C(self, ep, eh):
+        if (ep, eh) in self.Cmemo: return self.Cmemo[(ep, eh)]
+        passThrough = self.A(ep, eh)
+        if reconcile.tipEdge(ep, self.parasiteTree):
+            return passThrough
+        else:
+            epLeftChild = reconcile.leftChildEdge(ep, self.parasiteTree)
+            epRightChild = reconcile.rightChildEdge(ep, self.parasiteTree)
+            duplicate = self.merge(self.C(epLeftChild, eh), \
+                                   self.C(epRightChild, eh), \
+                                   ep, eh, epLeftChild, eh, \
+                                   epRightChild, eh, "duplication")
+            switch = []
+            leftCVlist = self.C(epLeftChild, eh)
+            for (switchEdge, rightCVlist) in self.allSwitches(epRightChild, eh):
+                switch.extend(self.merge(leftCVlist, rightCVlist, \
+                                         ep, eh, epLeftChild, eh, epRightChild, \
+                                         switchEdge, "switch"))
+            leftCVlist = self.C(epRightChild, eh)
+            for (switchEdge, rightCVlist) in self.allSwitches(epLeftChild, eh):
+                switch.extend(self.merge(leftCVlist, rightCVlist, \
+                                         ep, eh, epRightChild, eh, epLeftChild, \
+                                         switchEdge, "switch"))
+        output = self.paretoFilter(passThrough + duplicate + switch)
+        self.Cmemo[(ep, eh)] = output
+        return output
+
+    def merge(self, CVlist1, CVlist2, ep, eh, epChild1, ehChild1, epChild2, \
+              ehChild2, eventType):
+        CVevents = self.CVevents
+        CVallEvents = self.CVallEvents
+        output = []
+        for v in CVlist1:
+            for w in CVlist2:
+                if eventType == "cospeciation":
+                    newCV = CostVector(1, 0, 0, 0, 1) + v + w
+                elif eventType == "duplication":
+                    newCV = CostVector(0, 1, 0, 0, 1) + v + w
+                else:   # eventType == "switch":
+                    newCV = CostVector(0, 0, 1, 0, 1) + v + w
+                keepnewCV = True
+                for cv in self.CandidateCVlist:
+                    if cv < newCV:
+                        keepnewCV = False
+                        break
+                if keepnewCV:
+                    output.append(newCV)
+                    vsoln = (epChild1, ehChild1) + v.toTupleCDSL()
+                    wsoln = (epChild2, ehChild2) + w.toTupleCDSL()
+                    if eventType == "switch": eventType = "switch to "+str(ehChild2)
+                    nswe = (ep, eh, eventType) + newCV.toTupleCDSL()
+                    ns = (ep, eh) + newCV.toTupleCDSL()
+                    CVevents[nswe].add(nswe)
+                    CVevents[nswe] = CVevents[nswe].\
+                                     union(CVallEvents[vsoln]).\
+                                     union(CVallEvents[wsoln])
+                    CVallEvents[ns] = CVallEvents[ns].union(CVevents[nswe])
+                    if self.intersection:
+                        self.intersect(newCV, CVevents[nswe])
+        return output
+
+    def lossmerge(self, ep, eh, ehChild, CVlist):
+        CVevents = self.CVevents
+        CVallEvents = self.CVallEvents
+        output = []
+        for v in CVlist:
+            newCV = CostVector(0, 0, 0, 1, 1) + v
+            keepnewCV = True
+            for cv in self.CandidateCVlist:
+                if cv < newCV:
+                    keepnewCV = False
+                    break
+            if keepnewCV:
+                output.append(newCV)
+                vsoln = (ep, ehChild) + v.toTupleCDSL()
+                nswe = (ep, eh, "loss "+str(ehChild)) + newCV.toTupleCDSL()
+                ns = (ep, eh) + newCV.toTupleCDSL()
+                CVevents[nswe].add(nswe)
+                CVevents[nswe] = CVevents[nswe].union(CVallEvents[vsoln])
+                CVallEvents[ns] = CVallEvents[ns].union(CVevents[nswe])
+                if self.intersection:
+                    self.intersect(newCV, CVevents[nswe])
+        return output
+
+    def intersect(self, newCV, events):
+        key = newCV.toTupleCDSL()
+        if self.CVseen[key]:
+            self.CVcommonEvents[key] = self.CVcommonEvents[key].\
+                                       intersection(events)
+        else:
+            self.CVcommonEvents[key] = events
+            self.CVseen[key] = True
+
+    def allSwitches(self, ep, eh):
+        if (ep, eh) in self.Bestmemo: return self.Bestmemo[(ep, eh)]
+        output = []
+        for switchEdge in self.hostTree:
+            if switchEdge != eh and switchEdge not in self.Ancestors[eh] and \
+               switchEdge not in self.Descendants[eh]:
+                output.append((switchEdge, self.C(ep, switchEdge)))
+        self.Bestmemo[(ep, eh)] = output
+        return output
+
+    def paretoFilter(self, CVlist):
+        if CVlist == []: return []
+        return oldParetoFilter(CVlist, *self.bounds)
+
+class ReconcileEventsTest(unittest.TestCase):
+
+    def cases(self):
+        ''' Yields the message, trees, tip mapping, cost range and
+            candidates of each case. '''
+        for fileName in testFiles():
+            name = os.path.basename(fileName)
+            hostTree, parasiteTree, phi = newickFormatReader(fileName)
+            for bounds in BOXES:
+                optimal = reconcile.reconcile(parasiteTree, hostTree, phi, \
+                                              *bounds)
+                if len(hostTree) <= SMALL:
+                    candidateLists = [[], optimal]
+                else:
+                    candidateLists = [optimal]
+                for candidates in candidateLists:
+                    message = "%s in %s with %d candidates" % \
+                              (name, bounds, len(candidates))
+                    yield message, parasiteTree, hostTree, phi, bounds, \
+                          candidates
+
+    def testAgainstOld(self):
+        intersection = reconcileEvents.CONFIG.intersection
+        candidates = reconcileEvents.CandidateCVlist[:]
+        try:
+            for message, parasiteTree, hostTree, phi, bounds, CVs in \
+                self.cases():
+                old = OldEventReconciler(parasiteTree, hostTree, phi, \
+                                         *(bounds + (CVs, True)))
+                expected = old.reconcile()
+                reconcileEvents.CandidateCVlist[:] = CVs
+                for solver, common in RUNS:
+                    reconcileEvents.CONFIG.intersection = common
+                    output = reconcileEvents.reconcileEvents(\
+                        parasiteTree, hostTree, phi, *(bounds + (solver,)))
+                    caseMessage = "%s by %s with intersection %s" % \
+                                  (message, solver, common)
+                    self.assertEqual(tuples(output), tuples(expected), \
+                                     caseMessage)
+                    self.checkEvents(old, common, caseMessage)
+        finally:
+            reconcileEvents.CONFIG.intersection = intersection
+            reconcileEvents.CandidateCVlist[:] = candidates
+
+    def checkEvents(self, old, common, message):
+        ''' Checks that the sets of events left in reconcileEvents by its
+            last call hold the events of the sets of the old reconciler,
+            leaving out the empty sets that looking up a missing key adds
+            to either.  The sets eventscape displays, those of the root of
+            the parasite tree and the common ones, are decoded with
+            decodeEvents, and the others compared with the old sets turned
+            into bitsets.  The common events are only compared if common is
+            True, and must be empty otherwise. '''
+        events = reconcileEvents.Events
+        self.assertEqual(len(set(events)), len(events), message)
+        bits = {}
+        for i, event in enumerate(events):
+            bits[event] = 1 << i
+        tables = [(reconcileEvents.CVevents, old.CVevents), \
+                  (reconcileEvents.CVallEvents, old.CVallEvents)]
+        if common:
+            tables.append((reconcileEvents.CVcommonEvents, \
+                           old.CVcommonEvents))
+            self.assertEqual(set(key for key in reconcileEvents.CVseen \
+                                 if reconcileEvents.CVseen[key]), \
+                             set(key for key in old.CVseen \
+                                 if old.CVseen[key]), message)
+        else:
+            self.assertFalse(any(reconcileEvents.CVcommonEvents.values()), \
+                             message)
+        for bitsets, eventSets in tables:
+            output = dict((key, bitsets[key]) for key in bitsets \
+                          if bitsets[key])
+            expected = {}
+            for key, eventSet in eventSets.items():
+                if eventSet:
+                    expected[key] = sum(bits[event] for event in eventSet)
+            self.assertEqual(output, expected, message)
+            for key in output:
+                if key[0] == "pTop" or bitsets is \
+                   reconcileEvents.CVcommonEvents:
+                    self.assertEqual(set(reconcileEvents.decodeEvents(\
+                        output[key], events)), eventSets[key], message)
+
+if __name__ == "__main__":
+    unittest.main()